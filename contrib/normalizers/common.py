@@ -2,11 +2,84 @@
 """
 import logging
 from collections import namedtuple
+from operator import itemgetter
+
+import numpy as np
 
 LOGGER = logging.getLogger(__name__)
 
 Field = namedtuple('Field', ['key', 'equ', 'unit', 'desc'])
 
+# Values an equation is evaluated at to find if it is linear
+_PROBES = (0, 1, 2, -3, 7, 0.5, 1000, 65535)
+
+# Placeholder for the fields missing from a frame
+_MISSING = object()
+
+_NUMBER_TYPES = (int, float, np.integer, np.floating)
+
+_INT_LIMIT = 2**31
+
+
+def _is_number(value):
+    return isinstance(value, _NUMBER_TYPES) and not isinstance(
+        value, (bool, np.bool_))
+
+
+def compile_equation(equ):
+    """ Find how an equation can be applied to a whole column at once
+
+        Linear equations (scale and offset) are recognized by evaluating
+        them at a few values, and applied to numpy arrays. Any other
+        equation is applied to one value at a time.
+
+        :param equ: equation of a field
+        :returns: 'identity', 'linear' or 'elementwise'
+    """
+    try:
+        values = [equ(probe) for probe in _PROBES]
+        if not all(_is_number(value) for value in values):
+            return 'elementwise'
+        offset = values[0]
+        scale = values[1] - offset
+        if not np.allclose(values, [scale * probe + offset
+                                    for probe in _PROBES],
+                           rtol=1e-9,
+                           atol=0):
+            return 'elementwise'
+
+        probes = np.array(_PROBES, dtype=float)
+        result = equ(probes)
+        if result is probes:
+            return 'identity'
+        if (isinstance(result, np.ndarray) and result.shape == probes.shape
+                and np.array_equal(result, values)):
+            return 'linear'
+    except Exception:  # pylint: disable=broad-except
+        pass
+    return 'elementwise'
+
+
+def _to_array(values):
+    """ Convert a column of values to a numpy array, if they are all
+        integers or all floats, so that the equation gives values of
+        the same type as when applied to each value
+
+        :returns: the array, or None
+    """
+    types = set(map(type, values))
+    if types <= {float, np.float64}:
+        return np.array(values, dtype=np.float64)
+    if types <= {int}:
+        try:
+            array = np.array(values, dtype=np.int64)
+        except OverflowError:
+            return None
+        # Leave room for the equation not to overflow 64 bits integers
+        if np.abs(array).max() < _INT_LIMIT:
+            return array
+    return None
+
 
 class Normalizer:
     """ Normalizer class
@@ -15,7 +88,40 @@ class Normalizer:
 
     """
     def __init__(self):
+        self._fields = {}
         self.normalizers = []
+        self._compiled = {}
+
+    @property
+    def normalizers(self):
+        """ Return the list of fields normalized.
+        """
+        return self._normalizers
+
+    @normalizers.setter
+    def normalizers(self, normalizers):
+        """ Set the list of fields normalized, and index them by key.
+        """
+        self._normalizers = normalizers
+        self._fields = {}
+        for field in normalizers:
+            if field.key in self._fields:
+                LOGGER.warning('Field %s is defined more than once, '
+                               'using its first definition', field.key)
+                continue
+            self._fields[field.key] = field
+
+    def _compile(self, field):
+        """ Compile the equation of a field once
+
+            :param field: field to normalize
+            :returns: the compile_equation result for the field equation
+        """
+        equ, kind = self._compiled.get(field.key, (None, None))
+        if equ is not field.equ:
+            kind = compile_equation(field.equ)
+            self._compiled[field.key] = (field.equ, kind)
+        return kind
 
     def normalize(self, frame):
         """ Normalize data from a frame
@@ -40,15 +146,128 @@ class Normalizer:
 
         return frame
 
+    def normalize_columns(self, columns):
+        """ Normalize data given column by column
+
+            Linear equations are applied to whole columns as numpy array
+            operations, the other ones to each value.
+
+            :param columns: values of each field, as lists or numpy arrays
+            :type columns: dict
+            :returns: the normalized values of each field found in columns,
+                as numpy arrays for the columns normalized at once and
+                lists otherwise
+        """
+        normalized = {}
+        for field in self._fields.values():
+            values = columns.get(field.key)
+            if values is None or len(values) == 0:
+                continue
+            kind = self._compile(field)
+            if kind == 'identity':
+                normalized[field.key] = values
+                continue
+            array = None
+            if kind == 'linear':
+                array = values if isinstance(
+                    values, np.ndarray) else _to_array(values)
+            if array is not None and array.dtype.kind in 'iuf':
+                normalized[field.key] = field.equ(array)
+            else:
+                normalized[field.key] = [field.equ(value) for value in values]
+        return normalized
+
+    def normalize_frames(self, frames):
+        """ Normalize data from a list of frames, column by column
+
+            Gives the same frames as normalize called on every frame, with
+            the values gathered in columns and normalized by
+            normalize_columns.
+
+            :param frames: input frames
+            :returns: the normalized frames
+        """
+        keys = self.get_fields_name()
+        if not keys:
+            return frames
+        units = [self._fields[key].unit for key in keys]
+        getter = itemgetter(*keys) if len(keys) > 1 else (
+            lambda fields: (fields[keys[0]], ))
+
+        # One row of field values per frame, transposed into columns
+        rows = []
+        missing = 0
+        for frame in frames:
+            fields = frame['fields']
+            try:
+                rows.append(getter(fields))
+            except KeyError:
+                rows.append(
+                    tuple(fields.get(key, _MISSING) for key in keys))
+                missing += 1
+        columns = list(zip(*rows)) if rows else [()] * len(keys)
+
+        present = {}
+        for key, column in zip(keys, columns):
+            if missing:
+                column = [value for value in column if value is not _MISSING]
+            present[key] = column
+        normalized = self.normalize_columns(present)
+
+        for index, (key, column) in enumerate(zip(keys, columns)):
+            values = normalized.get(key, present[key])
+            if isinstance(values, np.ndarray):
+                values = values.tolist()
+            if missing and len(values) < len(column):
+                values = iter(values)
+                values = [
+                    _MISSING if value is _MISSING else next(values)
+                    for value in column
+                ]
+            columns[index] = values
+
+        for frame, row in zip(frames, zip(*columns)):
+            fields = frame['fields']
+            for key, value, unit in zip(keys, row, units):
+                if value is not _MISSING:
+                    fields[key] = {'value': value, 'unit': unit}
+
+        if missing:
+            LOGGER.warning('Some fields could not be normalized in %d frames',
+                           missing)
+
+        return frames
+
+    def get_field(self, key):
+        """ Get the field for a given key
+
+            :param key: given key
+            :return: The field, or None if the key is not normalized
+        """
+        return self._fields.get(key)
+
     def get_unit(self, key):
         """ Get the unit for a given key
 
             :param key: given key
         """
-        for field in self.normalizers:
-            if key == field.key:
-                return field.unit
-        return None
+        field = self._fields.get(key)
+        return None if field is None else field.unit
+
+    def get_description(self, key):
+        """ Get the description for a given key
+
+            :param key: given key
+        """
+        field = self._fields.get(key)
+        return None if field is None else field.desc
+
+    def has_field(self, key):
+        """ Tell if a given key is normalized
+
+            :param key: given key
+        """
+        return key in self._fields
 
     def validate_frame(self, frame):
         """ Validate that the frame is valid for the satellite
@@ -63,7 +282,7 @@ class Normalizer:
 
             :return: The list of the field names
         """
-        return [field.key for field in self.normalizers]
+        return list(self._fields)
 
 
 def int2ddn(val):
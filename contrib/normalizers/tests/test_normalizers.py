@@ -0,0 +1,124 @@
+"""Tests for the normalization of frames column by column
+"""
+
+import copy
+import importlib
+import inspect
+import pkgutil
+
+import pytest
+
+import contrib.normalizers
+from contrib.normalizers.common import _INT_LIMIT, Field, Normalizer
+from contrib.normalizers.dummy import Dummy
+
+N_FRAMES = 6
+
+# Columns of raw values, one value per frame
+COLUMNS = {
+    "int": [0, 7, -3, 12, 255, 1],
+    "float": [0.5, -1.25, 3.0, 100.75, 0.0, 2.5],
+    "mixed": [1, 2.5, -3, 4.0, 0, 7.25],
+    "large int": [_INT_LIMIT, 2**40 + 1, 5, -2**33, _INT_LIMIT - 1, 3],
+    "int over 64 bits": [2**70, 1, 2, 3, 4, 5],
+    "str": ["B1.5", "C2.0", -1, "M1", "A3.3", "X1"],
+}
+
+
+def build_normalizers():
+    """An instance of every normalizer of contrib.normalizers"""
+    normalizers = []
+    for module_info in pkgutil.iter_modules(contrib.normalizers.__path__):
+        module = importlib.import_module("contrib.normalizers." +
+                                         module_info.name)
+        for _, cls in inspect.getmembers(module, inspect.isclass):
+            if (issubclass(cls, Normalizer) and cls is not Normalizer
+                    and cls.__module__ == module.__name__):
+                normalizers.append(cls())
+    for normalizer in normalizers:
+        if isinstance(normalizer, Dummy):
+            normalizer.create_dummy_normalizer(["a", "b", "c"])
+    return normalizers
+
+
+class Piecewise(Normalizer):
+    """Equations that are linear at the values compile_equation tries,
+    but not everywhere"""
+    def __init__(self):
+        super().__init__()
+        self.normalizers = [
+            Field("scalar", lambda x: x * 2 if x < 70000 else x * 3, "u",
+                  "Only works on scalars"),
+            Field("array", lambda x: x - (x > 70000) * 5, "u",
+                  "Also works on arrays"),
+            Field("linear", lambda x: x * 0.5 + 2, "u", "Linear"),
+            Field("large scale", lambda x: x * 2**40, "u",
+                  "Overflows 64 bits integers with large values"),
+        ]
+
+
+def accepts(field, values):
+    """Tell if the equation of a field can be applied to every value"""
+    try:
+        for value in values:
+            field.equ(value)
+    except Exception:  # pylint: disable=broad-except
+        return False
+    return True
+
+
+def build_frames(normalizer, values):
+    """Frames holding the values for the fields accepting them, with some
+    fields missing from some frames
+
+    :returns: the frames, and the keys of the fields in the frames
+    """
+    keys = [
+        field.key for field in normalizer.normalizers
+        if accepts(field, values)
+    ]
+    frames = []
+    for i in range(N_FRAMES):
+        fields = {
+            key: values[i]
+            for j, key in enumerate(keys) if (i + j) % 4 != 0
+        }
+        fields["not normalized"] = i
+        frames.append({"time": "2020-01-01 00:00:0{}".format(i),
+                       "fields": fields})
+    return frames, keys
+
+
+def assert_same(actual, expected):
+    """Compare values and their types, in nested dicts and lists"""
+    assert type(actual) is type(expected), (actual, expected)
+    if isinstance(expected, dict):
+        assert list(actual) == list(expected)
+        for key in expected:
+            assert_same(actual[key], expected[key])
+    elif isinstance(expected, list):
+        assert len(actual) == len(expected)
+        for actual_value, expected_value in zip(actual, expected):
+            assert_same(actual_value, expected_value)
+    else:
+        assert actual == expected
+
+
+@pytest.mark.parametrize("normalizer",
+                         build_normalizers() + [Piecewise()],
+                         ids=lambda normalizer: type(normalizer).__name__)
+def test_normalize_frames_matches_normalize(normalizer):
+    """normalize_frames gives the same values, of the same types, as
+    normalize called on every frame"""
+    normalized_keys = set()
+    for values in COLUMNS.values():
+        frames, keys = build_frames(normalizer, values)
+        normalized_keys.update(keys)
+
+        expected = [
+            normalizer.normalize(frame) for frame in copy.deepcopy(frames)
+        ]
+        actual = normalizer.normalize_frames(copy.deepcopy(frames))
+        assert_same(actual, expected)
+
+    assert normalized_keys == set(normalizer.get_fields_name())
@@ -1,24 +1,38 @@
 import json
 import logging
-import math
 import os
 from pathlib import Path
 
 import joblib
+import numpy as np
 import pandas as pd
 from betsi.models import custom_autoencoder
-from betsi.predictors import distance_measure, get_events
-from betsi.preprocessors import convert_from_column, convert_to_column, \
-    normalize_all_data
+from betsi.predictors import get_events
+from betsi.preprocessors import normalize_all_data
 from mlflow import log_metric, log_param
-from sklearn.model_selection import train_test_split
+from tensorflow.keras.models import load_model
 
 from polaris.anomaly.anomaly_detector_parameters import \
     AnomalyDetectorParameters
+from polaris.anomaly.distances import consecutive_distances, \
+    relative_changes
+from polaris.anomaly.sliding_windows import SlidingWindows, WindowBatches
 from polaris.feature.cleaner import Cleaner
 
 LOGGER = logging.getLogger(__name__)
 
+ENCODER_MODEL_FILE = "encoder_model.tf_model"
+NORMALIZER_FILE = "normalizer.pkl"
+SCORING_PARAMETERS_FILE = "scoring_parameters.json"
+
+# Number of windows given at once to the encoder model, by default
+ENCODE_CHUNK_SIZE = 10000
+
+
+class MissingArtifacts(Exception):
+    """Raised when the artifacts needed to score data are not found
+    """
+
 
 class AnomalyDetector:
     def __init__(self, dataset_metadata,
@@ -34,6 +48,8 @@ class AnomalyDetector:
         self.preprocessed_data = None
         self.events = None
         self.time_index = None
+        self.input_columns = None
+        self.feature_columns = None
 
         self.anomaly_detector_params = anomaly_detector_params
         self._feature_cleaner = Cleaner(
@@ -77,14 +93,9 @@ class AnomalyDetector:
         """
         test_size = self.anomaly_detector_params.test_size_fraction
         # Split it into train and test data
-        # set shuffle to false as order matters
+        # without shuffle as order matters
         # since it is time series data
-        preprocessed_data = self.preprocessed_data
-        train_data, test_data = train_test_split(preprocessed_data,
-                                                 test_size=test_size,
-                                                 shuffle=False)
-        data = (train_data, test_data)
-        return data
+        return self.preprocessed_data.split(test_size)
 
     def create_models(self):
         """Creates the 3 models: autoencoder, encoder and decoder
@@ -142,9 +153,9 @@ class AnomalyDetector:
             "Training on %i rows of data, with batch size %i and %i epochs",
             train_data.shape[0], batch_size, epochs)
         try:
-            history = autoencoder_model.fit(train_data,
-                                            train_data,
-                                            batch_size=batch_size,
+            history = autoencoder_model.fit(WindowBatches(train_data,
+                                                          batch_size,
+                                                          shuffle=True),
                                             epochs=epochs)
         except Exception as err:
             # Exception if data not formatted properly, gradients vanishing
@@ -155,9 +166,8 @@ class AnomalyDetector:
 
         # Evaluate the model on test data and log results.
         # It's up to the user to decide if it has overfitted.
-        test_results = autoencoder_model.evaluate(test_data,
-                                                  test_data,
-                                                  batch_size=batch_size)
+        test_results = autoencoder_model.evaluate(
+            WindowBatches(test_data, batch_size))
         log_metric("Test loss", test_results[0])
         log_metric("Test MSE", test_results[1])
         LOGGER.info("Test loss: %s, Test MSE: %s", str(test_results[0]),
@@ -186,17 +196,80 @@ class AnomalyDetector:
         # Save models to respective files
         autoencoder_model.save(
             os.path.join(cache_dir, "autoencoder_model.tf_model"))
-        encoder_model.save(os.path.join(cache_dir, "encoder_model.tf_model"))
+        encoder_model.save(os.path.join(cache_dir, ENCODER_MODEL_FILE))
         decoder_model.save(os.path.join(cache_dir, "decoder_model.tf_model"))
 
         if save_test_train_data:
             tt_data = self.get_train_test_data()
+            columns = self.preprocessed_data.window_columns
             # Save test and train data for future use (while visualizing)
-            tt_data[0].to_pickle(os.path.join(cache_dir, "train_data.pkl"))
-            tt_data[1].to_pickle(os.path.join(cache_dir, "test_data.pkl"))
+            pd.DataFrame(tt_data[0], columns=columns).to_pickle(
+                os.path.join(cache_dir, "train_data.pkl"))
+            pd.DataFrame(tt_data[1], columns=columns).to_pickle(
+                os.path.join(cache_dir, "test_data.pkl"))
 
         # Save the normalizer to preprocess data next time
-        joblib.dump(normalizer, os.path.join(cache_dir, "normalizer.pkl"))
+        joblib.dump(normalizer, os.path.join(cache_dir, NORMALIZER_FILE))
+
+        # Save what is needed to preprocess data the same way next time
+        scoring_parameters = {
+            "input_columns": self.input_columns,
+            "feature_columns": self.feature_columns,
+            "window_size": self.anomaly_detector_params.window_size,
+            "stride": self.anomaly_detector_params.stride,
+        }
+        with open(os.path.join(cache_dir, SCORING_PARAMETERS_FILE),
+                  "w") as json_file:
+            json.dump(scoring_parameters, json_file)
+
+    def load_artifacts(self, cache_dir, cache=None):
+        """Load the artifacts saved by save_artifacts to score new data
+            without training: encoder model, normalizer and the
+            preprocessing parameters
+
+        :param cache_dir: Path to cache directory
+        :param cache: Mapping keeping loaded artifacts, keyed by cache
+            directory and modification time of the artifacts, defaults to
+            None (artifacts always loaded from cache_dir)
+        :type cache: dict, optional
+        :raises MissingArtifacts: If one of the artifacts is not found
+        """
+        encoder_path = os.path.join(cache_dir, ENCODER_MODEL_FILE)
+        normalizer_path = os.path.join(cache_dir, NORMALIZER_FILE)
+        parameters_path = os.path.join(cache_dir, SCORING_PARAMETERS_FILE)
+        for path in (encoder_path, normalizer_path, parameters_path):
+            if not os.path.exists(path):
+                LOGGER.critical(
+                    "%s not found. Train the detector with "
+                    "`polaris behave` first, using the same cache directory.",
+                    path)
+                raise MissingArtifacts(path)
+
+        artifacts = None
+        if cache is not None:
+            # save_artifacts rewrites these files along with the model
+            cache_key = (os.path.abspath(cache_dir),
+                         os.stat(normalizer_path).st_mtime_ns,
+                         os.stat(parameters_path).st_mtime_ns)
+            artifacts = cache.get(cache_key)
+
+        if artifacts is None:
+            with open(parameters_path, "r") as json_file:
+                scoring_parameters = json.load(json_file)
+            artifacts = (scoring_parameters, joblib.load(normalizer_path),
+                         load_model(encoder_path))
+            if cache is not None:
+                cache[cache_key] = artifacts
+
+        scoring_parameters, self.normalizer, encoder_model = artifacts
+        self.input_columns = scoring_parameters["input_columns"]
+        self.feature_columns = scoring_parameters["feature_columns"]
+        # The model only fits data windowed the way it was trained on
+        self.anomaly_detector_params.window_size = \
+            scoring_parameters["window_size"]
+        self.anomaly_detector_params.stride = scoring_parameters["stride"]
+
+        self.models = (None, encoder_model, None)
 
     @staticmethod
     def save_anomaly_metrics(cache_dir, anomaly_metrics):
@@ -226,64 +299,137 @@ class AnomalyDetector:
         feature_data = df_pred_bin
 
         if feature_data is None:
-            data = self.preprocessed_data
-            encoder_model = self.models[1]
-            feature_data = encoder_model.predict(data)
+            feature_data = self.encode()
 
         # Get distances
-        distance_list = []
-        for row_no in range(feature_data.shape[0] - 1):
-            distance_list.append(
-                distance_measure(feature_data[row_no],
-                                 feature_data[row_no + 1]))
+        distance_list = consecutive_distances(feature_data).tolist()
 
         events = get_events(distance_list, threshold=noise_margin_per)
         return events
 
-    def detect_individual_events(self):
+    def detect_individual_events(self, feature_data=None):
         """
         Function to detect events for individual parameters of data
+
+        :param feature_data: compact representation of input from AE model,
+            computed by detect_events if not given
+        :type feature_data: np.ndarray, optional
         """
 
-        window_size = self.anomaly_detector_params.window_size
-        stride = self.anomaly_detector_params.stride
         noise_margin_per = self.anomaly_detector_params.noise_margin_per
 
         # to get data of individual columns
-        data = convert_from_column(self.preprocessed_data, window_size, stride)
+        data = self.preprocessed_data.rows()
 
-        # it is because convert_from_columns doesnot completely return original
-        # data. when the betsi will be updated, there will be no need of it
-        if isinstance(data, pd.DataFrame):
-            columns = data.columns
-            columns = [col[:-1] for col in columns]
-            data.columns = columns
+        # generating the distance lists of all columns at once
+        distances = relative_changes(data.to_numpy())
 
         res = {}
-        for col in data.columns:
-            col_data = data[col].tolist()
-            distance_list = []
-
-            # generating the distance list
-            for row_no in range(len(col_data) - 1):
-                curr_item = abs(col_data[row_no])
-                next_item = abs(col_data[row_no + 1])
-                if curr_item == 0 or next_item == 0:
-                    value_to_append = 0
-                else:
-                    value_to_append = (curr_item - next_item) / math.sqrt(
-                        curr_item * next_item)
-                distance_list.append(value_to_append)
-
+        for col_no, col in enumerate(data.columns):
             # detecting events with distance list
-            events = get_events(distance_list, threshold=noise_margin_per)
+            events = get_events(distances[:, col_no].tolist(),
+                                threshold=noise_margin_per)
             res[col] = events
-        res["overall"] = self.detect_events()
+        res["overall"] = self.detect_events(feature_data)
         self.events = res
 
+    def encode(self, chunk_size=ENCODE_CHUNK_SIZE):
+        """
+        Function to encode the preprocessed data with the encoder model,
+        chunk_size windows at a time
+
+        :param chunk_size: number of windows encoded at once
+        :type chunk_size: int, optional
+        :return: compact representation of input from AE model
+        :rtype: np.ndarray
+        """
+        encoder_model = self.models[1]
+        batch_size = self.anomaly_detector_params.batch_size
+        data = self.preprocessed_data.windows
+
+        feature_data = None
+        for start in range(0, data.shape[0], chunk_size):
+            windows = np.ascontiguousarray(data[start:start + chunk_size])
+            chunk = encoder_model.predict(windows, batch_size=batch_size)
+            if feature_data is None:
+                feature_data = np.empty((data.shape[0], ) + chunk.shape[1:],
+                                        dtype=chunk.dtype)
+            feature_data[start:start + chunk.shape[0]] = chunk
+            LOGGER.info("Encoded %i/%i windows",
+                        start + chunk.shape[0], data.shape[0])
+        return feature_data
+
+    def set_scoring_data(self, data):
+        """
+        Function to normalize, clean and convert to windows the input
+        data with the loaded normalizer, keeping the columns the models
+        were trained on
+
+        :param data: Input Data
+        :type data: DataFrame
+        :raises ValueError: If columns used for training are missing, or
+            if a feature column has no values at all
+        """
+        #  save time index for future reference
+        self.time_index = pd.to_datetime(data.time, unit="s")
+
+        missing_columns = set(self.input_columns) - set(data.columns)
+        if missing_columns:
+            raise ValueError("Columns used for training are missing: " +
+                             ", ".join(sorted(missing_columns)))
+        data = data[self.input_columns]
+
+        normalized_data = pd.DataFrame(
+            self.normalizer.transform(data.to_numpy()),
+            columns=data.columns,
+            index=data.index)
+        cleaned_data = normalized_data[self.feature_columns]
+        cleaned_data = cleaned_data.fillna(method="ffill")
+        cleaned_data = cleaned_data.fillna(method="bfill")
+
+        # The models need every feature they were trained on
+        empty_columns = cleaned_data.columns[cleaned_data.isna().all()]
+        if len(empty_columns) > 0:
+            raise ValueError("Columns used for training have no values: " +
+                             ", ".join(map(str, empty_columns)))
+
+        self.preprocessed_data = self.convert_to_windows(cleaned_data)
+
+    def score_output(self, data, chunk_size=ENCODE_CHUNK_SIZE):
+        """
+        Score data with the loaded models and detect events, without
+        training
+
+        :param data: Input Data
+        :type data: DataFrame
+        :param chunk_size: number of windows encoded at once
+        :type chunk_size: int, optional
+        """
+        sorted_data = self.timeseries_sort_by_timestamp(data)
+        self.set_scoring_data(sorted_data)
+        self.detect_individual_events(self.encode(chunk_size))
+
+    def convert_to_windows(self, data):
+        """
+        Function to convert data into windows of consecutive rows, the
+        input of the models
+
+        :param data: cleaned data
+        :type data: DataFrame
+        :return: windows
+        :rtype: SlidingWindows
+        """
+        params = self.anomaly_detector_params
+        if self.preprocessed_data is not None:
+            self.preprocessed_data.close()
+        return SlidingWindows(data,
+                              params.window_size,
+                              params.stride,
+                              memmap_dir=params.windows_memmap_dir)
+
     def set_data(self, data):
         """
-        Function to clean , normalize and convert to columns
+        Function to clean , normalize and convert to windows
         the input data set properties like
         preprocessed_data, time_index of the detector
 
@@ -292,8 +438,6 @@ class AnomalyDetector:
         """
         # From config file
         layer_dims = self.anomaly_detector_params.network_dimensions
-        window_size = self.anomaly_detector_params.window_size
-        stride = self.anomaly_detector_params.stride
         feature_cleaner = self._feature_cleaner
 
         #  save time index for future reference
@@ -301,6 +445,7 @@ class AnomalyDetector:
 
         # necessary droping constant values before normalizing
         data = feature_cleaner.drop_constant_values(data)
+        self.input_columns = list(data.columns)
 
         # Normalize the data
         normalized_data, normalizer = normalize_all_data(data)
@@ -308,9 +453,10 @@ class AnomalyDetector:
 
         # clean data
         cleaned_data = self.clean_data(normalized_data)
+        self.feature_columns = list(cleaned_data.columns)
 
-        # convert data into columns
-        converted_data = convert_to_column(cleaned_data, window_size, stride)
+        # convert data into windows
+        converted_data = self.convert_to_windows(cleaned_data)
 
         self.preprocessed_data = converted_data
 
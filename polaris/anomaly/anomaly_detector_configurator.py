@@ -52,6 +52,7 @@ class AnomalyDetectorConfigurator:
         self._anomaly_detector_parameters.batch_size = 128
         self._anomaly_detector_parameters.network_dimensions = [64, 32]
         self._anomaly_detector_parameters.activations = None
+        self._anomaly_detector_parameters.windows_memmap_dir = None
 
         feature_cleaner = CleanerConfigurator()
         self._anomaly_detector_parameters.dataset_cleaning_params = \
@@ -78,7 +79,8 @@ class AnomalyDetectorConfigurator:
                                   metrics, test_size_fraction,
                                   number_of_epochs, noise_margin_per,
                                   batch_size, network_dimensions, activations,
-                                  dataset_cleaning_params):
+                                  dataset_cleaning_params,
+                                  windows_memmap_dir=None):
         """ Set all the detector_parameters properties.
 
             :param window_size: window size for preprocessing of Data
@@ -101,6 +103,9 @@ class AnomalyDetectorConfigurator:
             :type noise_margin_per: int
             :param batch_size: batch size to be processed
             :type batch_size: int
+            :param windows_memmap_dir: directory of a temporary file holding
+                the windows of data, defaults to None (kept in memory)
+            :type windows_memmap_dir: str, optional
             :raises TypeError: If metrics is not a Python dictionary
                 or if there is one value in metrics that is not a
                 Python list
@@ -115,6 +120,8 @@ class AnomalyDetectorConfigurator:
         self._anomaly_detector_parameters.noise_margin_per = noise_margin_per
         self._anomaly_detector_parameters.batch_size = batch_size
         self._anomaly_detector_parameters.activations = activations
+        self._anomaly_detector_parameters.windows_memmap_dir = \
+            windows_memmap_dir
 
         feature_cleaner = CleanerConfigurator(dataset_cleaning_params)
         self._anomaly_detector_parameters.dataset_cleaning_params = \
@@ -14,6 +14,7 @@ class AnomalyDetectorParameters:
         self._optimizer = None
         self._stride = None
         self._window_size = None
+        self._windows_memmap_dir = None
 
     @property
     def window_size(self):
@@ -23,6 +24,18 @@ class AnomalyDetectorParameters:
     def window_size(self, window_size):
         self._window_size = window_size
 
+    @property
+    def windows_memmap_dir(self):
+        """
+        return directory of the file holding the windows of data, None to
+        keep them in memory
+        """
+        return self._windows_memmap_dir
+
+    @windows_memmap_dir.setter
+    def windows_memmap_dir(self, windows_memmap_dir):
+        self._windows_memmap_dir = windows_memmap_dir
+
     @property
     def stride(self):
         return self._stride
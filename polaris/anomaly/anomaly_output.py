@@ -1,8 +1,5 @@
 import json
 
-import pandas as pd
-from betsi.preprocessors import convert_from_column
-
 from polaris.anomaly.anomaly_detector import AnomalyDetector
 from polaris.common import constants
 from polaris.common.json_serializable import JsonSerializable
@@ -55,23 +52,7 @@ class AnomalyOutput(dict, JsonSerializable):
 
         :param detector: Detector used to detect the events
         """
-        window_size = detector.anomaly_detector_params.window_size
-        stride = detector.anomaly_detector_params.stride
-
-        converted_data = convert_from_column(detector.preprocessed_data,
-                                             window_size, stride)
-
-        # it is because convert_from_columns does not completely return
-        # original data. When convert_from_column method from preprocessors
-        # of Betsi is updated, there will be no need of it.
-        # Related issue:
-        # https://gitlab.com/librespacefoundation/polaris/betsi/-/issues/18
-        original_data = pd.DataFrame(converted_data,
-                                     columns=converted_data.columns)
-        columns = converted_data.columns
-        columns = [col[:-1] for col in columns]
-        original_data.columns = columns
-        return original_data
+        return detector.preprocessed_data.rows()
 
     def show(self):
         """ Get dictionary representation to represent
@@ -6,7 +6,8 @@ import os
 
 from mlflow import set_experiment, start_run, tensorflow
 
-from polaris.anomaly.anomaly_detector import AnomalyDetector
+from polaris.anomaly.anomaly_detector import (ENCODE_CHUNK_SIZE,
+                                               AnomalyDetector)
 from polaris.anomaly.anomaly_detector_configurator import \
     AnomalyDetectorConfigurator
 from polaris.anomaly.anomaly_output import AnomalyOutput
@@ -29,7 +30,11 @@ def behave(input_file,
            cache_dir='/tmp',
            metrics_dir='/tmp',
            csv_sep=',',
-           save_test_train_data=False):
+           save_test_train_data=False,
+           score_only=False,
+           chunk_size=ENCODE_CHUNK_SIZE,
+           data=None,
+           artifacts_cache=None):
     """
     Detect events in input data and output anomaly events
 
@@ -61,6 +66,22 @@ def behave(input_file,
             train data in cache or not
         :type save_test_train_data: Boolean
 
+        :param score_only: skip training and score the input data with
+            the models and normalizer previously saved in cache_dir
+        :type score_only: Boolean
+
+        :param chunk_size: number of windows encoded at once when
+            scoring without training
+        :type chunk_size: int, optional
+
+        :param data: metadata and dataframe of input_file already read,
+            used instead of reading it, defaults to None
+        :type data: tuple, optional
+
+        :param artifacts_cache: mapping keeping the artifacts loaded when
+            scoring without training, defaults to None
+        :type artifacts_cache: dict, optional
+
         :raises NoFramesInInputFile: If there are no frames in the converted
             dataframe
     """
@@ -68,30 +89,36 @@ def behave(input_file,
         LOGGER.error("output file path is a directory")
         raise FileIsADirectory
 
-    metadata, dataframe = read_polaris_data(input_file, csv_sep)
+    if data is None:
+        metadata, dataframe = read_polaris_data(input_file, csv_sep)
+    else:
+        metadata, dataframe = data
 
     if dataframe.empty:
         LOGGER.error("Empty list of frames -- nothing to learn from!")
         raise NoFramesInInputFile
 
-    set_experiment(experiment_name=metadata['satellite_name'])
-
     #  getting parameters for anomaly detector
     anomaly_config = AnomalyDetectorConfigurator(
         detector_configuration_file=detector_config_file)
     anomaly_params = anomaly_config.get_configuration()
 
-    tensorflow.autolog()
     # creating detector and detecting events
     detector = AnomalyDetector(dataset_metadata=metadata,
                                anomaly_detector_params=anomaly_params)
-    with start_run(run_name="behave analysis"):
-        anomaly_metrics = detector.train_predict_output(data=dataframe)
-
-    # saving data generated by detector
-    detector.save_artifacts(cache_dir, save_test_train_data)
-
-    detector.save_anomaly_metrics(metrics_dir, anomaly_metrics)
+    if score_only:
+        detector.load_artifacts(cache_dir, cache=artifacts_cache)
+        detector.score_output(data=dataframe, chunk_size=chunk_size)
+    else:
+        set_experiment(experiment_name=metadata['satellite_name'])
+        tensorflow.autolog()
+        with start_run(run_name="behave analysis"):
+            anomaly_metrics = detector.train_predict_output(data=dataframe)
+
+        # saving data generated by detector
+        detector.save_artifacts(cache_dir, save_test_train_data)
+
+        detector.save_anomaly_metrics(metrics_dir, anomaly_metrics)
 
     output = AnomalyOutput(metadata=metadata)
     output.from_detector(detector=detector)
@@ -0,0 +1,47 @@
+"""
+Distances between consecutive rows of data, the measures events are
+detected with
+"""
+import numpy as np
+
+
+def consecutive_distances(feature_data):
+    """
+    Function to compute the distance between every pair of consecutive
+    rows, as betsi's distance_measure does for a single pair
+
+    :param feature_data: compact representation of input from AE model
+    :type feature_data: np.ndarray
+    :return: distances, one less than the number of rows
+    :rtype: np.ndarray
+    """
+    # Norms are computed in the precision of the model output, like
+    # distance_measure does, and the rest in double precision
+    feature_data = np.asarray(feature_data)
+    feature_data = feature_data.reshape((feature_data.shape[0], -1))
+    norms = np.sqrt(np.einsum("ij,ij->i", feature_data, feature_data))
+    diff = feature_data[1:] - feature_data[:-1]
+    diff_norms = np.sqrt(np.einsum("ij,ij->i", diff, diff))
+    norm_products = (norms[:-1] * norms[1:]).astype(np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return diff_norms / np.sqrt(norm_products)
+
+
+def relative_changes(data):
+    """
+    Function to compute the relative change between consecutive values
+    of every column, 0 where one of the two values is 0
+
+    :param data: values, one column per parameter
+    :type data: np.ndarray
+    :return: changes, one row less than data
+    :rtype: np.ndarray
+    """
+    data = np.abs(np.asarray(data, dtype=np.float64))
+    curr_items = data[:-1]
+    next_items = data[1:]
+    has_zero = (curr_items == 0) | (next_items == 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        changes = (curr_items - next_items) / np.sqrt(curr_items * next_items)
+    changes[has_zero] = 0
+    return changes
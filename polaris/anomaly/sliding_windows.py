@@ -0,0 +1,205 @@
+"""
+Module to turn a time series into overlapping windows without copies.
+"""
+import logging
+import math
+import tempfile
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import as_strided
+from tensorflow.keras.utils import Sequence
+
+LOGGER = logging.getLogger(__name__)
+
+
+def resolve_stride(window_size, stride):
+    """
+    Function to check window_size and stride, as betsi's
+    convert_to_column does, and turn a negative stride into a positive one
+
+    :param window_size: number of rows in one window
+    :type window_size: int
+    :param stride: number of rows between the start of consecutive windows,
+        counted from window_size + 1 when negative
+    :type stride: int
+    :return: positive stride
+    :rtype: int
+    :raises ValueError: If window_size or stride are invalid
+    """
+    if stride == 0:
+        raise ValueError(
+            "Invalid stride: {}! Expected non-zero input".format(stride))
+
+    if window_size <= 0:
+        raise ValueError(
+            "Invalid window size: {}! Expected positive integer".format(
+                window_size))
+
+    if stride > window_size:
+        raise ValueError("Stride must be less than window_size for overlap")
+
+    if stride < 0:
+        stride = window_size + 1 + stride
+        if stride <= 0:
+            raise ValueError(
+                "Stride too negative! Stride must be between"
+                " -(window_size + 1) and window_size both inclusive.")
+    return stride
+
+
+class SlidingWindows:
+    """
+    Windows of window_size consecutive rows, starting every stride rows,
+    each one flattened to a single row like betsi's convert_to_column.
+
+    The rows are copied once to a contiguous float32 buffer, padded with
+    zeros to fill the last window, and the windows are a read-only view on
+    it: they take no more memory than the data itself.
+    """
+    def __init__(self, data, window_size, stride=-1, memmap_dir=None):
+        """
+        :param data: Input data, one column per parameter
+        :type data: pd.DataFrame
+        :param window_size: number of rows in one window
+        :type window_size: int
+        :param stride: number of rows between the start of consecutive
+            windows, defaults to -1 (one row)
+        :type stride: int, optional
+        :param memmap_dir: directory of a temporary file holding the
+            buffer, defaults to None (buffer kept in memory)
+        :type memmap_dir: str, optional
+        """
+        self.window_size = window_size
+        self.stride = resolve_stride(window_size, stride)
+        self.columns = list(data.columns)
+
+        n_rows, n_columns = data.shape
+        n_windows = max(
+            math.ceil((n_rows - window_size) / self.stride) + 1, 0)
+        n_buffer_rows = max((n_windows - 1) * self.stride + window_size,
+                            n_rows)
+
+        self._buffer_file = None
+        if memmap_dir is None:
+            self._buffer = np.zeros((n_buffer_rows, n_columns),
+                                    dtype=np.float32)
+        else:
+            # The file is removed as soon as it is closed
+            self._buffer_file = tempfile.TemporaryFile(dir=memmap_dir)
+            self._buffer = np.memmap(self._buffer_file,
+                                     dtype=np.float32,
+                                     mode="w+",
+                                     shape=(n_buffer_rows, n_columns))
+        self._buffer[:n_rows] = data.to_numpy(dtype=np.float32)
+
+        item_size = self._buffer.itemsize
+        self.windows = as_strided(
+            self._buffer,
+            shape=(n_windows, window_size * n_columns),
+            strides=(self.stride * n_columns * item_size, item_size),
+            writeable=False)
+        LOGGER.debug("%i windows of %i values over a buffer of %i rows",
+                     n_windows, window_size * n_columns, n_buffer_rows)
+
+    @property
+    def shape(self):
+        """
+        Return the shape of the windows as a 2D array
+        """
+        return self.windows.shape
+
+    def __len__(self):
+        return self.windows.shape[0]
+
+    @property
+    def window_columns(self):
+        """
+        Return the names of the window values, as convert_to_column does
+        """
+        return [
+            str(column) + str(i) for i in range(self.window_size)
+            for column in self.columns
+        ]
+
+    def rows(self):
+        """
+        Function to get the rows the windows are made of, including the
+        padding rows, as convert_from_column does
+
+        :return: rows, one column per parameter
+        :rtype: pd.DataFrame
+        """
+        return pd.DataFrame(self._buffer, columns=self.columns, copy=False)
+
+    def to_dataframe(self, start=0, stop=None):
+        """
+        Function to copy windows to a DataFrame
+
+        :return: windows, one row per window
+        :rtype: pd.DataFrame
+        """
+        return pd.DataFrame(self.windows[start:stop],
+                            columns=self.window_columns)
+
+    def split(self, test_size):
+        """
+        Function to split the windows in train and test windows, in
+        order, as train_test_split does without shuffle
+
+        :param test_size: fraction of the windows used for test
+        :type test_size: float
+        :return: train and test windows
+        :rtype: tuple
+        """
+        n_test = math.ceil(test_size * len(self))
+        n_train = len(self) - n_test
+        return self.windows[:n_train], self.windows[n_train:]
+
+    def close(self):
+        """
+        Function to release the temporary file of a memory-mapped buffer
+        """
+        if self._buffer_file is not None:
+            self._buffer_file.close()
+            self._buffer_file = None
+
+
+class WindowBatches(Sequence):
+    """
+    Batches of windows given to the autoencoder as input and target.
+
+    Only the windows of one batch are copied at a time.
+    """
+    def __init__(self, windows, batch_size, shuffle=False):
+        """
+        :param windows: windows, one row per window
+        :type windows: np.ndarray
+        :param batch_size: number of windows in a batch
+        :type batch_size: int
+        :param shuffle: shuffle the windows at the end of every epoch,
+            as fit does for arrays
+        :type shuffle: bool, optional
+        """
+        super().__init__()
+        self._windows = windows
+        self._batch_size = batch_size
+        self._shuffle = shuffle
+        self._order = np.arange(windows.shape[0])
+        self.on_epoch_end()
+
+    def __len__(self):
+        return math.ceil(self._windows.shape[0] / self._batch_size)
+
+    def __getitem__(self, index):
+        start = index * self._batch_size
+        stop = start + self._batch_size
+        if self._shuffle:
+            data = self._windows[np.sort(self._order[start:stop])]
+        else:
+            data = np.ascontiguousarray(self._windows[start:stop])
+        return data, data
+
+    def on_epoch_end(self):
+        if self._shuffle:
+            np.random.shuffle(self._order)
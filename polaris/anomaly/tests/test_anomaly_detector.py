@@ -0,0 +1,191 @@
+"""Tests for scoring data with the artifacts of a trained anomaly detector
+"""
+
+import json
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import StandardScaler
+
+pytest.importorskip("tensorflow")
+pytest.importorskip("betsi")
+
+# pylint: disable=wrong-import-position
+from polaris.anomaly import anomaly_detector
+from polaris.anomaly.anomaly_detector import (ENCODER_MODEL_FILE,
+                                              NORMALIZER_FILE,
+                                              SCORING_PARAMETERS_FILE,
+                                              AnomalyDetector,
+                                              MissingArtifacts)
+from polaris.anomaly.anomaly_detector_configurator import \
+    AnomalyDetectorConfigurator
+
+N_ROWS = 9
+
+
+class FakeEncoder:
+    """Encoder model keeping the sizes of the chunks it encodes"""
+    def __init__(self):
+        self.chunk_sizes = []
+
+    def predict(self, windows, batch_size=None):
+        """Encode windows to half their values"""
+        # pylint: disable=unused-argument
+        self.chunk_sizes.append(windows.shape[0])
+        return windows / 2
+
+
+def build_data():
+    """Input data with a column the models do not use"""
+    rng = np.random.RandomState(0)
+    return pd.DataFrame({
+        "time": np.arange(N_ROWS)[::-1] * 60.0,
+        "a": rng.normal(size=N_ROWS),
+        "b": rng.normal(size=N_ROWS) * 10,
+        "c": rng.normal(size=N_ROWS),
+    })
+
+
+def build_detector():
+    """Detector with the default parameters"""
+    params = AnomalyDetectorConfigurator().get_configuration()
+    return AnomalyDetector(dataset_metadata={"satellite_name": "test"},
+                           anomaly_detector_params=params)
+
+
+@pytest.fixture(name="loaded_models")
+def fixture_loaded_models(monkeypatch):
+    """Paths of the encoder models loaded, as fake encoders"""
+    loaded = []
+
+    def load_model(path):
+        loaded.append(path)
+        return FakeEncoder()
+
+    monkeypatch.setattr(anomaly_detector, "load_model", load_model)
+    return loaded
+
+
+@pytest.fixture(name="cache_dir")
+def fixture_cache_dir(tmp_path, loaded_models):
+    """Artifacts saved by a trained detector"""
+    # pylint: disable=unused-argument
+    data = build_data()
+    joblib.dump(StandardScaler().fit(data[["a", "b", "c"]].to_numpy()),
+                str(tmp_path / NORMALIZER_FILE))
+    with open(str(tmp_path / SCORING_PARAMETERS_FILE), "w") as json_file:
+        json.dump(
+            {
+                "input_columns": ["a", "b", "c"],
+                "feature_columns": ["a", "b"],
+                "window_size": 3,
+                "stride": 1,
+            }, json_file)
+    (tmp_path / ENCODER_MODEL_FILE).mkdir()
+    return tmp_path
+
+
+@pytest.mark.parametrize(
+    "artifact", [ENCODER_MODEL_FILE, NORMALIZER_FILE, SCORING_PARAMETERS_FILE])
+def test_missing_artifacts(cache_dir, artifact):
+    """Scoring needs every artifact saved by training"""
+    path = cache_dir / artifact
+    if path.is_dir():
+        path.rmdir()
+    else:
+        path.unlink()
+    with pytest.raises(MissingArtifacts, match=artifact):
+        build_detector().load_artifacts(str(cache_dir))
+
+
+def test_load_artifacts(cache_dir):
+    """Loaded artifacts set the columns and the windows to score"""
+    detector = build_detector()
+    detector.load_artifacts(str(cache_dir))
+
+    assert detector.input_columns == ["a", "b", "c"]
+    assert detector.feature_columns == ["a", "b"]
+    assert detector.anomaly_detector_params.window_size == 3
+    assert isinstance(detector.models[1], FakeEncoder)
+
+
+def test_artifacts_cache_hit(cache_dir, loaded_models):
+    """Artifacts are loaded once, and again when they are saved again"""
+    cache = {}
+    first = build_detector()
+    first.load_artifacts(str(cache_dir), cache=cache)
+    second = build_detector()
+    second.load_artifacts(str(cache_dir), cache=cache)
+
+    assert len(loaded_models) == 1
+    assert second.normalizer is first.normalizer
+    assert second.models[1] is first.models[1]
+
+    parameters_path = str(cache_dir / SCORING_PARAMETERS_FILE)
+    with open(parameters_path) as json_file:
+        parameters = json.load(json_file)
+    parameters["window_size"] = 2
+    with open(parameters_path, "w") as json_file:
+        json.dump(parameters, json_file)
+    mtime_ns = os.stat(parameters_path).st_mtime_ns + 10**9
+    os.utime(parameters_path, ns=(mtime_ns, mtime_ns))
+
+    third = build_detector()
+    third.load_artifacts(str(cache_dir), cache=cache)
+    assert len(loaded_models) == 2
+    assert third.anomaly_detector_params.window_size == 2
+    assert len(cache) == 2
+
+
+def test_score_output(cache_dir):
+    """Data is scored by chunks of windows, and events are detected for
+    every feature"""
+    detector = build_detector()
+    detector.load_artifacts(str(cache_dir))
+    detector.score_output(build_data(), chunk_size=3)
+
+    # 9 rows in windows of 3 rows with a stride of 1
+    assert detector.models[1].chunk_sizes == [3, 3, 1]
+    assert detector.preprocessed_data.window_columns == [
+        "a0", "b0", "a1", "b1", "a2", "b2"
+    ]
+    assert list(detector.time_index) == list(
+        pd.to_datetime(np.arange(N_ROWS) * 60.0, unit="s"))
+    assert set(detector.events) == {"a", "b", "overall"}
+
+
+def test_score_missing_columns(cache_dir):
+    """Scoring needs every column the normalizer was trained on"""
+    detector = build_detector()
+    detector.load_artifacts(str(cache_dir))
+    with pytest.raises(ValueError,
+                       match="Columns used for training are missing: c"):
+        detector.score_output(build_data().drop(columns=["c"]))
+
+
+def test_score_empty_feature_column(cache_dir):
+    """Scoring needs values in every feature column"""
+    detector = build_detector()
+    detector.load_artifacts(str(cache_dir))
+    data = build_data()
+    data["b"] = np.nan
+    with pytest.raises(ValueError,
+                       match="Columns used for training have no values: b"):
+        detector.score_output(data)
+
+
+def test_score_empty_unused_column(cache_dir):
+    """Values are not needed in the columns that are not features, and
+    missing values of features are filled"""
+    detector = build_detector()
+    detector.load_artifacts(str(cache_dir))
+    data = build_data()
+    data["c"] = np.nan
+    data.loc[[0, 4], "a"] = np.nan
+    detector.score_output(data)
+
+    assert not np.isnan(detector.preprocessed_data.windows).any()
+    assert set(detector.events) == {"a", "b", "overall"}
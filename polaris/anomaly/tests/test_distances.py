@@ -0,0 +1,105 @@
+"""Tests for the distances events are detected with, against the loops
+they replace
+"""
+
+import math
+
+import numpy as np
+import pytest
+
+from polaris.anomaly.distances import consecutive_distances, relative_changes
+
+
+def distance_measure(array_1, array_2):
+    """Distance between two arrays, as computed by betsi"""
+    norm_array_1 = np.linalg.norm(array_1)
+    norm_array_2 = np.linalg.norm(array_2)
+    norm_diff = np.linalg.norm(array_1 - array_2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return norm_diff / math.sqrt(norm_array_1 * norm_array_2)
+
+
+def loop_consecutive_distances(feature_data):
+    """Distances between consecutive rows, one pair at a time"""
+    return [
+        distance_measure(feature_data[row_no], feature_data[row_no + 1])
+        for row_no in range(feature_data.shape[0] - 1)
+    ]
+
+
+def loop_relative_changes(col_data):
+    """Relative changes between consecutive values, one at a time"""
+    distance_list = []
+    for row_no in range(len(col_data) - 1):
+        curr_item = abs(col_data[row_no])
+        next_item = abs(col_data[row_no + 1])
+        if curr_item == 0 or next_item == 0:
+            value_to_append = 0
+        else:
+            value_to_append = (curr_item - next_item) / math.sqrt(
+                curr_item * next_item)
+        distance_list.append(value_to_append)
+    return distance_list
+
+
+def build_encodings(shape, dtype):
+    """Encodings with rows of zeros and NaN values"""
+    rng = np.random.RandomState(0)
+    feature_data = rng.normal(size=shape).astype(dtype)
+    feature_data[3] = 0
+    feature_data[4] = 0
+    feature_data[7].flat[0] = np.nan
+    return feature_data
+
+
+@pytest.mark.parametrize("shape", [(12, 4), (12, 2, 3)])
+@pytest.mark.parametrize("dtype", [np.float32, np.float64])
+def test_consecutive_distances(shape, dtype):
+    """Distances match betsi's distance_measure, including zero rows,
+    NaN values and encodings of several dimensions"""
+    feature_data = build_encodings(shape, dtype)
+
+    distances = consecutive_distances(feature_data)
+    expected = loop_consecutive_distances(feature_data)
+
+    assert distances.shape == (shape[0] - 1, )
+    assert np.isinf(distances[2]) and np.isnan(distances[3])
+    assert np.isnan(distances[6]) and np.isnan(distances[7])
+    np.testing.assert_allclose(distances,
+                               expected,
+                               rtol=1e-6 if dtype == np.float32 else 1e-12)
+
+
+def test_consecutive_distances_of_one_row():
+    """A single row has no distance"""
+    assert consecutive_distances(np.ones((1, 3))).shape == (0, )
+
+
+def test_relative_changes():
+    """Changes match the loop on every column, including zero, negative
+    and NaN values"""
+    data = np.array([
+        [1.0, 0.0, -2.0],
+        [4.0, 3.0, 2.0],
+        [0.0, np.nan, -8.0],
+        [2.0, 0.0, 0.5],
+        [2.0, 5.0, np.nan],
+        [-1.0, 5.0, 1.0],
+    ])
+
+    changes = relative_changes(data)
+
+    assert changes.shape == (5, 3)
+    for col_no in range(data.shape[1]):
+        np.testing.assert_allclose(changes[:, col_no],
+                                   loop_relative_changes(
+                                       data[:, col_no].tolist()),
+                                   rtol=1e-12)
+
+
+def test_relative_changes_of_integers():
+    """Integer values give the same changes as the loop"""
+    data = np.array([[3], [0], [12], [-3], [-3]])
+    np.testing.assert_allclose(
+        relative_changes(data)[:, 0],
+        loop_relative_changes(data[:, 0].tolist()))
@@ -0,0 +1,156 @@
+"""Tests for the sliding windows given to the anomaly detector
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.model_selection import train_test_split
+
+pytest.importorskip("tensorflow")
+
+# pylint: disable=wrong-import-position
+from polaris.anomaly.sliding_windows import SlidingWindows, WindowBatches
+
+WINDOW_SIZE = 4
+
+
+def build_data(n_rows=10):
+    """Two columns of distinct values"""
+    return pd.DataFrame({
+        "a": np.arange(n_rows),
+        "b": np.arange(n_rows) * 10.0 + 0.5,
+    })
+
+
+def convert_to_column(data, window_size, stride):
+    """Windows and their column names, built row by row as betsi's
+    convert_to_column does, for a positive stride"""
+    values = data.to_numpy()
+    n_rows, n_columns = values.shape
+    n_windows = math.ceil((n_rows - window_size) / stride) + 1
+    unused_rows = (n_rows - window_size) % stride
+    padded = np.zeros((n_rows + (stride - unused_rows) % stride, n_columns))
+    padded[:n_rows] = values
+
+    windows = np.zeros((n_windows, n_columns * window_size))
+    for i in range(n_windows):
+        start = i * stride
+        windows[i] = padded[start:start + window_size].reshape(-1)
+    columns = []
+    for i in range(window_size):
+        columns += [str(column) + str(i) for column in data.columns]
+    return windows, columns
+
+
+def convert_from_column(windows, n_columns, stride):
+    """Rows of windows, as betsi's convert_from_column returns them"""
+    rows = []
+    for window in windows[:-1]:
+        rows += window.reshape((-1, n_columns)).tolist()[:stride]
+    rows += windows[-1].reshape((-1, n_columns)).tolist()
+    return np.array(rows)
+
+
+@pytest.mark.parametrize("stride, positive_stride", [(-1, WINDOW_SIZE),
+                                                     (3, 3), (-3, 2)])
+def test_windows_match_convert_to_column(stride, positive_stride):
+    """Windows and their column names follow convert_to_column"""
+    data = build_data()
+    windows = SlidingWindows(data, WINDOW_SIZE, stride)
+    expected, columns = convert_to_column(data, WINDOW_SIZE, positive_stride)
+
+    assert windows.stride == positive_stride
+    assert windows.shape == expected.shape
+    assert windows.windows.dtype == np.float32
+    np.testing.assert_array_equal(windows.windows, expected)
+    assert windows.window_columns == columns
+    assert list(windows.to_dataframe().columns) == columns
+    np.testing.assert_array_equal(windows.to_dataframe(start=1).to_numpy(),
+                                  expected[1:])
+
+
+def test_last_window_is_padded_with_zeros():
+    """The rows missing from the last window are zeros, and are returned
+    by rows like convert_from_column does"""
+    data = build_data()
+    windows = SlidingWindows(data, WINDOW_SIZE)
+
+    # 10 rows in windows of 4 rows: the last window holds 2 padding rows
+    assert len(windows) == 3
+    np.testing.assert_array_equal(windows.windows[-1][-4:], np.zeros(4))
+
+    rows = windows.rows()
+    assert list(rows.columns) == ["a", "b"]
+    assert len(rows) == 12
+    np.testing.assert_array_equal(rows.to_numpy()[:10], data.to_numpy())
+    np.testing.assert_array_equal(rows.to_numpy()[10:], np.zeros((2, 2)))
+    np.testing.assert_array_equal(
+        rows.to_numpy(), convert_from_column(windows.windows, 2,
+                                             WINDOW_SIZE))
+
+
+def test_windows_are_read_only():
+    """Windows are a view that cannot change the rows"""
+    windows = SlidingWindows(build_data(), WINDOW_SIZE, 1)
+    with pytest.raises(ValueError):
+        windows.windows[0, 0] = 1
+
+
+@pytest.mark.parametrize("n_rows, test_size", [(10, 0.2), (11, 0.25),
+                                               (13, 0.1)])
+def test_split_matches_train_test_split(n_rows, test_size):
+    """split rounds the test size up, as train_test_split does"""
+    windows = SlidingWindows(build_data(n_rows), WINDOW_SIZE, 1)
+    train, test = windows.split(test_size)
+    expected_train, expected_test = train_test_split(windows.windows,
+                                                     test_size=test_size,
+                                                     shuffle=False)
+
+    np.testing.assert_array_equal(train, expected_train)
+    np.testing.assert_array_equal(test, expected_test)
+
+
+def test_memmap_buffer_matches_memory_buffer(tmp_path):
+    """A buffer in a temporary file holds the same windows"""
+    data = build_data()
+    in_memory = SlidingWindows(data, WINDOW_SIZE, 3)
+    memmapped = SlidingWindows(data, WINDOW_SIZE, 3, memmap_dir=str(tmp_path))
+
+    np.testing.assert_array_equal(memmapped.windows, in_memory.windows)
+    pd.testing.assert_frame_equal(memmapped.rows(), in_memory.rows())
+    memmapped.close()
+    memmapped.close()
+
+
+def test_window_batches_cover_every_window_once():
+    """Shuffled batches hold every window exactly once per epoch"""
+    np.random.seed(0)
+    windows = SlidingWindows(build_data(23), WINDOW_SIZE, 1).windows
+    batches = WindowBatches(windows, batch_size=6, shuffle=True)
+    assert len(batches) == 4
+
+    epochs = []
+    for _ in range(2):
+        inputs = []
+        for index in range(len(batches)):
+            batch_input, batch_target = batches[index]
+            np.testing.assert_array_equal(batch_input, batch_target)
+            inputs.append(batch_input)
+        batches.on_epoch_end()
+        seen = np.concatenate(inputs)
+        order = np.lexsort(seen.T[::-1])
+        np.testing.assert_array_equal(seen[order], windows)
+        epochs.append(seen)
+
+    assert not np.array_equal(epochs[0], epochs[1])
+
+
+def test_window_batches_in_order():
+    """Batches follow the windows without shuffle"""
+    windows = SlidingWindows(build_data(), WINDOW_SIZE, 1).windows
+    batches = WindowBatches(windows, batch_size=4)
+    np.testing.assert_array_equal(
+        np.concatenate([batches[i][0] for i in range(len(batches))]),
+        windows)
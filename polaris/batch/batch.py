@@ -1,17 +1,32 @@
 """Module for running polaris batch commands
 """
 
+import collections
 import datetime
 import json
 import logging
-import subprocess
+import multiprocessing
+import os
 import sys
 import time
+from concurrent.futures import (FIRST_COMPLETED, ProcessPoolExecutor,
+                                ThreadPoolExecutor, wait)
 
 from polaris.common.config import InvalidConfigurationFile, PolarisConfig
+from polaris.data.manifest import TIME_FORMAT, read_manifest
 
 LOGGER = logging.getLogger(__name__)
 
+# Commands run by batch for every satellite, in this order
+BATCH_COMMAND_ORDER = ['fetch', 'learn', 'behave']
+
+# Commands mostly waiting for the network and disk, the others are
+# bound by the CPU
+IO_BOUND_COMMANDS = ['fetch']
+
+DEFAULT_FETCH_WORKERS = 4
+DEFAULT_LEARN_WORKERS = 1
+
 
 def log_batch_operation(config, command, return_code):
     LOGGER.info("%s Command: %s return_code: %d", config.name, command, return_code)
@@ -31,11 +46,22 @@ def find_last_fetch_date(config):
     - ...but for some reason, we don't have all the data from that
       day.
 
+    The date is read from the manifest written by fetch next to the
+    normalized frames file. The file itself is only read when its manifest
+    is missing or out of date.
+
     :param config: polaris configuration for satellite
     :return: time of last fetch date as timetuple
     """
     normalized_frame_file = config.normalized_file_path
     LOGGER.debug('Trying to find last fetch date in %s', normalized_frame_file)
+    manifest = read_manifest(normalized_frame_file)
+    if manifest is not None:
+        if manifest['last_time'] is None:
+            return None
+        return datetime.datetime.strptime(manifest['last_time'],
+                                          TIME_FORMAT).timetuple()
+
     # Copy-pasta of code in data_fetch_decoder.py.  Refactor.
     try:
         with open(normalized_frame_file) as f_handle:
@@ -46,20 +72,20 @@ def find_last_fetch_date(config):
                              normalized_frame_file)
                 raise json.JSONDecodeError
             dates = [i['time'] for i in decoded_frame_list['frames']]
-            latest_date = sorted(dates,
-                                 key=lambda x: datetime.datetime.strptime(
-                                     x, "%Y-%m-%d %H:%M:%S"))[-1]
-            latest_date = datetime.datetime.strptime(latest_date,
-                                                     "%Y-%m-%d %H:%M:%S")
+            latest_date = max(
+                datetime.datetime.strptime(date, TIME_FORMAT)
+                for date in dates)
         return latest_date.timetuple()
     except FileNotFoundError:
         return None
 
 
-def build_date_arg(last_fetch_date=None):
-    """Build date argument for fetch.
+def build_dates(last_fetch_date=None):
+    """Build start and end dates for fetch.
 
     :param last_fetch_date: Date of last successful fetch.
+    :return: start and end dates, formatted as YYYY-MM-DD
+    :rtype: tuple
     """
 
     def tformat(timestamp):
@@ -74,23 +100,55 @@ def build_date_arg(last_fetch_date=None):
         start_date = last_fetch_date
 
     now = time.gmtime()
-    return "--start_date {} --end_date {}".format(tformat(start_date),
-                                                  tformat(now))
+    return tformat(start_date), tformat(now)
 
 
-def build_fetch_args(config):
-    """Build arguments for fetch command when invoked from batch.
+def build_date_arg(last_fetch_date=None):
+    """Build date argument for fetch.
+
+    :param last_fetch_date: Date of last successful fetch.
+    """
+    return "--start_date {} --end_date {}".format(
+        *build_dates(last_fetch_date))
+
+
+def build_fetch_kwargs(config):
+    """Build arguments of data_fetch_decode_normalize when fetch is invoked
+    from batch.
 
     :param config: polaris configuration for satellite
+    :return: keyword arguments of data_fetch_decode_normalize
+    :rtype: dict
     """
-    cache_arg = '--cache_dir {}'.format(config.cache_dir)
+    start_date, end_date = build_dates(find_last_fetch_date(config))
+    return {
+        'sat': config.name,
+        'start_date': start_date,
+        'end_date': end_date,
+        'output_file': config.normalized_file_path,
+        'cache_dir': config.cache_dir,
+        'import_file': None,
+        'existing_output_file_strategy': 'merge',
+    }
+
+
+def format_fetch_args(fetch_kwargs):
+    """Format the arguments of fetch as on the command line.
+
+    :param fetch_kwargs: arguments built by build_fetch_kwargs
+    """
+    return '--cache_dir {} --start_date {} --end_date {} {} {}'.format(
+        fetch_kwargs['cache_dir'], fetch_kwargs['start_date'],
+        fetch_kwargs['end_date'], fetch_kwargs['sat'],
+        fetch_kwargs['output_file'])
 
-    last_fetch_date = find_last_fetch_date(config)
-    date_arg = build_date_arg(last_fetch_date=last_fetch_date)
 
-    norm_file = config.normalized_file_path
+def build_fetch_args(config):
+    """Build arguments for fetch command when invoked from batch.
 
-    return '{} {} {} {}'.format(cache_arg, date_arg, config.name, norm_file)
+    :param config: polaris configuration for satellite
+    """
+    return format_fetch_args(build_fetch_kwargs(config))
 
 
 def build_learn_args(config):
@@ -131,53 +189,457 @@ def build_learn_args(config):
     return args
 
 
-def maybe_run(cmd=None, config=None, dry_run=False):
+def build_learn_kwargs(config):
+    """Build arguments of cross_correlate when learn is invoked from batch,
+    with the same defaults as the learn command.
+
+    :param config: polaris configuration for satellite
+    :return: keyword arguments of cross_correlate
+    :rtype: dict
+    """
+    settings = config.learn_settings
+    return {
+        'input_file': settings.input_file or config.normalized_file_path,
+        'output_graph_file': (settings.output_graph_file
+                              or config.output_graph_file),
+        'xcorr_configuration_file': settings.configuration_file,
+        'graph_link_threshold': settings.graph_link_threshold or 0.1,
+        'use_gridsearch': bool(settings.use_gridsearch),
+        'csv_sep': settings.csv_sep or ',',
+        'force_cpu': bool(settings.force_cpu),
+    }
+
+
+def run_fetch(config, fetch_kwargs, dataset=None):
+    """Run polaris fetch for a particular satellite, in this process
+
+    :param config: polaris configuration for satellite
+    :param fetch_kwargs: arguments built by build_fetch_kwargs
+    :param dataset: dataset returned by the previous command, unused
+    :return: dataset held by the normalized frames file
+    :rtype: PolarisDataset
+    """
+    # pylint: disable=import-outside-toplevel, unused-argument
+    from polaris.fetch.data_fetch_decoder import data_fetch_decode_normalize
+
+    return data_fetch_decode_normalize(**fetch_kwargs)
+
+
+def run_learn(config, learn_kwargs, dataset=None):
+    """Run polaris learn for a particular satellite, in this process
+
+    :param config: polaris configuration for satellite
+    :param learn_kwargs: arguments built by build_learn_kwargs
+    :param dataset: dataset held by the normalized frames file, learnt
+        from instead of reading the file when it is the learn input
+    :return: dataset
+    :rtype: PolarisDataset
+    """
+    # pylint: disable=import-outside-toplevel
+    from polaris.learn.analysis import cross_correlate, feature_extraction
+
+    if config.learn_settings.target_column:
+        feature_extraction(learn_kwargs['input_file'],
+                           config.learn_settings.target_column)
+        return dataset
+
+    if learn_kwargs['input_file'] != config.normalized_file_path:
+        dataset = None
+    os.makedirs(os.path.dirname(learn_kwargs['output_graph_file']),
+                exist_ok=True)
+    cross_correlate(dataset=dataset, **learn_kwargs)
+    return dataset
+
+
+def build_behave_kwargs(config):
+    """Build arguments of behave when invoked from batch
+
+    :param config: polaris configuration for satellite
+    :return: keyword arguments of behave
+    :rtype: dict
+    """
+    settings = config.behave_settings
+    return {
+        'input_file': (settings.get('input_file')
+                       or config.normalized_file_path),
+        'output_file': (settings.get('output_file')
+                        or config.anomaly_output_file),
+        'detector_config_file': settings.get('detector_config_file'),
+        'cache_dir': config.behave_dir,
+        'metrics_dir': config.behave_dir,
+        'csv_sep': settings.get('csv_sep') or ',',
+    }
+
+
+def format_behave_args(behave_kwargs):
+    """Format the arguments of behave as on the command line.
+
+    :param behave_kwargs: arguments built by build_behave_kwargs
+    """
+    args = '{} --output_file {} --cache_dir {} --metrics_dir {}'.format(
+        behave_kwargs['input_file'], behave_kwargs['output_file'],
+        behave_kwargs['cache_dir'], behave_kwargs['metrics_dir'])
+
+    if behave_kwargs['detector_config_file']:
+        args = '{} --detector_config_file {}'.format(
+            args, behave_kwargs['detector_config_file'])
+
+    return '{} -s {}'.format(args, behave_kwargs['csv_sep'])
+
+
+def run_behave(config, behave_kwargs, dataset=None):
+    """Run polaris behave for a particular satellite, in this process
+
+    :param config: polaris configuration for satellite
+    :param behave_kwargs: arguments built by build_behave_kwargs
+    :param dataset: dataset returned by the previous command
+    :return: dataset
+    :rtype: PolarisDataset
+    """
+    # pylint: disable=import-outside-toplevel, unused-argument
+    from polaris.anomaly.behave import behave
+
+    os.makedirs(behave_kwargs['cache_dir'], exist_ok=True)
+    os.makedirs(os.path.dirname(behave_kwargs['output_file']), exist_ok=True)
+    behave(**behave_kwargs)
+    return dataset
+
+
+# Arguments builder and runner of each command
+BATCH_COMMANDS = {
+    'fetch': (build_fetch_kwargs, run_fetch),
+    'learn': (build_learn_kwargs, run_learn),
+    'behave': (build_behave_kwargs, run_behave),
+}
+
+
+def build_command(cmd, config):
+    """Build a polaris command for a particular satellite
+
+    :param cmd: command to build
+    :param config: polaris configuration for satellite
+    :return: command line, and keyword arguments of its runner
+    :rtype: tuple
+    """
+    build_kwargs, _ = BATCH_COMMANDS[cmd]
+    cmd_kwargs = build_kwargs(config)
+
+    if cmd == 'fetch':
+        # The last fetch date is only looked up once
+        args = format_fetch_args(cmd_kwargs)
+    elif cmd == 'learn':
+        args = build_learn_args(config)
+    else:
+        args = format_behave_args(cmd_kwargs)
+    return 'polaris {} {}'.format(cmd, args), cmd_kwargs
+
+
+def run_command(cmd, config, dataset=None):
+    """Run polaris command for a particular satellite, in this process
+
+    :param cmd: command to run
+    :param config: polaris configuration for satellite
+    :param dataset: dataset returned by the previous command
+    :return: return code, and dataset to hand to the next command
+    :rtype: tuple
+    """
+    full_cmd, cmd_kwargs = build_command(cmd, config)
+    LOGGER.debug(full_cmd)
+
+    _, runner = BATCH_COMMANDS[cmd]
+    return_code = 0
+    try:
+        dataset = runner(config, cmd_kwargs, dataset)
+    except SystemExit as exit_error:
+        return_code = exit_error.code if isinstance(exit_error.code,
+                                                    int) else 1
+    except Exception as error:  # pylint: disable=W0703
+        LOGGER.error("%s error: %s", cmd, error)
+        return_code = 1
+    log_batch_operation(config, full_cmd, return_code)
+
+    if return_code != 0:
+        LOGGER.warning("%s failed", cmd)
+        dataset = None
+    return return_code, dataset
+
+
+def run_timed_command(cmd, config, dataset=None):
+    """Run polaris command for a particular satellite, timing it
+
+    :param cmd: command to run
+    :param config: polaris configuration for satellite
+    :param dataset: dataset returned by the previous command
+    :return: return code, dataset to hand to the next command and wall
+        time of the command
+    :rtype: tuple
+    """
+    start = time.perf_counter()
+    return_code, dataset = run_command(cmd, config, dataset)
+    return return_code, dataset, time.perf_counter() - start
+
+
+def maybe_run(cmd=None, config=None, dry_run=False, dataset=None):
     """Run polaris command for a particular satellite
 
+    The command runs in this process. The dataset written by fetch is
+    handed to learn, which does not read it back from the file.
+
     :param cmd: command to run
     :param config: polaris configuration for satellite
     :param dry_run: bool for dry run mode
+    :param dataset: dataset returned by the previous command
+    :return: dataset to hand to the next command
     """
     # First, check the configuration to see if we're meant to run this
     # command.
     if config.should_batch_run(cmd) is False:
-        return
+        return dataset
 
     LOGGER.info('Running polaris %s for %s', cmd, config.name)
 
-    arg_builder = {'fetch': build_fetch_args, 'learn': build_learn_args}
-
-    args = arg_builder[cmd](config)
-    full_cmd = 'polaris {} {}'.format(cmd, args)
-    LOGGER.debug(full_cmd)
     if dry_run is True:
-        return
-    process_info = subprocess.run(full_cmd.split(), check=False)
-    log_batch_operation(config, full_cmd, process_info.returncode)
+        full_cmd, _ = build_command(cmd, config)
+        LOGGER.debug(full_cmd)
+        return dataset
 
-    try:
-        process_info.check_returncode()
-    except subprocess.CalledProcessError:
-        LOGGER.warning("%s failed", cmd)
-        if config.batch_stop_at_first_failure is True:
-            LOGGER.critical("Batch configured to exit on failure")
+    return_code, dataset = run_command(cmd, config, dataset)
+    if return_code != 0 and config.batch_stop_at_first_failure is True:
+        LOGGER.critical("Batch configured to exit on failure")
+        sys.exit(1)
+    return dataset
+
+
+class BatchJob:
+    """Polaris command to run for a particular satellite
+    """
+
+    def __init__(self, config, cmd):
+        """
+        :param config: polaris configuration for satellite
+        :param cmd: command to run
+        """
+        self.config = config
+        self.cmd = cmd
+        self.return_code = None
+        self.wall_time = None
+
+    @property
+    def status(self):
+        """Status of the job: pending, ok, failed or skipped
+        """
+        if self.return_code is None:
+            return 'pending'
+        if self.return_code == 0:
+            return 'ok'
+        if self.wall_time is None:
+            return 'skipped'
+        return 'failed'
+
+    def run(self, dataset=None):
+        """Run the job, timing it
+
+        :param dataset: dataset returned by the previous job
+        :return: dataset to hand to the next job
+        """
+        return self.record(run_timed_command(self.cmd, self.config,
+                                             dataset))
+
+    def record(self, result):
+        """Keep the return code and wall time of the job
+
+        :param result: result of run_timed_command
+        :return: dataset to hand to the next job
+        """
+        self.return_code, dataset, self.wall_time = result
+        return dataset
+
+
+class BatchScheduler:
+    """Run the batch commands of several satellites concurrently.
+
+    The commands of a satellite run one after the other, in the order of
+    BATCH_COMMAND_ORDER, and the next one is skipped when a command fails.
+    Commands of different satellites run in two pools: one of threads for
+    the I/O-bound commands (fetch) and one for the CPU-bound commands
+    (learn and behave), each with its own number of workers.
+
+    learn and behave set the MLflow experiment of their satellite, which
+    is global to the process: with more than one learn worker, they run
+    in a pool of processes instead of threads, so that every command logs
+    to the experiment of its own satellite. The dataset fetched is then
+    pickled to the process learning from it.
+    """
+
+    def __init__(self,
+                 configs,
+                 fetch_workers=DEFAULT_FETCH_WORKERS,
+                 learn_workers=DEFAULT_LEARN_WORKERS):
+        """
+        :param configs: polaris configurations of the satellites
+        :param fetch_workers: number of I/O-bound commands run at once
+        :param learn_workers: number of CPU-bound commands run at once
+        """
+        self.fetch_workers = fetch_workers
+        self.learn_workers = learn_workers
+        self.chains = [[
+            BatchJob(config, cmd) for cmd in BATCH_COMMAND_ORDER
+            if config.should_batch_run(cmd)
+        ] for config in configs]
+
+    def _learn_pool(self):
+        """Pool running the CPU-bound commands
+        """
+        if self.learn_workers > 1:
+            # Forking a process running threads is unsafe
+            return ProcessPoolExecutor(
+                self.learn_workers,
+                mp_context=multiprocessing.get_context('spawn'))
+        return ThreadPoolExecutor(1, thread_name_prefix='polaris-learn')
+
+    @property
+    def jobs(self):
+        """All the jobs, satellite after satellite
+        """
+        return [job for chain in self.chains for job in chain]
+
+    def run(self):
+        """Run all the jobs
+
+        :return: True if every job succeeded
+        """
+        pools = {
+            True: ThreadPoolExecutor(self.fetch_workers,
+                                     thread_name_prefix='polaris-fetch'),
+            False: self._learn_pool(),
+        }
+        running = {}
+
+        def submit_next(queue, dataset=None):
+            if queue:
+                job = queue.popleft()
+                LOGGER.info('Running polaris %s for %s', job.cmd,
+                            job.config.name)
+                pool = pools[job.cmd in IO_BOUND_COMMANDS]
+                future = pool.submit(run_timed_command, job.cmd, job.config,
+                                     dataset)
+                running[future] = (queue, job)
+
+        try:
+            for chain in self.chains:
+                submit_next(collections.deque(chain))
+
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    queue, job = running.pop(future)
+                    dataset = job.record(future.result())
+                    if job.return_code == 0:
+                        submit_next(queue, dataset)
+                        continue
+                    # The next commands of the satellite are skipped
+                    for skipped_job in queue:
+                        skipped_job.return_code = job.return_code
+                    queue.clear()
+        finally:
+            for pool in pools.values():
+                pool.shutdown()
+
+        return all(job.return_code == 0 for job in self.jobs)
+
+    def summary(self):
+        """Summary of the jobs, with their status and wall time
+
+        :return: one line per job
+        :rtype: list
+        """
+        lines = []
+        for job in self.jobs:
+            wall_time = '-'
+            if job.wall_time is not None:
+                wall_time = '{:.1f}s'.format(job.wall_time)
+            lines.append('{:<20}{:<8}{:<9}{:>10}'.format(
+                job.config.name, job.cmd, job.status, wall_time))
+        return lines
+
+
+def find_config_files(config_paths):
+    """List the configuration files of paths
+
+    :param config_paths: configuration files, or directories holding
+        them as .json files
+    :return: configuration files
+    :rtype: list
+    """
+    config_files = []
+    for path in config_paths:
+        if os.path.isdir(path):
+            config_files.extend(
+                os.path.join(path, name) for name in sorted(os.listdir(path))
+                if name.endswith('.json'))
+        else:
+            config_files.append(path)
+    return config_files
+
+
+def load_configs(config_paths):
+    """Load the configuration of every satellite
+
+    :param config_paths: configuration files, or directories holding
+        them as .json files
+    :return: polaris configurations
+    :rtype: list
+    """
+    configs = []
+    for config_file in find_config_files(config_paths):
+        try:
+            configs.append(PolarisConfig(file=config_file))
+        except FileNotFoundError:
+            LOGGER.critical("Cannot find or open config file %s",
+                            config_file)
+            sys.exit(1)
+        except InvalidConfigurationFile:
+            LOGGER.critical("Configuration file %s is invalid", config_file)
             sys.exit(1)
+    return configs
 
 
-def batch(config_file, dry_run):
-    """Run polaris fetch and learn non-interactively, based on configuration file.
+def batch(config_file,
+          dry_run,
+          fetch_workers=DEFAULT_FETCH_WORKERS,
+          learn_workers=DEFAULT_LEARN_WORKERS):
+    """Run polaris fetch, learn and behave non-interactively, based on
+    configuration files.
 
-    :param config_file: path to config file for batch
+    The commands of several satellites run concurrently, see
+    BatchScheduler.
+
+    :param config_file: path to config file for batch, or list of config
+        files and directories holding config files
     :param dry_run: Bool for dry run mode
+    :param fetch_workers: number of fetch commands run at once
+    :param learn_workers: number of learn and behave commands run at once
     """
-    try:
-        config = PolarisConfig(file=config_file)
-    except FileNotFoundError:
-        LOGGER.critical("Cannot find or open config file %s", config_file)
-        sys.exit(1)
-    except InvalidConfigurationFile:
-        LOGGER.critical("Configuration file %s is invalid", config_file)
-        sys.exit(1)
+    if isinstance(config_file, (str, os.PathLike)):
+        config_file = [config_file]
+    configs = load_configs(config_file)
+
+    if dry_run is True:
+        for config in configs:
+            for cmd in BATCH_COMMAND_ORDER:
+                maybe_run(cmd=cmd, config=config, dry_run=dry_run)
+        return
 
-    for cmd in ['fetch', 'learn']:
-        maybe_run(cmd=cmd, config=config, dry_run=dry_run)
+    scheduler = BatchScheduler(configs, fetch_workers, learn_workers)
+    start = time.perf_counter()
+    succeeded = scheduler.run()
+
+    LOGGER.info('Batch summary (%d satellites, %.1fs):', len(configs),
+                time.perf_counter() - start)
+    for line in scheduler.summary():
+        LOGGER.info(line)
+
+    if not succeeded and any(config.batch_stop_at_first_failure
+                             for config in configs):
+        LOGGER.critical("Batch configured to exit on failure")
+        sys.exit(1)
@@ -0,0 +1,113 @@
+"""Tests for the scheduling of batch commands
+"""
+
+import json
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+
+from polaris.batch import batch as polaris_batch
+
+
+@pytest.fixture(name="config_dir")
+def fixture_config_dir(tmp_path):
+    """Configurations of three satellites, behave enabled for A and B"""
+    config_dir = tmp_path / "configs"
+    config_dir.mkdir()
+    for name in ["A", "B", "C"]:
+        (config_dir / "{}.json".format(name)).write_text(
+            json.dumps({
+                "file_layout": {
+                    "root_dir": str(tmp_path)
+                },
+                "satellite": {
+                    "name": name,
+                    "batch": {
+                        "behave": name != "C"
+                    }
+                }
+            }))
+    return config_dir
+
+
+@pytest.fixture(name="calls")
+def fixture_calls(monkeypatch):
+    """Replace the runners of the batch commands by stubs recording their
+    calls, fetch failing for satellite B"""
+    calls = []
+    lock = threading.Lock()
+
+    def stub(cmd):
+
+        def run(config, cmd_kwargs, dataset=None):
+            # pylint: disable=unused-argument
+            with lock:
+                calls.append((config.name, cmd, dataset))
+            if cmd == "fetch":
+                if config.name == "B":
+                    raise RuntimeError("No frames")
+                return "dataset " + config.name
+            return dataset
+
+        return run
+
+    monkeypatch.setattr(
+        polaris_batch, "BATCH_COMMANDS", {
+            cmd: (build_kwargs, stub(cmd))
+            for cmd, (build_kwargs,
+                      _) in polaris_batch.BATCH_COMMANDS.items()
+        })
+    return calls
+
+
+def test_scheduler_runs_satellites_in_order(config_dir, calls):
+    """Commands of a satellite run in order with the dataset fetched, and
+    stop after a failure"""
+    configs = polaris_batch.load_configs([str(config_dir)])
+    scheduler = polaris_batch.BatchScheduler(configs,
+                                             fetch_workers=3,
+                                             learn_workers=1)
+
+    assert scheduler.run() is False
+
+    for name, cmds in [("A", ["fetch", "learn", "behave"]), ("B", ["fetch"]),
+                       ("C", ["fetch", "learn"])]:
+        assert [cmd for sat, cmd, _ in calls if sat == name] == cmds
+    assert ("A", "behave", "dataset A") in calls
+    assert ("C", "learn", "dataset C") in calls
+
+    statuses = [(job.config.name, job.cmd, job.status)
+                for job in scheduler.jobs]
+    assert statuses == [("A", "fetch", "ok"), ("A", "learn", "ok"),
+                        ("A", "behave", "ok"), ("B", "fetch", "failed"),
+                        ("B", "learn", "skipped"), ("B", "behave", "skipped"),
+                        ("C", "fetch", "ok"), ("C", "learn", "ok")]
+    summary = scheduler.summary()
+    assert len(summary) == len(statuses)
+    assert summary[4].split()[:3] == ["B", "learn", "skipped"]
+
+
+def test_batch_exits_on_failure(config_dir, calls):
+    """Batch exits with an error code when a command failed"""
+    with pytest.raises(SystemExit) as exit_info:
+        polaris_batch.batch([str(config_dir)], dry_run=False)
+    assert exit_info.value.code == 1
+    assert len(calls) == 6
+
+
+def test_batch_dry_run(config_dir, calls):
+    """Dry run does not run any command"""
+    polaris_batch.batch([str(config_dir)], dry_run=True)
+    assert calls == []
+
+
+@pytest.mark.parametrize("learn_workers, pool_type",
+                         [(1, ThreadPoolExecutor), (2, ProcessPoolExecutor)])
+def test_learn_pool(learn_workers, pool_type):
+    """learn and behave only share a process when run one at a time"""
+    scheduler = polaris_batch.BatchScheduler([], learn_workers=learn_workers)
+    # pylint: disable=protected-access
+    pool = scheduler._learn_pool()
+    pool.shutdown()
+    assert isinstance(pool, pool_type)
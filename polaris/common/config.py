@@ -23,6 +23,8 @@ class PolarisConfig():
     _DEFAULT_CACHEDIR = 'cache'
     _DEFAULT_NORMALIZED_FILE = 'normalized_frames.json'
     _DEFAULT_GRAPHDIR = 'graph'
+    _DEFAULT_BEHAVEDIR = 'behave'
+    _DEFAULT_ANOMALY_OUTPUT_FILE = 'anomaly_output.json'
     _DEFAULT_OUTPUT_GRAPH_FILE = 'graph.json'
     _DEFAULT_LOGDIR = 'log'
 
@@ -34,6 +36,7 @@ class PolarisConfig():
             'batch': {
                 'learn': True,
                 'fetch': True,
+                'behave': False,
             }
         }
     }
@@ -99,6 +102,18 @@ class PolarisConfig():
         """
         return f'{self.graph_dir}/{self._DEFAULT_OUTPUT_GRAPH_FILE}'
 
+    @property
+    def behave_dir(self):
+        """Return behave directory, for its models and metrics
+        """
+        return f'{self.root_dir}/{self.name}/{self._DEFAULT_BEHAVEDIR}'
+
+    @property
+    def anomaly_output_file(self):
+        """Return path to anomaly output file
+        """
+        return f'{self.behave_dir}/{self._DEFAULT_ANOMALY_OUTPUT_FILE}'
+
     @property
     def log_dir(self):
         """Return log directory
@@ -142,6 +157,20 @@ class PolarisConfig():
         """
         self._data['satellite']['learn'] = new_settings
 
+    @property
+    def behave_settings(self):
+        """Behave settings, a dictionary of behave arguments
+        """
+        return self._data['satellite'].get('behave', {})
+
+    @behave_settings.setter
+    def behave_settings(self, new_settings):
+        """Update behave settings
+
+        @param new_settings: dictionary of all behave settings
+        """
+        self._data['satellite']['behave'] = new_settings
+
     def should_batch_run(self, cmd):
         """Return True if the configuration for batch says we should run this
         command; else, return False
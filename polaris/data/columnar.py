@@ -0,0 +1,135 @@
+"""
+Binary columnar storage of Polaris datasets.
+
+Datasets are stored as Apache Arrow IPC (.arrow, .feather) or Parquet
+(.parquet) files. Each frame field is a typed column holding its unit in
+the column metadata, and the dataset metadata is kept as JSON in the
+schema metadata. Arrow IPC files are memory-mapped when read.
+"""
+
+import json
+import logging
+import os
+
+import pyarrow as pa
+from pyarrow import feather, parquet
+
+from polaris.dataset.columns import FrameColumns
+from polaris.dataset.metadata import PolarisMetadata
+
+LOGGER = logging.getLogger(__name__)
+
+ARROW_EXTENSIONS = ('.arrow', '.feather')
+PARQUET_EXTENSIONS = ('.parquet', )
+
+_METADATA_KEY = b'polaris'
+_UNIT_KEY = b'unit'
+
+
+def is_columnar_file(path):
+    """Tell if a path names a binary columnar dataset file
+
+    :param path: File path
+    :return: True if the extension is one of a columnar format
+    """
+    extension = os.path.splitext(str(path))[1].lower()
+    return extension in ARROW_EXTENSIONS + PARQUET_EXTENSIONS
+
+
+def dataset_to_columns(dataset):
+    """Extract the field values and units of a dataset
+
+    :param dataset: Polaris dataset
+    :type dataset: PolarisDataset
+    :return: Dataframe with one column per field, and the unit of
+        each column
+    :rtype: (pd.DataFrame, dict)
+    """
+    columns = FrameColumns()
+    columns.extend(dataset.frames)
+    return columns.to_dataframe(), dict(columns.units)
+
+
+def _to_arrow_array(series):
+    """Convert a column to an Arrow array, as strings when its values
+    do not share a common type
+    """
+    try:
+        return pa.array(series, from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        LOGGER.warning("Column %s has mixed types, storing it as strings",
+                       series.name)
+        return pa.array(series.astype(str), from_pandas=True)
+
+
+def write_columnar_data(path, metadata, dataframe, units=None):
+    """Write a dataset to a binary columnar file
+
+    :param path: Output file path, its extension selects the format
+    :param metadata: Dataset metadata
+    :type metadata: dict
+    :param dataframe: Dataset values, one column per field
+    :type dataframe: pd.DataFrame
+    :param units: Unit of the columns, defaults to None
+    :type units: dict, optional
+    """
+    units = units or {}
+    arrays = []
+    fields = []
+    for name in dataframe.columns:
+        array = _to_arrow_array(dataframe[name])
+        unit = units.get(name)
+        field_metadata = None
+        if unit is not None:
+            field_metadata = {_UNIT_KEY: str(unit).encode()}
+        arrays.append(array)
+        fields.append(pa.field(str(name), array.type,
+                               metadata=field_metadata))
+
+    schema = pa.schema(
+        fields, metadata={_METADATA_KEY: json.dumps(metadata).encode()})
+    table = pa.Table.from_arrays(arrays, schema=schema)
+
+    if os.path.splitext(path)[1].lower() in PARQUET_EXTENSIONS:
+        parquet.write_table(table, path)
+    else:
+        feather.write_feather(table, path, compression='uncompressed')
+
+
+def write_columnar_dataset(dataset, path):
+    """Write a Polaris dataset to a binary columnar file
+
+    :param dataset: Polaris dataset
+    :type dataset: PolarisDataset
+    :param path: Output file path, its extension selects the format
+    """
+    dataframe, units = dataset_to_columns(dataset)
+    write_columnar_data(path, dataset.metadata, dataframe, units)
+
+
+def read_columnar_data(path):
+    """Read a dataset from a binary columnar file
+
+    :param path: Input file path
+    :return: Dataset metadata, values and the unit of each column
+    :rtype: (PolarisMetadata, pd.DataFrame, dict)
+    """
+    if os.path.splitext(path)[1].lower() in PARQUET_EXTENSIONS:
+        table = parquet.read_table(path, memory_map=True)
+    else:
+        with pa.memory_map(path) as source:
+            table = pa.ipc.open_file(source).read_all()
+
+    schema_metadata = table.schema.metadata or {}
+    metadata = None
+    if _METADATA_KEY in schema_metadata:
+        metadata = json.loads(schema_metadata[_METADATA_KEY])
+
+    units = {}
+    for field in table.schema:
+        field_metadata = field.metadata or {}
+        units[field.name] = None
+        if _UNIT_KEY in field_metadata:
+            units[field.name] = field_metadata[_UNIT_KEY].decode()
+
+    return PolarisMetadata(metadata), table.to_pandas(split_blocks=True), units
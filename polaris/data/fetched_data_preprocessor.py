@@ -22,13 +22,18 @@ class FetchedDataPreProcessor:
         dataframe = dataset.to_pandas_dataframe()
         total_frames = dataset.metadata['total_frames']
 
+        # Columns having a unit in the first frame, looked up once
+        first_fields = dataset.frames[0]['fields'] if dataset.frames else {}
+        with_unit = set()
+        for column in dataframe.columns:
+            field = first_fields.get(column)
+            if isinstance(field, dict) and field.get('unit') is not None:
+                with_unit.add(column)
+
         for column in dataframe.columns:
             unique = dataframe[column].nunique()
             column_type = dataframe.dtypes[column]
-            has_unit = False
-            if column in dataset.frames[0]['fields']:
-                has_unit = dataset.frames[0]['fields'][column][
-                               'unit'] is not None
+            has_unit = column in with_unit
             tag = self.__compute_tag(unique, total_frames, has_unit,
                                      column_type)
             self.__analysis['column_tags'][column] = tag
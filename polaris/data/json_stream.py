@@ -0,0 +1,131 @@
+"""
+Incremental reading of Polaris dataset JSON files.
+
+A dataset file holds a single JSON object with a "metadata" entry and a
+"frames" list. The frames are decoded one by one from a buffered file, so
+that the whole document never has to be held in memory.
+"""
+
+import json
+
+# Number of characters read from the file at once
+CHUNK_SIZE = 1 << 20
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+
+
+class _JsonReader:
+    """Buffered reader decoding JSON values from a file handle
+    """
+
+    def __init__(self, f_handle, chunk_size=CHUNK_SIZE):
+        self._f_handle = f_handle
+        self._chunk_size = chunk_size
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+
+    def _read_more(self, size=None):
+        """Append the next chunk of the file to the buffer
+
+        :return: False if the end of the file was already reached
+        """
+        if self._eof:
+            return False
+
+        chunk = self._f_handle.read(size or self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+
+        # Drop what has already been decoded
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self):
+        """Skip whitespaces and return the next character
+
+        :return: The next character, or an empty string at end of file
+        """
+        while True:
+            while (self._pos < len(self._buffer)
+                   and self._buffer[self._pos] in _WHITESPACE):
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._read_more():
+                return ''
+
+    def expect(self, characters):
+        """Consume the next character, which must be one of characters
+
+        :return: The consumed character
+        :raises json.JSONDecodeError: If another character is found
+        """
+        char = self.peek()
+        if char == '' or char not in characters:
+            raise json.JSONDecodeError(
+                'Expecting one of {!r}'.format(characters), self._buffer,
+                self._pos)
+        self._pos += 1
+        return char
+
+    def decode(self):
+        """Decode the next JSON value
+
+        :return: The decoded value
+        :raises json.JSONDecodeError: If the value is not valid JSON
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                # The value may just be cut by the end of the buffer
+                if self._read_more(max(self._chunk_size, len(self._buffer))):
+                    continue
+                raise
+            # A number at the very end of the buffer may continue in
+            # the next chunk
+            if end == len(self._buffer) and self._read_more():
+                continue
+            self._pos = end
+            return value
+
+
+def iter_dataset_json(f_handle, chunk_size=CHUNK_SIZE):
+    """Iterate over the entries of a dataset JSON document
+
+    The items of the "frames" list are yielded one at a time as
+    ('frames', frame) pairs, any other top-level entry is yielded
+    as a whole.
+
+    :param f_handle: File handle opened in text mode
+    :param chunk_size: Number of characters read from the file at once
+    :return: Generator of (key, value) pairs
+    :raises json.JSONDecodeError: If the document is not a valid dataset
+    """
+    reader = _JsonReader(f_handle, chunk_size)
+    reader.expect('{')
+    if reader.peek() == '}':
+        return
+
+    while True:
+        key = reader.decode()
+        reader.expect(':')
+        if key == 'frames' and reader.peek() == '[':
+            reader.expect('[')
+            if reader.peek() == ']':
+                reader.expect(']')
+            else:
+                while True:
+                    yield key, reader.decode()
+                    if reader.expect(',]') == ']':
+                        break
+        else:
+            yield key, reader.decode()
+
+        if reader.expect(',}') == '}':
+            return
@@ -0,0 +1,183 @@
+"""
+Sidecar manifest of Polaris dataset outputs.
+
+Every time fetch writes a dataset, a small JSON manifest is written next to
+it, at the dataset path followed by ".manifest.json":
+
+- first_time, last_time: times of the oldest and newest frames, formatted
+  as "%Y-%m-%d %H:%M:%S" (UTC),
+- frame_count: number of frames,
+- columns: names of the frame fields,
+- sha256: hash of the dataset file content (of the segment index for a
+  segmented dataset directory),
+- size, mtime_ns: state of the hashed file when the manifest was written.
+
+Readers can get the time range of a dataset without loading it; the size
+and modification time tell if the dataset changed since the manifest was
+written.
+"""
+
+import hashlib
+import json
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from polaris.common import constants
+
+LOGGER = logging.getLogger(__name__)
+
+MANIFEST_SUFFIX = '.manifest.json'
+MANIFEST_VERSION = 1
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Number of bytes hashed at once
+CHUNK_SIZE = 1 << 20
+
+# File hashed for a segmented dataset directory
+SEGMENTED_HASHED_FILE = 'index.json'
+
+
+def manifest_path(path):
+    """Return the path of the manifest of a dataset
+
+    :param path: Dataset file or directory path
+    """
+    return str(path).rstrip(os.sep) + MANIFEST_SUFFIX
+
+
+def _hashed_file(path):
+    """File whose content identifies a dataset"""
+    if os.path.isdir(path):
+        return os.path.join(path, SEGMENTED_HASHED_FILE)
+    return str(path)
+
+
+def _file_sha256(path):
+    """Hash a file, chunk by chunk"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f_handle:
+        for chunk in iter(lambda: f_handle.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def frame_times(frames):
+    """Parse the times of frames
+
+    :return: Times as nanoseconds since epoch
+    :rtype: np.ndarray
+    """
+    return pd.to_datetime([frame['time'] for frame in frames]).asi8
+
+
+def frame_columns(frames):
+    """Names of the fields of frames, in order of appearance, and time as
+    FrameColumns adds it
+
+    :rtype: list
+    """
+    columns = {}
+    for frame in frames:
+        columns.update(dict.fromkeys(frame['fields']))
+    if columns:
+        columns.setdefault('time')
+    return list(columns)
+
+
+def _format_time(time_ns):
+    return pd.Timestamp(int(time_ns)).strftime(TIME_FORMAT)
+
+
+def _parse_time(time_string):
+    return int(pd.Timestamp(time_string).value)
+
+
+def read_manifest(path, check=True):
+    """Read the manifest of a dataset
+
+    :param path: Dataset file or directory path
+    :param check: Only return the manifest if the dataset has not changed
+        since it was written, defaults to True
+    :return: Manifest, or None if it is missing, invalid or out of date
+    :rtype: dict
+    """
+    try:
+        with open(manifest_path(path)) as f_handle:
+            manifest = json.load(f_handle)
+    except FileNotFoundError:
+        return None
+    except ValueError:
+        LOGGER.warning('Ignoring invalid manifest %s', manifest_path(path))
+        return None
+
+    if check:
+        try:
+            stat = os.stat(_hashed_file(path))
+        except FileNotFoundError:
+            return None
+        if (stat.st_size, stat.st_mtime_ns) != (manifest.get('size'),
+                                                manifest.get('mtime_ns')):
+            LOGGER.info('%s has changed since its manifest was written',
+                        path)
+            return None
+    return manifest
+
+
+def write_manifest(path, times=(), frame_count=0, columns=(), previous=None):
+    """Write the manifest of a dataset just written, replacing any
+    previous manifest at once
+
+    :param path: Dataset file or directory path
+    :param times: Times of the frames written, as nanoseconds since epoch
+    :param frame_count: Number of frames of the dataset
+    :param columns: Names of the fields of the frames written
+    :param previous: Manifest of the frames the dataset already held,
+        merged with the frames written, defaults to None
+    :return: Manifest written
+    :rtype: dict
+    """
+    times = np.asarray(times, dtype=np.int64)
+    bounds = [int(times.min()), int(times.max())] if times.size else []
+    merged_columns = dict.fromkeys(columns)
+    if previous is not None:
+        bounds.extend(
+            _parse_time(previous[key]) for key in ('first_time', 'last_time')
+            if previous.get(key) is not None)
+        merged_columns = dict.fromkeys(previous.get('columns', []))
+        merged_columns.update(dict.fromkeys(columns))
+
+    hashed_file = _hashed_file(path)
+    stat = os.stat(hashed_file)
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'first_time': _format_time(min(bounds)) if bounds else None,
+        'last_time': _format_time(max(bounds)) if bounds else None,
+        'frame_count': int(frame_count),
+        'columns': list(merged_columns),
+        'sha256': _file_sha256(hashed_file),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+    }
+
+    tmp_path = manifest_path(path) + '.tmp'
+    with open(tmp_path, 'w') as f_handle:
+        f_handle.write(json.dumps(manifest, indent=constants.JSON_INDENT))
+    os.replace(tmp_path, manifest_path(path))
+    return manifest
+
+
+def write_frames_manifest(path, frames):
+    """Write the manifest of a dataset holding exactly frames
+
+    :param path: Dataset file or directory path
+    :param frames: Frames of the dataset
+    :return: Manifest written
+    :rtype: dict
+    """
+    return write_manifest(path,
+                          times=frame_times(frames) if frames else (),
+                          frame_count=len(frames),
+                          columns=frame_columns(frames))
@@ -5,13 +5,15 @@ General input standard format for functions in polaris learn are Pandas
 Dataframe.
 """
 
-import json
 import logging
 import os
 
 import pandas as pd
 
-from polaris.dataset.dataset import PolarisDataset
+from polaris.data.columnar import is_columnar_file, read_columnar_data
+from polaris.data.json_stream import iter_dataset_json
+from polaris.data.segmented import SegmentedDataset
+from polaris.dataset.columns import FrameColumns
 from polaris.dataset.metadata import PolarisMetadata
 
 LOGGER = logging.getLogger(__name__)
@@ -23,7 +25,8 @@ class PolarisUnknownFileFormatError(Exception):
 
 
 def read_polaris_data(path, csv_sep=','):
-    """Read a JSON or CSV file and creates a pandas dataframe out of it.
+    """Read a JSON, CSV or binary columnar (Arrow, Parquet) file, or a
+    segmented dataset directory, and creates a pandas dataframe out of it.
 
     :param path: File path for the input file.
     :param csv_sep: The csv separator used for the input csv file.
@@ -33,12 +36,18 @@ def read_polaris_data(path, csv_sep=','):
     metadata = None
     dataframe = None
 
-    if path.lower().endswith('.csv'):
+    if os.path.isdir(path):
+        metadata, dataframe = read_polaris_data_from_segments(path)
+
+    elif path.lower().endswith('.csv'):
         metadata, dataframe = read_polaris_data_from_csv(path, csv_sep)
 
     elif path.lower().endswith('.json'):
         metadata, dataframe = read_polaris_data_from_json(path)
 
+    elif is_columnar_file(path):
+        metadata, dataframe = read_polaris_data_from_columnar(path)
+
     else:
         LOGGER.critical("Don't know how to load from file %s ", path)
         raise PolarisUnknownFileFormatError
@@ -68,18 +77,59 @@ def read_polaris_data_from_csv(path, csv_sep=','):
 def read_polaris_data_from_json(path):
     """Read Polaris data from JSON
 
+    The frames are decoded one at a time and their values appended to
+    per-column arrays, so the file is never loaded whole in memory.
+
     :param path: File path for the input file.
     :return: Pandas dataframe with all frames fields values and
     the data source name.
     """
+    metadata = None
+    columns = FrameColumns()
     try:
         with open(path, "r") as json_file:
-            json_data = json.load(json_file)
+            for key, value in iter_dataset_json(json_file):
+                if key == 'frames':
+                    columns.append(value)
+                elif key == 'metadata':
+                    metadata = value
+    except Exception as exception_error:
+        LOGGER.critical(exception_error)
+        raise exception_error
+
+    return PolarisMetadata(metadata), columns.to_dataframe()
+
+
+def read_polaris_data_from_columnar(path):
+    """Read Polaris data from a binary columnar file (Arrow, Parquet)
+
+    :param path: File path for the input file.
+    :return: Pandas dataframe with all frames fields values and
+    the data source name.
+    """
+    try:
+        metadata, dataframe, _ = read_columnar_data(path)
+    except Exception as exception_error:
+        LOGGER.critical(exception_error)
+        raise exception_error
+
+    return metadata, dataframe
+
+
+def read_polaris_data_from_segments(path):
+    """Read Polaris data from a segmented dataset directory
+
+    :param path: Path of the dataset directory.
+    :return: Pandas dataframe with all frames fields values and
+    the data source name.
+    """
+    columns = FrameColumns()
+    try:
+        segmented_dataset = SegmentedDataset(path)
+        metadata = segmented_dataset.metadata
+        columns.extend(segmented_dataset.iter_frames())
     except Exception as exception_error:
         LOGGER.critical(exception_error)
         raise exception_error
 
-    dataset = PolarisDataset(metadata=json_data['metadata'],
-                             frames=json_data['frames'])
-    dataframe = dataset.to_pandas_dataframe()
-    return dataset.metadata, dataframe
+    return metadata, columns.to_dataframe()
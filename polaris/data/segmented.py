@@ -0,0 +1,164 @@
+"""
+Append-only storage of Polaris datasets in segments.
+
+A segmented dataset is a directory holding:
+
+- metadata.json: the metadata of the last appended dataset,
+- frames-NNNNNN.json: one segment per append, with the new frames only,
+- index.json: the list of segments with their frame count and time range.
+
+Appending writes a new segment and rewrites the small index and metadata
+files, without reading or rewriting the frames already stored. Frames
+whose time is already stored are skipped; only the segments whose time
+range overlaps the new frames are read to find them.
+"""
+
+import json
+import logging
+import os
+
+from polaris.common import constants
+from polaris.data.json_stream import iter_dataset_json
+from polaris.data.manifest import frame_times
+from polaris.dataset.metadata import PolarisMetadata
+
+LOGGER = logging.getLogger(__name__)
+
+
+class NotASegmentedDataset(Exception):
+    """Raised when the path of a segmented dataset is not a directory
+    """
+
+
+def _write_atomically(path, content):
+    """Write content to path, replacing any previous file at once
+    """
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f_handle:
+        f_handle.write(content)
+    os.replace(tmp_path, path)
+
+
+class SegmentedDataset:
+    """Polaris dataset stored as a directory of frame segments
+    """
+    INDEX_FILE = 'index.json'
+    METADATA_FILE = 'metadata.json'
+    SEGMENT_FILE = 'frames-{:06d}.json'
+
+    def __init__(self, path):
+        """Open a segmented dataset, it is created by the first append
+
+        :param path: Path of the dataset directory
+        :raises NotASegmentedDataset: If path exists and is not a directory
+        """
+        if os.path.exists(path) and not os.path.isdir(path):
+            raise NotASegmentedDataset(
+                '{} exists and is not a directory'.format(path))
+        self.path = path
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    @property
+    def segments(self):
+        """List of segments, each one a dictionary with the file name,
+        the number of frames and the first and last frame times (in
+        nanoseconds since epoch)
+        """
+        try:
+            with open(self._file(self.INDEX_FILE)) as f_handle:
+                return json.load(f_handle)['segments']
+        except FileNotFoundError:
+            return []
+
+    @property
+    def metadata(self):
+        """Metadata of the last appended dataset
+        """
+        try:
+            with open(self._file(self.METADATA_FILE)) as f_handle:
+                return PolarisMetadata(json.load(f_handle))
+        except FileNotFoundError:
+            return None
+
+    def __len__(self):
+        return sum(segment['frames'] for segment in self.segments)
+
+    def iter_frames(self, segments=None):
+        """Iterate over the stored frames, segment after segment
+
+        :param segments: Segments to read, defaults to all of them
+        :return: Generator of frames
+        """
+        if segments is None:
+            segments = self.segments
+        for segment in segments:
+            with open(self._file(segment['file'])) as f_handle:
+                for key, frame in iter_dataset_json(f_handle):
+                    if key == 'frames':
+                        yield frame
+
+    def _stored_times(self, first_time, last_time):
+        """Times of the stored frames between first_time and last_time
+
+        :return: Set of times, in nanoseconds since epoch
+        """
+        overlapping = [
+            segment for segment in self.segments
+            if segment['first_time'] <= last_time
+            and segment['last_time'] >= first_time
+        ]
+        if not overlapping:
+            return set()
+        return set(frame_times(list(self.iter_frames(overlapping))))
+
+    def append(self, dataset):
+        """Append the frames of dataset that are not stored yet
+
+        :param dataset: Polaris dataset to append
+        :type dataset: PolarisDataset
+        :return: Number of frames written
+        :rtype: int
+        """
+        os.makedirs(self.path, exist_ok=True)
+        segments = self.segments
+        frames = dataset.frames
+
+        new_frames = []
+        new_times = []
+        if frames:
+            times = frame_times(frames)
+            seen = self._stored_times(int(times.min()), int(times.max()))
+            for frame, time in zip(frames, times):
+                if time not in seen:
+                    seen.add(time)
+                    new_frames.append(frame)
+                    new_times.append(int(time))
+
+        LOGGER.info('Appending %d new frames, %d already stored',
+                    len(new_frames),
+                    len(frames) - len(new_frames))
+
+        if new_frames:
+            segment_file = self.SEGMENT_FILE.format(len(segments))
+            _write_atomically(self._file(segment_file),
+                              json.dumps({"frames": new_frames}))
+            segments.append({
+                "file": segment_file,
+                "frames": len(new_frames),
+                "first_time": min(new_times),
+                "last_time": max(new_times),
+            })
+            _write_atomically(
+                self._file(self.INDEX_FILE),
+                json.dumps({"segments": segments},
+                           indent=constants.JSON_INDENT))
+
+        metadata = PolarisMetadata(dataset.metadata)
+        metadata['total_frames'] = sum(segment['frames']
+                                       for segment in segments)
+        _write_atomically(self._file(self.METADATA_FILE),
+                          json.dumps(metadata, indent=constants.JSON_INDENT))
+
+        return len(new_frames)
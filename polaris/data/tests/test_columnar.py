@@ -0,0 +1,135 @@
+"""Tests for the binary columnar storage of datasets
+"""
+
+import json
+import logging
+
+import pandas as pd
+import pytest
+
+from polaris.data.columnar import read_columnar_data, write_columnar_data, \
+    write_columnar_dataset
+from polaris.data.readers import read_polaris_data, \
+    read_polaris_data_from_json
+from polaris.dataset.dataset import PolarisDataset
+
+DATASET = {
+    "metadata": {
+        "satellite_norad": "44420",
+        "satellite_name": "LightSail-2",
+        "total_frames": 3
+    },
+    "frames": [{
+        "time": "2020-01-01 00:00:00",
+        "measurement": "",
+        "tags": {},
+        "fields": {
+            "batt_temp": {
+                "value": 21,
+                "unit": "degC"
+            },
+            "mode": {
+                "value": 3
+            },
+            "flag": {
+                "value": True
+            }
+        }
+    }, {
+        "time": "2020-01-01 00:00:10",
+        "measurement": "",
+        "tags": {},
+        "fields": {
+            "batt_temp": {
+                "value": 21.5,
+                "unit": "degC"
+            },
+            "mode": {
+                "value": 4
+            },
+            "flag": {
+                "value": False
+            },
+            "label": {
+                "value": "safe"
+            }
+        }
+    }, {
+        "time": "2020-01-01 00:00:20.5",
+        "measurement": "",
+        "tags": {},
+        "fields": {
+            "mode": {
+                "value": 12345678901234
+            },
+            "flag": {
+                "value": True
+            },
+            "voltage": {
+                "value": -1.25e-3,
+                "unit": "V"
+            }
+        }
+    }]
+}
+
+
+@pytest.fixture(name="json_path")
+def fixture_json_path(tmp_path):
+    """Path of the dataset as JSON"""
+    path = str(tmp_path / "dataset.json")
+    with open(path, "w") as json_file:
+        json.dump(DATASET, json_file)
+    return path
+
+
+@pytest.mark.parametrize("extension", [".arrow", ".feather", ".parquet"])
+def test_round_trip_matches_json_read(tmp_path, json_path, extension):
+    """A columnar file gives back the dataframe read from JSON, with the
+    units of the fields"""
+    path = str(tmp_path / ("dataset" + extension))
+    write_columnar_dataset(
+        PolarisDataset(metadata=DATASET["metadata"],
+                       frames=DATASET["frames"]), path)
+
+    metadata, dataframe, units = read_columnar_data(path)
+    json_metadata, json_dataframe = read_polaris_data_from_json(json_path)
+
+    assert metadata == json_metadata
+    assert list(dataframe.columns) == list(json_dataframe.columns)
+    assert dataframe.dtypes.to_dict() == json_dataframe.dtypes.to_dict()
+    pd.testing.assert_frame_equal(dataframe, json_dataframe)
+    assert units == {
+        "batt_temp": "degC",
+        "mode": None,
+        "flag": None,
+        "time": None,
+        "label": None,
+        "voltage": "V"
+    }
+
+    read_metadata, read_dataframe = read_polaris_data(path)
+    assert read_metadata == json_metadata
+    pd.testing.assert_frame_equal(read_dataframe, json_dataframe)
+
+
+@pytest.mark.parametrize("extension", [".arrow", ".parquet"])
+def test_mixed_types_stored_as_strings(tmp_path, extension, caplog):
+    """Columns of values without a common type are stored as strings"""
+    path = str(tmp_path / ("mixed" + extension))
+    dataframe = pd.DataFrame({
+        "mixed": [1, "two", 3.5],
+        "value": [1.0, 2.0, 3.0],
+    })
+
+    with caplog.at_level(logging.WARNING):
+        write_columnar_data(path, {"satellite_name": "test"}, dataframe,
+                            {"value": "m"})
+    assert "Column mixed has mixed types" in caplog.text
+
+    metadata, read_dataframe, units = read_columnar_data(path)
+    assert metadata["satellite_name"] == "test"
+    assert read_dataframe["mixed"].tolist() == ["1", "two", "3.5"]
+    pd.testing.assert_series_equal(read_dataframe["value"],
+                                   dataframe["value"])
+    assert units == {"mixed": None, "value": "m"}
@@ -0,0 +1,41 @@
+"""Tests for the tagging of fetched data columns
+"""
+
+from polaris.data.fetched_data_preprocessor import FetchedDataPreProcessor
+from polaris.dataset.dataset import PolarisDataset
+
+
+def build_dataset(fields_list):
+    """Dataset of one frame per fields dictionary"""
+    frames = [{
+        "time": "2020-01-01 00:00:{:02d}".format(i),
+        "measurement": "",
+        "tags": {},
+        "fields": fields
+    } for i, fields in enumerate(fields_list)]
+    return PolarisDataset(metadata={"total_frames": len(frames)},
+                          frames=frames)
+
+
+def test_tag_columns_with_raw_field_values():
+    """Fields that are raw values rather than dictionaries are ignored"""
+    dataset = build_dataset([{
+        "temp": {
+            "value": i,
+            "unit": "C"
+        },
+        "mode": {
+            "value": 1,
+            "unit": None
+        },
+        "raw": i
+    } for i in range(3)])
+
+    preprocessor = FetchedDataPreProcessor()
+    preprocessor.tag_columns(dataset)
+
+    assert preprocessor.analysis["column_tags"] == {
+        "temp": "variable",
+        "mode": "constant",
+        "time": "variable"
+    }
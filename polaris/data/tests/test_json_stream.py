@@ -0,0 +1,191 @@
+"""Tests for the streaming read of JSON datasets
+"""
+
+import io
+import json
+
+import pandas as pd
+import pytest
+
+from polaris.data.json_stream import CHUNK_SIZE, iter_dataset_json
+from polaris.data.readers import read_polaris_data_from_json
+from polaris.dataset.columns import FrameColumns
+from polaris.dataset.dataset import PolarisDataset
+
+DATASET = {
+    "metadata": {
+        "satellite_norad": "44420",
+        "satellite_name": "LightSail-2",
+        "total_frames": 4
+    },
+    "frames": [{
+        "time": "2020-01-01 00:00:00",
+        "measurement": "",
+        "tags": {
+            "decoder": "Lightsail2"
+        },
+        "fields": {
+            "batt_temp": {
+                "value": 21,
+                "unit": "degC"
+            },
+            "mode": {
+                "value": 3
+            }
+        }
+    }, {
+        "time": "2020-01-01 00:00:10",
+        "measurement": "",
+        "tags": {},
+        "fields": {
+            "batt_temp": {
+                "value": 21.5,
+                "unit": "degC"
+            },
+            "label": {
+                "value": "safe [mode], \"quoted\""
+            }
+        }
+    }, {
+        "time": "2020-01-01 00:00:20.5",
+        "measurement": "",
+        "tags": {},
+        "fields": {
+            "mode": {
+                "value": 12345678901234
+            },
+            "voltage": {
+                "value": -1.25e-3,
+                "unit": "V"
+            }
+        }
+    }, {
+        "time": "2020-01-01 00:00:30",
+        "measurement": "",
+        "tags": {},
+        "fields": {
+            "batt_temp": {
+                "value": None,
+                "unit": "degC"
+            },
+            "mode": {
+                "value": 4
+            }
+        }
+    }]
+}
+
+
+def build_frame(frame_time, **fields):
+    """Frame with values given by field name"""
+    return {
+        "time": frame_time,
+        "measurement": "",
+        "tags": {},
+        "fields": {key: {"value": value} for key, value in fields.items()}
+    }
+
+
+# Columns of a single type, and fields first found in later frames
+TYPED_DATASET = {
+    "metadata": {"satellite_name": "Typed"},
+    "frames": [
+        build_frame("2020-01-01", counter=1, flag=True, name="a"),
+        build_frame("2020-01-02", counter=2, flag=False, name="b", late=1.5),
+        build_frame("2020-01-03", counter=3, flag=True, name="c", other=1),
+    ]
+}
+
+# A time field replaces the time of the frame
+TIME_FIELD_DATASET = {
+    "metadata": {},
+    "frames": [
+        build_frame("2020-01-01", counter=1),
+        build_frame("2020-01-02", counter=2.5, time=5, flag=None),
+        build_frame("2020-01-03"),
+    ]
+}
+
+
+def read_with_polaris_dataset(path):
+    """Read a JSON dataset the way it was read before streaming"""
+    with open(path, "r") as json_file:
+        json_data = json.load(json_file)
+    dataset = PolarisDataset(metadata=json_data["metadata"],
+                             frames=json_data["frames"])
+    return dataset.metadata, dataset.to_pandas_dataframe()
+
+
+@pytest.mark.parametrize("indent", [None, 4])
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, CHUNK_SIZE])
+def test_iter_dataset_json_matches_json_load(indent, chunk_size):
+    """Entries are the same as json.load, whatever the buffer boundaries"""
+    text = json.dumps(DATASET, indent=indent)
+    entries = list(iter_dataset_json(io.StringIO(text), chunk_size))
+
+    document = json.loads(text)
+    assert entries == [("metadata", document["metadata"])] + [
+        ("frames", frame) for frame in document["frames"]
+    ]
+
+
+@pytest.mark.parametrize("text", [
+    '{"metadata": {}, "frames": []}',
+    '{"frames": [], "metadata": {"a": 1}}',
+    '{}',
+])
+def test_iter_dataset_json_without_frames(text):
+    """Documents without frames only yield their other entries"""
+    entries = list(iter_dataset_json(io.StringIO(text), 3))
+    assert entries == [(key, value) for key, value in json.loads(text).items()
+                       if key != "frames"]
+
+
+@pytest.mark.parametrize("text", [
+    '{"metadata": {}, "frames": [{"time": 1}',
+    '{"metadata": {}, "frames": [{"time": 1}}',
+    '["frames"]',
+])
+def test_iter_dataset_json_invalid(text):
+    """Invalid documents raise a JSON decode error"""
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_dataset_json(io.StringIO(text), 4))
+
+
+@pytest.mark.parametrize("document", [
+    DATASET, TYPED_DATASET, TIME_FIELD_DATASET, {
+        "metadata": {},
+        "frames": []
+    }
+],
+                         ids=["fields", "types", "time field", "no frames"])
+def test_read_json_matches_polaris_dataset(tmp_path, document):
+    """Streaming gives the dataframe PolarisDataset gave, with the same
+    columns in the same order, of the same types"""
+    path = str(tmp_path / "dataset.json")
+    with open(path, "w") as json_file:
+        json.dump(document, json_file, indent=4)
+
+    metadata, dataframe = read_polaris_data_from_json(path)
+    expected_metadata, expected = read_with_polaris_dataset(path)
+
+    assert metadata == expected_metadata
+    assert list(dataframe.columns) == list(expected.columns)
+    assert dataframe.dtypes.to_dict() == expected.dtypes.to_dict()
+    pd.testing.assert_frame_equal(dataframe, expected)
+
+
+@pytest.mark.parametrize("chunk_size", [5, CHUNK_SIZE])
+def test_frame_columns_units(chunk_size):
+    """Columns keep the values and units of the fields"""
+    text = json.dumps(DATASET)
+    columns = FrameColumns()
+    for key, value in iter_dataset_json(io.StringIO(text), chunk_size):
+        if key == "frames":
+            columns.append(value)
+
+    assert len(columns) == 4
+    assert columns.to_dataframe()["label"].tolist()[1] == (
+        "safe [mode], \"quoted\"")
+    assert columns.units["voltage"] == "V"
+    assert columns.units["batt_temp"] == "degC"
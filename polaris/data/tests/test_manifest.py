@@ -0,0 +1,92 @@
+"""Tests for the manifests written next to fetch outputs
+"""
+
+import os
+
+import pytest
+
+from polaris.data.manifest import manifest_path, read_manifest, \
+    write_frames_manifest
+from polaris.dataset.dataset import PolarisDataset
+from polaris.fetch.data_fetch_decoder import write_or_merge
+
+
+def build_dataset(times, field="a"):
+    """Dataset of one frame per time"""
+    return PolarisDataset(metadata={"satellite_name": "S"},
+                          frames=[{
+                              "time": time,
+                              "measurement": "",
+                              "tags": {},
+                              "fields": {
+                                  field: {
+                                      "value": 1
+                                  }
+                              }
+                          } for time in times])
+
+
+@pytest.mark.parametrize("name, strategy", [("frames.json", "merge"),
+                                            ("frames.arrow", "merge"),
+                                            ("frames.parquet", "merge"),
+                                            ("segments", "append")])
+def test_manifest_is_merged(tmp_path, name, strategy):
+    """The manifest follows the frames added to a dataset"""
+    path = str(tmp_path / name)
+
+    write_or_merge(
+        build_dataset(["2020-01-02 00:00:00", "2020-01-01 00:00:00"]), path,
+        strategy)
+    manifest = read_manifest(path)
+    assert manifest["first_time"] == "2020-01-01 00:00:00"
+    assert manifest["last_time"] == "2020-01-02 00:00:00"
+    assert manifest["frame_count"] == 2
+    assert manifest["columns"] == ["a", "time"]
+
+    write_or_merge(build_dataset(["2020-01-03 12:00:00"], "b"), path,
+                   strategy)
+    manifest = read_manifest(path)
+    assert manifest["first_time"] == "2020-01-01 00:00:00"
+    assert manifest["last_time"] == "2020-01-03 12:00:00"
+    assert manifest["frame_count"] == 3
+    assert sorted(manifest["columns"]) == ["a", "b", "time"]
+
+
+@pytest.mark.parametrize("name, strategy", [("frames.arrow", "merge"),
+                                            ("segments", "append")])
+def test_manifest_is_rebuilt_without_previous_manifest(
+        tmp_path, name, strategy):
+    """A missing manifest is computed again from the whole dataset"""
+    path = str(tmp_path / name)
+    write_or_merge(build_dataset(["2020-01-01 00:00:00"]), path, strategy)
+    os.remove(manifest_path(path))
+
+    write_or_merge(build_dataset(["2020-01-02 00:00:00"]), path, strategy)
+    manifest = read_manifest(path)
+    assert manifest["first_time"] == "2020-01-01 00:00:00"
+    assert manifest["last_time"] == "2020-01-02 00:00:00"
+    assert manifest["frame_count"] == 2
+
+
+def test_changed_dataset_manifest_is_ignored(tmp_path):
+    """A manifest older than its dataset is only read unchecked"""
+    path = tmp_path / "frames.json"
+    dataset = build_dataset(["2020-01-01 00:00:00"])
+    path.write_text(dataset.to_json())
+    write_frames_manifest(str(path), dataset.frames)
+    assert read_manifest(str(path))["frame_count"] == 1
+
+    path.write_text(dataset.to_json() + "\n")
+    assert read_manifest(str(path)) is None
+    assert read_manifest(str(path), check=False)["frame_count"] == 1
+
+
+def test_missing_or_invalid_manifest(tmp_path):
+    """Datasets without a valid manifest have none"""
+    path = tmp_path / "frames.json"
+    path.write_text("{}")
+    assert read_manifest(str(path)) is None
+
+    with open(manifest_path(str(path)), "w") as f_handle:
+        f_handle.write("{")
+    assert read_manifest(str(path)) is None
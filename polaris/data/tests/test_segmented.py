@@ -0,0 +1,119 @@
+"""Tests for the append-only storage of datasets in segments
+"""
+
+import pytest
+
+from polaris.data.readers import read_polaris_data
+from polaris.data.segmented import NotASegmentedDataset, SegmentedDataset
+from polaris.dataset.dataset import PolarisDataset
+
+METADATA = {"satellite_norad": "44420", "satellite_name": "LightSail-2"}
+
+
+def build_dataset(*times):
+    """Dataset of frames at the given times, with a value telling them
+    apart"""
+    return PolarisDataset(metadata=METADATA,
+                          frames=[{
+                              "time": time,
+                              "measurement": "",
+                              "tags": {},
+                              "fields": {
+                                  "index": {
+                                      "value": index
+                                  }
+                              }
+                          } for index, time in enumerate(times)])
+
+
+def stored_times(segmented):
+    """Times of the stored frames, in storage order"""
+    return [frame["time"] for frame in segmented.iter_frames()]
+
+
+def test_append_drops_stored_times(tmp_path):
+    """Frames whose time is already stored are not written again"""
+    segmented = SegmentedDataset(str(tmp_path / "dataset"))
+    assert segmented.append(
+        build_dataset("2020-01-01 00:00:00", "2020-01-01 00:00:10",
+                      "2020-01-01 00:00:20")) == 3
+
+    written = segmented.append(
+        build_dataset("2020-01-01 00:00:10", "2020-01-01 00:00:05",
+                      "2020-01-01T00:00:20", "2020-01-01 00:00:30",
+                      "2020-01-01 00:00:05"))
+
+    # Times are compared as instants, and within the appended frames too
+    assert written == 2
+    assert stored_times(segmented) == [
+        "2020-01-01 00:00:00", "2020-01-01 00:00:10", "2020-01-01 00:00:20",
+        "2020-01-01 00:00:05", "2020-01-01 00:00:30"
+    ]
+    assert [segment["frames"] for segment in segmented.segments] == [3, 2]
+    assert len(segmented) == 5
+    assert segmented.metadata["total_frames"] == 5
+    assert segmented.metadata["satellite_name"] == "LightSail-2"
+
+
+def test_append_only_stored_frames(tmp_path):
+    """Appending frames all stored writes no segment"""
+    segmented = SegmentedDataset(str(tmp_path / "dataset"))
+    segmented.append(build_dataset("2020-01-01 00:00:00",
+                                   "2020-01-01 00:00:10"))
+
+    assert segmented.append(build_dataset("2020-01-01 00:00:10")) == 0
+    assert segmented.append(PolarisDataset(metadata=METADATA,
+                                           frames=[])) == 0
+    assert len(segmented.segments) == 1
+    assert segmented.metadata["total_frames"] == 2
+
+
+def test_append_reads_overlapping_segments_only(tmp_path, monkeypatch):
+    """Only the segments whose time range overlaps the new frames are
+    read"""
+    segmented = SegmentedDataset(str(tmp_path / "dataset"))
+    segmented.append(build_dataset("2020-01-01 00:00:00",
+                                   "2020-01-01 00:00:10"))
+    segmented.append(build_dataset("2020-01-02 00:00:00",
+                                   "2020-01-02 00:00:10"))
+
+    read_segments = []
+    iter_frames = segmented.iter_frames
+
+    def record_iter_frames(segments=None):
+        read_segments.extend(segment["file"] for segment in segments)
+        return iter_frames(segments)
+
+    monkeypatch.setattr(segmented, "iter_frames", record_iter_frames)
+
+    assert segmented.append(
+        build_dataset("2020-01-02 00:00:05", "2020-01-02 00:00:10")) == 1
+    assert read_segments == ["frames-000001.json"]
+
+    del read_segments[:]
+    assert segmented.append(build_dataset("2020-01-03 00:00:00")) == 1
+    assert not read_segments
+
+
+def test_read_segments(tmp_path):
+    """A segmented dataset is read as a single dataframe"""
+    path = str(tmp_path / "dataset")
+    segmented = SegmentedDataset(path)
+    segmented.append(build_dataset("2020-01-01 00:00:00",
+                                   "2020-01-01 00:00:10"))
+    segmented.append(build_dataset("2020-01-01 00:00:10",
+                                   "2020-01-01 00:00:20"))
+
+    metadata, dataframe = read_polaris_data(path)
+
+    assert metadata["total_frames"] == 3
+    assert dataframe["index"].tolist() == [0, 1, 1]
+    assert len(dataframe["time"].unique()) == 3
+
+
+def test_not_a_directory(tmp_path):
+    """A segmented dataset cannot be stored in a file"""
+    path = tmp_path / "dataset.json"
+    path.write_text("{}")
+    with pytest.raises(NotASegmentedDataset):
+        SegmentedDataset(str(path))
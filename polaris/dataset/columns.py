@@ -0,0 +1,175 @@
+import logging
+from array import array
+
+import numpy as np
+import pandas as pd
+
+LOGGER = logging.getLogger(__name__)
+
+_INT64_MIN, _INT64_MAX = -2**63, 2**63 - 1
+
+
+class _Column:
+    """Values of one column, stored in a typed array while they are all
+    integers or all numbers, and in a list otherwise.
+    """
+    __slots__ = ('values', 'typecode')
+
+    def __init__(self):
+        self.values = array('q')
+        self.typecode = 'q'
+
+    def _to_float(self):
+        self.values = array('d', self.values)
+        self.typecode = 'd'
+
+    def _to_list(self):
+        self.values = list(self.values)
+        self.typecode = None
+
+    def pad(self, length):
+        """Fill the column with missing values up to length
+        """
+        missing = length - len(self.values)
+        if missing <= 0:
+            return
+        if self.typecode == 'q':
+            self._to_float()
+        if self.typecode == 'd':
+            self.values.extend(array('d', [np.nan]) * missing)
+        else:
+            self.values.extend([np.nan] * missing)
+
+    def append(self, value):
+        """Append a value at the end of the column
+        """
+        value_type = type(value)
+        if self.typecode == 'q':
+            if value_type is int and _INT64_MIN <= value <= _INT64_MAX:
+                self.values.append(value)
+                return
+            if value_type in (int, float) or value is None:
+                self._to_float()
+            else:
+                self._to_list()
+
+        if self.typecode == 'd':
+            if value_type in (int, float):
+                self.values.append(value)
+                return
+            if value is None:
+                self.values.append(np.nan)
+                return
+            self._to_list()
+
+        self.values.append(value)
+
+    def to_numpy(self):
+        """Return the values as a numpy array, without copy when the
+        values are stored in a typed array
+        """
+        if self.typecode == 'q':
+            return np.frombuffer(self.values, dtype=np.int64)
+        if self.typecode == 'd':
+            return np.frombuffer(self.values, dtype=np.float64)
+        return pd.Series(self.values).to_numpy()
+
+
+class FrameColumns:
+    """Build a dataframe from Polaris frames column by column.
+
+    The field values of every frame are appended to per-column arrays,
+    giving the same dataframe as PolarisDataset.to_pandas_dataframe
+    without keeping the frames themselves.
+    """
+
+    def __init__(self):
+        self._columns = {}
+        self._units = {}
+        self._rows = 0
+        # Rows of the frames without a time field, and their frame time
+        self._time_rows = []
+        self._times = []
+
+    def __len__(self):
+        return self._rows
+
+    @property
+    def units(self):
+        """Unit of each column, as found in the first frame holding it
+        """
+        return self._units
+
+    def _set(self, name, value):
+        column = self._columns.get(name)
+        if column is None:
+            column = self._columns[name] = _Column()
+        column.pad(self._rows)
+        column.append(value)
+
+    def append(self, frame):
+        """Add the field values of a frame as a new row
+
+        :param frame: Frame with 'time' and 'fields' entries
+        :type frame: dict
+        """
+        has_time = False
+        for name, field in frame['fields'].items():
+            try:
+                value = field['value']
+            except (KeyError, TypeError, IndexError) as error:
+                LOGGER.debug("Exception: %s, field: %s", error, name)
+                continue
+            has_time = has_time or name == 'time'
+            self._set(name, value)
+            if name not in self._units:
+                self._units[name] = field.get('unit')
+
+        if not has_time:
+            # Converted all at once in to_dataframe
+            self._time_rows.append(self._rows)
+            self._times.append(frame['time'])
+            self._set('time', np.nan)
+
+        self._rows += 1
+
+    def extend(self, frames):
+        """Add the field values of several frames
+
+        :param frames: Iterable of frames
+        """
+        for frame in frames:
+            self.append(frame)
+
+    def _frame_timestamps(self):
+        """Convert the frame times to POSIX timestamps, as
+        pd.Timestamp.timestamp does
+        """
+        try:
+            times = pd.to_datetime(self._times)
+        except (ValueError, TypeError):
+            # Mixed time formats or timezones
+            return np.array(
+                [pd.to_datetime(time).timestamp() for time in self._times])
+
+        return np.round(times.asi8 / 1e9, 6)
+
+    def to_dataframe(self):
+        """Build the dataframe of all the appended frames
+
+        :return: Dataframe with one row per frame
+        :rtype: pd.DataFrame
+        """
+        data = {}
+        for name, column in self._columns.items():
+            column.pad(self._rows)
+            data[name] = column.to_numpy()
+
+        if self._times:
+            time_column = data['time']
+            if not time_column.flags.writeable:
+                time_column = time_column.copy()
+            time_column[self._time_rows] = self._frame_timestamps()
+            data['time'] = time_column
+
+        return pd.DataFrame(data, copy=False)
@@ -0,0 +1,156 @@
+"""
+Combination of the raw frame CSV files of a cache directory.
+
+The raw frame files are appended, as they are, to a single combined file.
+A manifest next to it records the size and modification time of every
+source file already combined, and the size of the combined file, so that
+later combinations only append the new source files:
+
+    {"combined_size": 1234,
+     "sources": {"file.csv": {"size": 1234, "mtime_ns": 1600000000000}}}
+
+The combined file is never read back. It is rebuilt from scratch when a
+source file already combined has been modified or removed, or when it does
+not match the manifest.
+"""
+
+import json
+import logging
+import os
+
+from polaris.common import constants
+
+LOGGER = logging.getLogger(__name__)
+
+COMBINED_CSV_FILE = "combined_csv.csv"
+
+# Number of bytes copied at once from a source file
+CHUNK_SIZE = 1 << 20
+
+
+def build_manifest_path(combined_path):
+    """Return the path of the manifest of a combined file"""
+    return os.path.splitext(combined_path)[0] + ".manifest.json"
+
+
+def _write_atomically(path, content):
+    """Write content to path, replacing any previous file at once
+    """
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f_handle:
+        f_handle.write(content)
+    os.replace(tmp_path, path)
+
+
+def _file_state(path):
+    """Size and modification time identifying a version of a file"""
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _read_manifest(manifest_path):
+    """Read a manifest, an empty one if it is missing or invalid"""
+    try:
+        with open(manifest_path) as f_handle:
+            manifest = json.load(f_handle)
+        return {
+            "combined_size": int(manifest["combined_size"]),
+            "sources": dict(manifest["sources"])
+        }
+    except FileNotFoundError:
+        pass
+    except (ValueError, KeyError, TypeError):
+        LOGGER.warning("Ignoring invalid manifest %s", manifest_path)
+    return {"combined_size": 0, "sources": {}}
+
+
+def _is_up_to_date(manifest, combined_path, sources):
+    """Tell if the combined file only holds source files still unchanged
+
+    A combined file longer than the manifest records, left by an
+    interrupted combination, is truncated to the recorded size.
+    """
+    for name, state in manifest["sources"].items():
+        if sources.get(name) != state:
+            LOGGER.info("%s has changed since it was combined", name)
+            return False
+
+    try:
+        combined_size = os.path.getsize(combined_path)
+    except FileNotFoundError:
+        combined_size = -1
+    if combined_size < manifest["combined_size"]:
+        return False
+    if combined_size > manifest["combined_size"]:
+        LOGGER.warning("Dropping the end of %s, not in its manifest",
+                       combined_path)
+        with open(combined_path, "r+b") as f_handle:
+            f_handle.truncate(manifest["combined_size"])
+    return True
+
+
+def _append_file(source_path, f_handle):
+    """Append a source file to the combined file, ending it with a newline
+
+    :returns: number of bytes written
+    """
+    written = 0
+    last_byte = b"\n"
+    with open(source_path, "rb") as source:
+        while True:
+            chunk = source.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            f_handle.write(chunk)
+            written += len(chunk)
+            last_byte = chunk[-1:]
+    if last_byte != b"\n":
+        f_handle.write(b"\n")
+        written += 1
+    return written
+
+
+def combine_csv_files(directory, combined_name=COMBINED_CSV_FILE):
+    """Append the CSV files of directory not combined yet to the combined
+    file
+
+    :param directory: directory of the raw frame CSV files
+    :param combined_name: name of the combined file within directory
+    :returns: path of the combined file and number of files appended
+    :rtype: (str, int)
+    :raises FileNotFoundError: if there are no CSV files in directory
+    """
+    combined_path = os.path.join(directory, combined_name)
+    manifest_path = build_manifest_path(combined_path)
+
+    sources = {
+        name: _file_state(os.path.join(directory, name))
+        for name in sorted(os.listdir(directory))
+        if name.endswith(".csv") and name != combined_name
+        and os.path.isfile(os.path.join(directory, name))
+    }
+    if not sources:
+        raise FileNotFoundError("No CSV files found to combine.")
+
+    manifest = _read_manifest(manifest_path)
+    if not _is_up_to_date(manifest, combined_path, sources):
+        LOGGER.info("Combining all the CSV files again")
+        manifest = {"combined_size": 0, "sources": {}}
+        open(combined_path, "wb").close()
+
+    new_sources = [name for name in sources if name not in manifest["sources"]]
+    if new_sources:
+        with open(combined_path, "ab") as f_handle:
+            for name in new_sources:
+                manifest["combined_size"] += _append_file(
+                    os.path.join(directory, name), f_handle)
+                manifest["sources"][name] = sources[name]
+            f_handle.flush()
+            os.fsync(f_handle.fileno())
+        _write_atomically(manifest_path,
+                          json.dumps(manifest, indent=constants.JSON_INDENT))
+
+    LOGGER.info("%d CSV files appended to %s, %d already combined",
+                len(new_sources), combined_path,
+                len(sources) - len(new_sources))
+    return combined_path, len(new_sources)
@@ -6,23 +6,21 @@ import logging
 import os
 import re
 import sys
-from collections import namedtuple
 
+import pandas as pd
+
+from polaris.data.columnar import dataset_to_columns, is_columnar_file, \
+    read_columnar_data, write_columnar_data, write_columnar_dataset
 from polaris.data.fetched_data_preprocessor import FetchedDataPreProcessor
+from polaris.data.manifest import frame_columns, frame_times, read_manifest, \
+    write_frames_manifest, write_manifest
+from polaris.data.segmented import NotASegmentedDataset, SegmentedDataset
 from polaris.dataset.dataset import PolarisDataset
 from polaris.fetch.fetch_import_sw import fetch_preprocessed_sw
 from polaris.fetch.fetch_import_telemetry import fetch_normalized_telemetry, \
     load_frames_from_json_file
-
-Satellite = namedtuple('Satellite',
-                       ['norad_id', 'name', 'decoder', 'normalizer'])
-
-SATELLITE_DATA_FILE = 'satellites.json'
-SATELLITE_DATA_DIR = os.path.dirname(__file__)
-_SATELLITES = json.loads(
-    open(os.path.join(SATELLITE_DATA_DIR, SATELLITE_DATA_FILE)).read(),
-    object_hook=lambda d: Satellite(d['norad_id'], d['name'], d['decoder'], d[
-        'normalizer']))
+from polaris.fetch.list_satellites import _SATELLITES
+from polaris.swpc.storage.retrieve import TimeLookup
 
 LOGGER = logging.getLogger(__name__)
 
@@ -54,13 +52,102 @@ def get_times_from_frames_list(list_of_frames, key='time'):
     return [frame[key] for frame in list_of_frames]
 
 
+def check_satellite_names(existing_metadata, metadata):
+    """Verify that fetch encoder matches existing encoder in the output file.
+
+    :raises SatelliteNamesNotMatching: If the satellite names differ
+    """
+    if existing_metadata['satellite_name'] != metadata['satellite_name']:
+        raise SatelliteNamesNotMatching(' '.join([
+            'Satellite name used does not match satellite_name',
+            'in the existing output file, refusing to merge'
+        ]))
+
+
+def merge_columnar(dataset, file):
+    """Merge dataset with the existing binary columnar output file
+
+    :param dataset: Polaris dataset to add to the file
+    :type dataset: PolarisDataset
+    :param file: Path of an existing Arrow or Parquet dataset file
+    """
+    LOGGER.debug('Trying to load dataset from %s', file)
+    previous_manifest = read_manifest(file)
+    existing_metadata, existing_frame, units = read_columnar_data(file)
+    check_satellite_names(existing_metadata, dataset.metadata)
+
+    new_frame, new_units = dataset_to_columns(dataset)
+    for name, unit in new_units.items():
+        if units.get(name) is None:
+            units[name] = unit
+    merged_frame = pd.concat([existing_frame, new_frame], ignore_index=True)
+    write_columnar_data(file, dataset.metadata, merged_frame, units)
+
+    if previous_manifest is not None:
+        write_manifest(file,
+                       times=frame_times(dataset.frames),
+                       frame_count=len(merged_frame),
+                       columns=frame_columns(dataset.frames),
+                       previous=previous_manifest)
+    else:
+        # The time column holds POSIX timestamps, see FrameColumns
+        write_manifest(file,
+                       times=(merged_frame['time'].dropna().to_numpy() *
+                              1e9).round(),
+                       frame_count=len(merged_frame),
+                       columns=merged_frame.columns)
+
+
+def append_segments(dataset, file):
+    """Append dataset to the segmented dataset directory file
+
+    :param dataset: Polaris dataset to add to the directory
+    :type dataset: PolarisDataset
+    :param file: Path of a segmented dataset directory
+    """
+    segmented_dataset = SegmentedDataset(file)
+    existing_metadata = segmented_dataset.metadata
+    if existing_metadata is not None:
+        check_satellite_names(existing_metadata, dataset.metadata)
+
+    previous_manifest = read_manifest(file)
+    if previous_manifest is None:
+        columns = frame_columns(segmented_dataset.iter_frames())
+    else:
+        columns = previous_manifest['columns']
+    segmented_dataset.append(dataset)
+
+    segments = segmented_dataset.segments
+    if not segments:
+        return
+    write_manifest(file,
+                   times=[segment[key] for segment in segments
+                          for key in ('first_time', 'last_time')],
+                   frame_count=sum(segment['frames'] for segment in segments),
+                   columns=columns + frame_columns(dataset.frames))
+
+
 def write_or_merge(dataset, file, strategy):
     """Write dataset to output_file; if output file already exists, follow
-    strategy: overwrite, merge or error.
+    strategy: overwrite, merge, append or error.
 
+    The output is written as JSON, or in a binary columnar format when the
+    file extension is one of Arrow (.arrow, .feather) or Parquet
+    (.parquet). With the append strategy, file is a segmented dataset
+    directory and only the frames it does not hold yet are written.
+
+    A manifest of the output is written next to it, see
+    polaris.data.manifest.
+
+    :return: Dataset held by file once written, or None when it is only
+        stored in file (binary columnar merge, append)
+    :rtype: PolarisDataset
     """
 
     def write_dataset(dataset, file):
+        if is_columnar_file(file):
+            write_columnar_dataset(dataset, file)
+            return
         with open(file, 'w') as f_handle:
             f_handle.write(dataset.to_json())
 
@@ -69,39 +156,47 @@ def write_or_merge(dataset, file, strategy):
     if strategy == 'overwrite':
         LOGGER.info('Overwriting existing file')
         write_dataset(dataset, file)
-    elif strategy == 'error' and file_exists is True:
+        write_frames_manifest(file, dataset.frames)
+        return dataset
+    if strategy == 'append':
+        append_segments(dataset, file)
+        return None
+    if strategy == 'error' and file_exists is True:
         raise FileExistsError(
             'Output file already exists, refusing to overwrite.')
-    else:
-        # Default strategy is merge.
-
-        # Take copy of dataset, so that we don't change the original
-        # object.
-        dataset_for_writing = PolarisDataset(metadata=dataset.metadata,
-                                             frames=dataset.frames)
-        if file_exists is True:
-            try:
-                LOGGER.debug('Trying to load dataset from %s', file)
-                existing_dataset = load_frames_from_json_file(file)
-                # Verify that fetch encoder matches
-                # existing encoder in the output file.
-                if (existing_dataset['metadata']['satellite_name'] !=
-                    dataset.metadata['satellite_name']):
-                    raise SatelliteNamesNotMatching(' '.join([
-                        'Satellite name used does not match satellite_name',
-                        'in the existing output file, refusing to merge'
-                    ]))
-                dataset_for_writing.frames = existing_dataset[
-                                                 'frames'] + dataset.frames
-            except json.JSONDecodeError:
-                LOGGER.info("File exists but cannot parse it")
-        write_dataset(dataset_for_writing, file)
+    if file_exists is True and is_columnar_file(file):
+        merge_columnar(dataset, file)
+        return None
+
+    # Default strategy is merge.
+
+    # Take copy of dataset, so that we don't change the original
+    # object.
+    dataset_for_writing = PolarisDataset(metadata=dataset.metadata,
+                                         frames=dataset.frames)
+    if file_exists is True:
+        try:
+            LOGGER.debug('Trying to load dataset from %s', file)
+            existing_dataset = load_frames_from_json_file(file)
+            check_satellite_names(existing_dataset['metadata'],
+                                  dataset.metadata)
+            dataset_for_writing.frames = existing_dataset[
+                                             'frames'] + dataset.frames
+        except json.JSONDecodeError:
+            LOGGER.info("File exists but cannot parse it")
+    write_dataset(dataset_for_writing, file)
+    write_frames_manifest(file, dataset_for_writing.frames)
+    return dataset_for_writing
 
 
 def combine_frames(satellite_frames, sw_frames):
     """
     Combines normalized satellite_frames with normalized sw_frames
 
+    Every telemetry frame gets the fields of the last space weather frame
+    of each index at or before its time, whatever the order of the
+    telemetry frames.
+
     :param satellite_frames: List of normalized frames
     :type satellite_frames: list
     :param sw_frames: Dictionary with key as the space_weather index, value as
@@ -112,19 +207,35 @@ def combine_frames(satellite_frames, sw_frames):
     :rtype: list
     """
     LOGGER.info("Combining space weather and telemetry frames")
-    combined_frames = []
-    # satellite_frames is a list
-    for frame_no, frame in enumerate(satellite_frames):
-        # sw_frames is a dict of lists
-        for sw_frame in sw_frames.values():
-            frame['fields'] = {
-                **frame['fields'],
-                **sw_frame[frame_no]['fields']
-            }
+    if not satellite_frames:
+        return satellite_frames
 
-        combined_frames.append(frame)
+    times = pd.to_datetime(get_times_from_frames_list(satellite_frames)).asi8
+    for index, frames in sw_frames.items():
+        if not frames:
+            LOGGER.warning("No space weather frames for %s", index)
+            continue
 
-    return combined_frames
+        # One asof join per index, on the frame times
+        lookup = TimeLookup(
+            pd.DataFrame(
+                {"fields": [frame['fields'] for frame in frames]},
+                index=pd.to_datetime(get_times_from_frames_list(frames))))
+        positions = lookup.asof_positions(times)
+        sw_fields = lookup.dataframe['fields'].to_numpy()
+
+        missing = 0
+        for frame, position in zip(satellite_frames, positions):
+            if position < 0:
+                missing += 1
+                continue
+            frame['fields'].update(sw_fields[position])
+
+        if missing:
+            LOGGER.warning("%d frames are older than all the %s data",
+                           missing, index)
+
+    return satellite_frames
 
 
 def normalize_satname(sat_name):
@@ -187,9 +298,12 @@ def data_fetch_decode_normalize(sat,
     :param cache_dir: where temp output data should go
     :param import_file: file containing data frames to import
     :param existing_output_file_strategy: what to do with existing
-           output files: merge, overwrite or error.
+           output files: merge, overwrite, append or error.
     :param skip_normalizer: skip normalizing of data
     :param ignore_errors: ignore errors when decoding frames
+    :return: Dataset held by output_file, or None when it is only stored
+        in output_file (see write_or_merge)
+    :rtype: PolarisDataset
     """
     if not os.path.exists(cache_dir):
         os.makedirs(cache_dir)
@@ -242,8 +356,8 @@ def data_fetch_decode_normalize(sat,
 
     # Write all the data
     try:
-        write_or_merge(polaris_dataset, output_file,
-                       existing_output_file_strategy)
+        output_dataset = write_or_merge(polaris_dataset, output_file,
+                                        existing_output_file_strategy)
         LOGGER.info('Output file %s', output_file)
     except FileExistsError:
         LOGGER.critical(' '.join([
@@ -258,3 +372,11 @@ def data_fetch_decode_normalize(sat,
             'the satellite name in your existing output file.'
         ]))
         sys.exit(1)
+    except NotASegmentedDataset:
+        LOGGER.critical(' '.join([
+            'The append strategy stores the output in a directory,',
+            'but the output file exists and is not a directory.'
+        ]))
+        sys.exit(1)
+
+    return output_dataset
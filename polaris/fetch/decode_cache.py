@@ -0,0 +1,239 @@
+"""
+Cache of the frames decoded by decode_multiple.
+
+Every raw frame, a "timestamp|hexadecimal frame" row of the files given to
+decode_multiple, is identified by a hash of the decoder name and of the row.
+Decoded frames are appended to a JSON Lines store, one entry per raw frame:
+
+    {"key": "<sha256>", "decoder": "<decoder>", "frame": {...}}
+
+with a null frame when decode_multiple could not decode the raw frame.
+Only the raw frames without an entry in the store are given to
+decode_multiple, so that frames fetched again are never decoded twice.
+
+decode_multiple copies the first column of its input to the time of each
+frame it decodes: the raw frames are given to it with their position in
+place of their timestamp, to match every decoded frame with its raw frame
+even when several raw frames share a timestamp.
+"""
+
+import csv
+import hashlib
+import json
+import logging
+import os
+import subprocess
+import tempfile
+
+LOGGER = logging.getLogger(__name__)
+
+DECODE_CACHE_FILE = "decoded_frames.jsonl"
+
+# decode_multiple reads its input with this delimiter and encoding
+RAW_FRAME_DELIMITER = "|"
+RAW_FRAME_ENCODING = "utf-8"
+
+
+class DecodeMultipleFailed(Exception):
+    """Raised when decode_multiple command fails"""
+
+
+def build_decode_args(src, decoder):
+    """Build the arguments of decode_multiple to decode a CSV file."""
+    return ["decode_multiple", "--filename", src, "--format", "csv", decoder]
+
+
+def raw_frame_key(decoder, timestamp, frame):
+    """Identify a raw frame decoded with decoder
+
+    :param decoder: decoder name
+    :param timestamp: time of the frame, as found in the raw file
+    :param frame: hexadecimal frame, as found in the raw file
+    :returns: hexadecimal SHA-256 digest
+    """
+    raw = RAW_FRAME_DELIMITER.join([decoder, timestamp, frame])
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def read_raw_frames(file):
+    """Read the raw frames of a file given to decode_multiple
+
+    Rows without a frame column are skipped, as decode_multiple does.
+
+    :param file: CSV file of "timestamp|hexadecimal frame" rows
+    :returns: list of (timestamp, frame) tuples
+    """
+    with open(file, mode="r", encoding=RAW_FRAME_ENCODING,
+              newline="") as f_handle:
+        reader = csv.reader(f_handle, delimiter=RAW_FRAME_DELIMITER)
+        return [(row[0], row[1]) for row in reader if len(row) > 1]
+
+
+def iter_decode_cache(file, decoder=None):
+    """Iterate over the entries of a decode cache store, line by line
+
+    A truncated last line, left by an interrupted append, is skipped.
+
+    :param file: JSON Lines store
+    :param decoder: only yield the entries of this decoder, defaults to
+        None (all entries)
+    :returns: generator of entries
+    """
+    with open(file) as f_handle:
+        for line_number, line in enumerate(f_handle, 1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                LOGGER.warning("Skipping invalid line %d of %s", line_number,
+                               file)
+                continue
+            if decoder is None or entry["decoder"] == decoder:
+                yield entry
+
+
+class DecodeCache:
+    """Persistent store of the frames decoded with a decoder
+    """
+
+    def __init__(self, directory, decoder):
+        """
+        :param directory: directory of the store
+        :param decoder: decoder name
+        """
+        self.path = os.path.join(directory, DECODE_CACHE_FILE)
+        self.decoder = decoder
+        self._frames = None
+
+    def _load(self):
+        """Load the decoded frames of the store, once
+
+        :returns: decoded frame, or None, of each known raw frame key
+        :rtype: dict
+        """
+        if self._frames is None:
+            self._frames = {}
+            if os.path.exists(self.path):
+                for entry in iter_decode_cache(self.path, self.decoder):
+                    self._frames[entry["key"]] = entry["frame"]
+        return self._frames
+
+    def __len__(self):
+        return len(self._load())
+
+    def frames(self):
+        """List the frames of the store that could be decoded
+
+        :returns: list of decoded frames
+        """
+        return [frame for frame in self._load().values() if frame is not None]
+
+    def _append(self, entries):
+        """Append entries to the store and to the loaded frames
+
+        :param entries: list of (key, frame) tuples
+        """
+        frames = self._load()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a") as f_handle:
+            for key, frame in entries:
+                f_handle.write(
+                    json.dumps({
+                        "key": key,
+                        "decoder": self.decoder,
+                        "frame": frame
+                    }) + "\n")
+                frames[key] = frame
+            f_handle.flush()
+            os.fsync(f_handle.fileno())
+
+    def _run_decoder(self, raw_frames):
+        """Decode raw frames with decode_multiple
+
+        :param raw_frames: list of (timestamp, frame) tuples
+        :returns: return code and decoded frames, each with the position of
+            its raw frame as time
+        :rtype: (int, list)
+        """
+        directory = os.path.dirname(self.path) or "."
+        with tempfile.NamedTemporaryFile(mode="w",
+                                         encoding=RAW_FRAME_ENCODING,
+                                         newline="",
+                                         suffix=".csv",
+                                         dir=directory,
+                                         delete=False) as f_handle:
+            writer = csv.writer(f_handle, delimiter=RAW_FRAME_DELIMITER)
+            writer.writerows((position, frame)
+                             for position, (_, frame) in enumerate(raw_frames))
+            src = f_handle.name
+
+        decode_args = build_decode_args(src, self.decoder)
+        LOGGER.debug("Decode command: %s", " ".join(decode_args))
+        try:
+            proc = subprocess.run(decode_args,
+                                  cwd=directory,
+                                  stdout=subprocess.PIPE,
+                                  check=False)
+        finally:
+            os.remove(src)
+
+        try:
+            decoded = json.loads(proc.stdout or b"[]")
+        except json.JSONDecodeError:
+            LOGGER.error("decode_multiple output is not a valid JSON document")
+            decoded = []
+        return proc.returncode, decoded
+
+    def decode(self, file, ignore_errors=False):
+        """Decode the raw frames of a file, only running decode_multiple on
+        the frames missing from the store
+
+        :param file: CSV file of "timestamp|hexadecimal frame" rows
+        :param ignore_errors: ignore errors of decode_multiple
+        :returns: decoded frames, in the order of the raw frames
+        :raises DecodeMultipleFailed: if decode_multiple fails and errors
+            are not ignored
+        """
+        frames = self._load()
+        raw_frames = read_raw_frames(file)
+        keys = [
+            raw_frame_key(self.decoder, timestamp, frame)
+            for timestamp, frame in raw_frames
+        ]
+
+        unseen = {}
+        for key, raw_frame in zip(keys, raw_frames):
+            if key not in frames:
+                unseen.setdefault(key, raw_frame)
+        LOGGER.info("%d raw frames to decode, %d found in the decode cache",
+                    len(unseen),
+                    len(raw_frames) - len(unseen))
+
+        if unseen:
+            unseen_keys = list(unseen)
+            returncode, decoded = self._run_decoder(list(unseen.values()))
+            if returncode != 0 and ignore_errors is False:
+                raise DecodeMultipleFailed
+
+            decoded_by_key = {}
+            for frame in decoded:
+                try:
+                    key = unseen_keys[int(frame["time"])]
+                except (KeyError, ValueError, IndexError):
+                    LOGGER.warning("Ignoring decoded frame with unknown time"
+                                   " %s", frame.get("time"))
+                    continue
+                frame["time"] = unseen[key][0]
+                decoded_by_key[key] = frame
+
+            entries = []
+            for key in unseen_keys:
+                if key in decoded_by_key:
+                    entries.append((key, decoded_by_key[key]))
+                elif returncode == 0:
+                    # Not decodable, the decoder is not run on it again
+                    entries.append((key, None))
+            self._append(entries)
+
+        return [frames[key] for key in keys if frames.get(key) is not None]
@@ -5,7 +5,6 @@ import logging
 import pandas as pd
 from dateutil import parser
 from polaris.swpc.space_weather import sw_file_fetch
-from polaris.swpc.space_weather.sw_extractor import NoSpaceWeatherForIndex
 from polaris.swpc.storage import retrieve, store
 
 from polaris.fetch import fetch_import_telemetry
@@ -57,21 +56,15 @@ def fetch_sw(start_date, end_date, cache_dir, indices=SUPPORTED_INDICES):
     :return: Dictionary of dataframes containing indices fetched
     :rtype: dict of pd.DataFrame
     """
-    data = {}
     for index in indices:
         if index not in SUPPORTED_INDICES:
             raise ValueError("Index {} not supported yet!".format(index))
 
-        try:
-            temp_df = sw_file_fetch.fetch_indices(index, start_date, end_date,
-                                                  cache_dir)
-            # To prevent problems for learn
-            data[index] = temp_df.fillna(-1)
-        except NoSpaceWeatherForIndex as err:
-            LOGGER.info(err)
-            continue
-
-    return data
+    # All the missing files of all the indices are downloaded together
+    data = sw_file_fetch.fetch_multiple_indices(indices, start_date,
+                                                end_date, cache_dir)
+    # To prevent problems for learn
+    return {index: data[index].fillna(-1) for index in data}
 
 
 def fetch_sw_from_influxdb(sat,
@@ -95,39 +88,38 @@ def fetch_sw_from_influxdb(sat,
     """
     # Fetch data from influxdb
     LOGGER.info("Fetching space weather data from influxdb")
-    data = {}
+    try:
+        # All the indices come in one query
+        data = retrieve.fetch_multiple_from_influxdb(
+            datetime.datetime(year=local_start_date.year,
+                              month=local_start_date.month,
+                              day=local_start_date.day),
+            datetime.datetime(year=local_end_date.year,
+                              month=local_end_date.month,
+                              day=local_end_date.day),
+            list(indices),
+            sat,
+            rename_to="Date")
+    except Exception:
+        LOGGER.error(
+            "Fetching space weather data from influxdb failed. "
+            "Possible reasons are:\n"
+            "1. Indluxdb did not start properly\n"
+            "2. Incorrect credentials\n"
+            "3. There was no data for specified time range (Did you "
+            "run fetch for this time range before?)")
+        raise InfluxDBError
+
+    # There may be no data for that period
     for index in indices:
-        try:
-            data[index] = retrieve.fetch_from_influxdb(
-                datetime.datetime(year=local_start_date.year,
-                                  month=local_start_date.month,
-                                  day=local_start_date.day),
-                datetime.datetime(year=local_end_date.year,
-                                  month=local_end_date.month,
-                                  day=local_end_date.day),
-                index,
-                sat,
-                rename_to="Date")
-
-            # There may be no data for that period
-            if data[index] is None:
-                LOGGER.info("No data found for %s in the given interval",
-                            index)
-                del data[index]
-
-        except Exception:
-            LOGGER.error(
-                "Fetching space weather data from influxdb failed. "
-                "Possible reasons are:\n"
-                "1. Indluxdb did not start properly\n"
-                "2. Incorrect credentials\n"
-                "3. There was no data for specified time range (Did you "
-                "run fetch for this time range before?)")
-            raise InfluxDBError
-    return data
+        if index not in data:
+            LOGGER.info("No data found for %s in the given interval", index)
+
+    return {index: data[index] for index in indices if index in data}
 
 
-def store_sw(data, measurement_name, bucket_name):
+def store_sw(data, measurement_name, bucket_name, storage=None,
+             flush=True):
     """
     Store space weather data in influxdb
 
@@ -137,10 +129,19 @@ def store_sw(data, measurement_name, bucket_name):
     :type measurement_name: str
     :param bucket_name: Name of the bucket to store under in idb
     :type bucket_name: str
+    :param storage: Storage session to write with, defaults to the shared
+        session
+    :type storage: polaris.swpc.storage.store.InfluxDBStorage, optional
+    :param flush: Wait until the data is written, defaults to True
+    :type flush: bool, optional
     """
     LOGGER.debug("Storing %s data in Influxdb", measurement_name)
     try:
-        store.dump_to_influxdb(data, measurement_name, bucket_name)
+        store.dump_to_influxdb(data,
+                               measurement_name,
+                               bucket_name,
+                               storage=storage,
+                               flush=flush)
     except Exception:
         LOGGER.error(
             "Error storing data in influxdb. Are you sure the credentials"
@@ -196,8 +197,12 @@ def fetch_or_import_sw(start_date, end_date, cache_dir, sat, **kwargs):
     data = fetch_sw(local_start_date, local_end_date, cache_dir, indices)
     if store_in_influxdb:
         try:
+            # One session for all the indices, written in the background
+            storage = store.get_default_storage()
             for index in data:
-                store_sw(data[index].copy(), index, sat)
+                store_sw(data[index], index, sat, storage, flush=False)
+            if storage.flush():
+                LOGGER.error("Some space weather data could not be stored")
         except InfluxDBError:
             LOGGER.error("Error storing data in influxdb!"
                          " Proceeding WITHOUT storing data")
@@ -9,21 +9,21 @@ import json
 import logging
 import os
 import pathlib
-import subprocess
 import sys
 
 import pandas as pd
+
+from polaris.fetch.combine_csv import combine_csv_files
+from polaris.fetch.decode_cache import (DECODE_CACHE_FILE, DecodeCache,
+                                        DecodeMultipleFailed,
+                                        iter_decode_cache)
+
 # import glouton dependencies
 NORMALIZER_LIB = "contrib.normalizers."
 
 LOGGER = logging.getLogger(__name__)
 
 
-def build_decode_cmd(src, dest, decoder):
-    """Build command to decode downloaded data into JSON."""
-    return f"decode_multiple --filename {src} --format csv {decoder} > {dest}"
-
-
 class NoNormalizerForSatellite(Exception):
     """Raised when we have no normalizer"""
 
@@ -39,10 +39,6 @@ class NoDecodedFramesFile(Exception):
     """
 
 
-class DecodeMultipleFailed(Exception):
-    """Raised when decode_multiple command fails"""
-
-
 class SpecifiedImportFileDoesNotExist(Exception):
     """Raised when a specified file to be imported does not exist."""
 
@@ -102,6 +98,9 @@ def data_fetch(norad_id: int, output_directory: str, start_date: datetime, end_d
     Fetch data of the satellite with the given Norad ID gathered between start_date
     and end_date. Data is retrieved from SatNOGS database using Glouton.
 
+    The CSV files of output_directory not combined yet are appended to a
+    single combined file, which is returned.
+
     :param norad_id: The NORAD ID of the satellite.
     :param output_directory: Directory where the CSV files are stored.
     :param start_date: Start date for fetching data.
@@ -109,90 +108,78 @@ def data_fetch(norad_id: int, output_directory: str, start_date: datetime, end_d
     :returns: Path of the file that contains the fetched data.
     """
 
-    output_dir = pathlib.Path(output_directory)
-
-    all_filenames = list(output_dir.glob("*.csv"))
-
-    if not all_filenames:
-        LOGGER.warning("No CSV files found in the specified directory.")
-        raise FileNotFoundError("No CSV files found to combine.")
-
     try:
-        combined_csv = pd.concat([pd.read_csv(f) for f in all_filenames], ignore_index=True)
-        combined_file_path = output_dir / "combined_csv.csv"
-        combined_csv.to_csv(combined_file_path, index=False, encoding='utf-8-sig')
-
-        LOGGER.info(f"Combined CSV saved at: {combined_file_path}")
-
-        return combined_file_path
-
-    except Exception as e:
-        LOGGER.error(f"Error while combining CSV files: {e}")
+        combined_file_path, _ = combine_csv_files(output_directory)
+    except FileNotFoundError:
+        LOGGER.warning("No CSV files found in the specified directory.")
         raise
 
+    LOGGER.info("Combined CSV saved at: %s", combined_file_path)
+    return pathlib.Path(combined_file_path)
+
 
 def build_decoded_file_path(directory):
-    """Return path to decoded files within directory
+    """Return path to the store of decoded frames within directory
 
     :param directory: full path to directory for decoded frames
 
     :returns: path of the file that contains the decoded data.
     """
-    return os.path.join(directory, "decoded_frames.json")
+    return os.path.join(directory, DECODE_CACHE_FILE)
 
 
 def data_merge_and_decode(
     decoder, output_directory, new_frames_file="", ignore_errors=False
 ):
     """
-    Decode the data found in frames_file using the given decoder. Put it in
-    output_directory.
+    Decode the data found in frames_file using the given decoder. The
+    decoded frames are kept in a store within output_directory, and only
+    the frames missing from it are decoded.
 
     :param decoder: decoder to use
     :param output_directory: where to put output
     :param new_frames_file: file to put new frames in
     :param ignore_errors: ignore errors when decoding frames
 
-    :returns: path of the file that contains the decoded data.
+    :returns: list of decoded frames of new_frames_file, or of the store
+        when there are no new frames.
     """
 
     # Using satnogs-decoders to decode the CSV files containing
     # multiple dataframes and store them as JSON objects.
 
-    decoded_file = build_decoded_file_path(output_directory)
+    decode_cache = DecodeCache(output_directory, decoder)
 
     if new_frames_file == "":
         LOGGER.info("No new frames to decode and merge")
+        if os.path.exists(decode_cache.path):
+            LOGGER.info("Decoded data stored at %s", decode_cache.path)
+            return decode_cache.frames()
     else:
         LOGGER.info("Starting decoding and merging of the new frames")
-        decode_cmd = build_decode_cmd(new_frames_file, decoded_file, decoder)
-        LOGGER.debug("Decode command: %s", decode_cmd)
         try:
-            proc3 = subprocess.Popen(decode_cmd, shell=True, cwd=output_directory)
-            proc3.wait()
-            if proc3.returncode != 0 and ignore_errors is False:
-                LOGGER.error(
-                    " ".join(
-                        [
-                            "decode_multiple cmd error.",
-                            "You can choose to ignore it by passing",
-                            "--ignore_errors flag in cmd",
-                        ]
-                    )
+            decoded_frame_list = decode_cache.decode(new_frames_file,
+                                                     ignore_errors)
+        except DecodeMultipleFailed:
+            LOGGER.error(
+                " ".join(
+                    [
+                        "decode_multiple cmd error.",
+                        "You can choose to ignore it by passing",
+                        "--ignore_errors flag in cmd",
+                    ]
                 )
-                raise DecodeMultipleFailed
-            LOGGER.info("Decoding of data finished.")
-        except subprocess.CalledProcessError as err:
-            LOGGER.error("Error running %s: %s", decode_cmd, err)
-
-    if os.path.exists(decoded_file):
-        LOGGER.info("Decoded data stored at %s", decoded_file)
-        return decoded_file
+            )
+            raise
+        LOGGER.info("Decoding of data finished.")
+        LOGGER.info("Decoded data stored at %s", decode_cache.path)
+        return decoded_frame_list
 
     LOGGER.error(
         " ".join(
             [
-                "There is no file of decoded frames at " + decoded_file + ".",
+                "There is no file of decoded frames at",
+                decode_cache.path + ".",
                 "This can happen if the time range specified had no frames",
                 "to download, and you have not imported frames already.",
                 "You may want to specify a different time range",
@@ -240,8 +227,8 @@ def fetch_or_import(import_file, satellite, start_date, end_date, cache_dir):
 def data_normalize(normalizer, frame_list):
     """Normalize frames and return valid ones."""
     normalized_frames = []
-    for frame_count, frame in enumerate(frame_list, 1):
-        frame_norm = normalizer.normalize(frame)
+    frame_list = normalizer.normalize_frames(frame_list)
+    for frame_count, frame_norm in enumerate(frame_list, 1):
         if normalizer.validate_frame(frame_norm):
             normalized_frames.append(frame_norm)
         else:
@@ -262,11 +249,18 @@ def files_in_current_dir():
 
 
 def load_frames_from_json_file(file):
-    """Load frames from a JSON file.
+    """Load frames from a JSON file, or from a JSON Lines store of decoded
+    frames (.jsonl), read line by line.
 
     :param file: a JSON file
     :returns: a list of frames
     """
+    if os.path.splitext(str(file))[1].lower() == ".jsonl":
+        return [
+            entry["frame"] for entry in iter_decode_cache(file)
+            if entry["frame"] is not None
+        ]
+
     with open(file) as f_handle:
         try:
             # pylint: disable=W0108
@@ -324,10 +318,9 @@ def fetch_normalized_telemetry(
         sys.exit(1)
 
     # decode the frames fetched from glouton
-    decoded_frames_file = data_merge_and_decode(
+    decoded_frame_list = data_merge_and_decode(
         satellite.decoder, cache_dir, new_frames_file, ignore_errors
     )
-    decoded_frame_list = load_frames_from_json_file(decoded_frames_file)
 
     try:
         if skip_normalizer:
@@ -1,4 +1,19 @@
-from polaris.fetch.data_fetch_decoder import _SATELLITES
+"""
+Satellites supported by polaris fetch
+"""
+import json
+import os
+from collections import namedtuple
+
+Satellite = namedtuple('Satellite',
+                       ['norad_id', 'name', 'decoder', 'normalizer'])
+
+SATELLITE_DATA_FILE = 'satellites.json'
+SATELLITE_DATA_DIR = os.path.dirname(__file__)
+_SATELLITES = json.loads(
+    open(os.path.join(SATELLITE_DATA_DIR, SATELLITE_DATA_FILE)).read(),
+    object_hook=lambda d: Satellite(d['norad_id'], d['name'], d['decoder'], d[
+        'normalizer']))
 
 
 def list_satellites():
@@ -0,0 +1,159 @@
+"""Tests for the combination of the raw frame CSV files
+"""
+
+import json
+import logging
+import os
+
+import pytest
+
+from polaris.fetch.combine_csv import (COMBINED_CSV_FILE, build_manifest_path,
+                                       combine_csv_files)
+
+
+def write_source(directory, name, content, mtime_ns=None):
+    """Write a source file, with a given modification time"""
+    path = directory / name
+    path.write_text(content)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+    return path
+
+
+def read_combined(directory):
+    """Content of the combined file"""
+    return (directory / COMBINED_CSV_FILE).read_text()
+
+
+def read_manifest(directory):
+    """Content of the manifest of the combined file"""
+    with open(build_manifest_path(str(directory / COMBINED_CSV_FILE))) as f:
+        return json.load(f)
+
+
+@pytest.fixture(name="sources")
+def fixture_sources(tmp_path):
+    """A directory with two source files already combined"""
+    write_source(tmp_path, "a.csv", "time,a\n1,1\n")
+    write_source(tmp_path, "c.csv", "time,c\n2,2\n")
+    combine_csv_files(str(tmp_path))
+    return tmp_path
+
+
+def test_combine_all_files(sources):
+    """Sources are combined in name order and recorded in the manifest"""
+    assert read_combined(sources) == "time,a\n1,1\ntime,c\n2,2\n"
+    manifest = read_manifest(sources)
+    assert manifest["combined_size"] == len(read_combined(sources))
+    assert list(manifest["sources"]) == ["a.csv", "c.csv"]
+    assert manifest["sources"]["a.csv"]["size"] == len("time,a\n1,1\n")
+
+
+def test_append_only_new_files(sources):
+    """Only the new sources are appended to the combined file"""
+    write_source(sources, "b.csv", "time,b\n3,3\n")
+
+    path, appended = combine_csv_files(str(sources))
+
+    assert path == str(sources / COMBINED_CSV_FILE)
+    assert appended == 1
+    assert read_combined(sources) == ("time,a\n1,1\ntime,c\n2,2\n"
+                                      "time,b\n3,3\n")
+    assert set(read_manifest(sources)["sources"]) == {
+        "a.csv", "b.csv", "c.csv"
+    }
+
+
+def test_never_read_combined_file(sources):
+    """The combined file is not a source, under any name"""
+    assert combine_csv_files(str(sources))[1] == 0
+    assert read_combined(sources) == "time,a\n1,1\ntime,c\n2,2\n"
+
+    _, appended = combine_csv_files(str(sources), combined_name="all.csv")
+    assert appended == 3
+    assert (sources / "all.csv").read_text() == (
+        "time,a\n1,1\ntime,c\n2,2\n" + read_combined(sources))
+    assert combine_csv_files(str(sources), combined_name="all.csv")[1] == 0
+
+
+def test_rebuild_when_source_modified(sources):
+    """A modified source makes the combined file be rebuilt"""
+    state = read_manifest(sources)["sources"]["a.csv"]
+    write_source(sources, "a.csv", "time,a\n9,9\n", state["mtime_ns"] + 1)
+
+    assert combine_csv_files(str(sources))[1] == 2
+    assert read_combined(sources) == "time,a\n9,9\ntime,c\n2,2\n"
+
+
+def test_rebuild_when_source_removed(sources):
+    """A removed source makes the combined file be rebuilt without it"""
+    os.remove(sources / "a.csv")
+
+    assert combine_csv_files(str(sources))[1] == 1
+    assert read_combined(sources) == "time,c\n2,2\n"
+    assert list(read_manifest(sources)["sources"]) == ["c.csv"]
+
+
+def test_truncate_combined_file_longer_than_manifest(sources, caplog):
+    """The end of the combined file not in the manifest is dropped"""
+    with open(sources / COMBINED_CSV_FILE, "a") as f_handle:
+        f_handle.write("time,b\n3,")
+    write_source(sources, "b.csv", "time,b\n3,3\n")
+
+    with caplog.at_level(logging.WARNING):
+        assert combine_csv_files(str(sources))[1] == 1
+    assert "Dropping the end" in caplog.text
+    assert read_combined(sources) == ("time,a\n1,1\ntime,c\n2,2\n"
+                                      "time,b\n3,3\n")
+
+
+def test_rebuild_when_combined_file_shorter_than_manifest(sources):
+    """A combined file missing content is rebuilt"""
+    with open(sources / COMBINED_CSV_FILE, "r+b") as f_handle:
+        f_handle.truncate(4)
+
+    assert combine_csv_files(str(sources))[1] == 2
+    assert read_combined(sources) == "time,a\n1,1\ntime,c\n2,2\n"
+
+
+@pytest.mark.parametrize("manifest", ["{not json", '{"sources": {}}', "[]"])
+def test_rebuild_with_invalid_manifest(sources, manifest, caplog):
+    """An invalid manifest is ignored and the combined file rebuilt"""
+    with open(build_manifest_path(str(sources / COMBINED_CSV_FILE)),
+              "w") as f_handle:
+        f_handle.write(manifest)
+
+    with caplog.at_level(logging.WARNING):
+        assert combine_csv_files(str(sources))[1] == 2
+    assert "Ignoring invalid manifest" in caplog.text
+    assert read_combined(sources) == "time,a\n1,1\ntime,c\n2,2\n"
+    assert read_manifest(sources)["combined_size"] == len(
+        read_combined(sources))
+
+
+def test_rebuild_with_missing_manifest(sources):
+    """Without a manifest, the combined file is rebuilt"""
+    os.remove(build_manifest_path(str(sources / COMBINED_CSV_FILE)))
+
+    assert combine_csv_files(str(sources))[1] == 2
+    assert read_combined(sources) == "time,a\n1,1\ntime,c\n2,2\n"
+
+
+def test_source_without_trailing_newline(tmp_path):
+    """A newline ends every source in the combined file"""
+    write_source(tmp_path, "a.csv", "time,a\n1,1")
+    write_source(tmp_path, "b.csv", "time,b\n2,2\n")
+
+    combine_csv_files(str(tmp_path))
+
+    assert read_combined(tmp_path) == "time,a\n1,1\ntime,b\n2,2\n"
+    manifest = read_manifest(tmp_path)
+    assert manifest["combined_size"] == len(read_combined(tmp_path))
+    assert manifest["sources"]["a.csv"]["size"] == len("time,a\n1,1")
+
+
+def test_no_csv_files(tmp_path):
+    """A directory without CSV files cannot be combined"""
+    (tmp_path / "frames.json").write_text("{}")
+    with pytest.raises(FileNotFoundError):
+        combine_csv_files(str(tmp_path))
@@ -0,0 +1,118 @@
+"""Tests for the combination of telemetry and space weather frames
+"""
+
+import copy
+import logging
+
+from polaris.fetch.data_fetch_decoder import combine_frames
+
+
+def build_frame(time, **fields):
+    """Frame with values given by field name"""
+    return {
+        "time": time,
+        "fields": {
+            key: {
+                "value": value,
+                "unit": None
+            }
+            for key, value in fields.items()
+        }
+    }
+
+
+def values(frame):
+    """Values of the fields of a frame"""
+    return {key: field["value"] for key, field in frame["fields"].items()}
+
+
+def build_dgd_frames():
+    """Daily geomagnetic data, not in time order"""
+    return [
+        build_frame("2020-01-02 00:00:00", kp=2),
+        build_frame("2020-01-01 00:00:00", kp=1),
+        build_frame("2020-01-03 00:00:00", kp=3),
+    ]
+
+
+def test_unsorted_telemetry():
+    """Every frame gets the last space weather data at or before its time,
+    whatever the order of the frames"""
+    frames = [
+        build_frame("2020-01-03 12:00:00", battery=3),
+        build_frame("2020-01-01 00:00:00", battery=1),
+        build_frame("2020-01-02 23:59:59", battery=2),
+        build_frame("2020-01-02 00:00:00", battery=4),
+    ]
+
+    combined = combine_frames(frames, {"DGD": build_dgd_frames()})
+
+    assert combined is frames
+    assert [values(frame) for frame in combined] == [
+        {"battery": 3, "kp": 3},
+        {"battery": 1, "kp": 1},
+        {"battery": 2, "kp": 2},
+        {"battery": 4, "kp": 2},
+    ]
+
+
+def test_telemetry_older_than_space_weather(caplog):
+    """Frames older than all the space weather data are left untouched"""
+    frames = [
+        build_frame("2019-12-31 23:59:59", battery=1),
+        build_frame("2020-01-01 06:00:00", battery=2),
+        build_frame("2019-06-01 00:00:00", battery=3),
+    ]
+
+    with caplog.at_level(logging.WARNING):
+        combined = combine_frames(frames, {"DGD": build_dgd_frames()})
+
+    assert [values(frame) for frame in combined] == [
+        {"battery": 1},
+        {"battery": 2, "kp": 1},
+        {"battery": 3},
+    ]
+    assert "2 frames are older than all the DGD data" in caplog.text
+
+
+def test_no_space_weather_frames(caplog):
+    """Frames are left untouched without space weather data"""
+    frames = [build_frame("2020-01-02 00:00:00", battery=1)]
+    expected = copy.deepcopy(frames)
+
+    assert combine_frames(frames, {}) == expected
+    with caplog.at_level(logging.WARNING):
+        assert combine_frames(frames, {"DGD": []}) == expected
+    assert "No space weather frames for DGD" in caplog.text
+
+
+def test_no_telemetry_frames():
+    """No frames give no frames"""
+    assert combine_frames([], {"DGD": build_dgd_frames()}) == []
+
+
+def test_several_indices():
+    """Every index is joined on its own times"""
+    frames = [
+        build_frame("2020-01-01 12:00:00", battery=1),
+        build_frame("2020-01-02 12:00:00", battery=2),
+        build_frame("2020-01-03 12:00:00", battery=3),
+    ]
+    sw_frames = {
+        "DGD": build_dgd_frames(),
+        "DPD": [
+            build_frame("2020-01-02 06:00:00", proton_flux=20),
+            build_frame("2020-01-01 18:00:00", proton_flux=10),
+        ],
+        "DSD": [
+            build_frame("2020-01-01 00:00:00", radio_flux=70),
+        ],
+    }
+
+    combined = combine_frames(frames, sw_frames)
+
+    assert [values(frame) for frame in combined] == [
+        {"battery": 1, "kp": 1, "radio_flux": 70},
+        {"battery": 2, "kp": 2, "proton_flux": 20, "radio_flux": 70},
+        {"battery": 3, "kp": 3, "proton_flux": 20, "radio_flux": 70},
+    ]
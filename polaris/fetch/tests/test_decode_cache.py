@@ -0,0 +1,94 @@
+"""Tests for the cache of decoded frames
+"""
+
+import csv
+import json
+import subprocess
+
+import pytest
+
+from polaris.fetch import decode_cache
+from polaris.fetch.decode_cache import DecodeCache, iter_decode_cache
+
+# Frames decode_multiple cannot decode start with this byte
+UNDECODABLE = "ff"
+
+
+@pytest.fixture(name="decoder_inputs")
+def fixture_decoder_inputs(monkeypatch):
+    """Replace decode_multiple by a decoder echoing the first byte of the
+    frames, and collect the frames given to it"""
+    inputs = []
+
+    def run(args, **kwargs):
+        # pylint: disable=unused-argument
+        src = args[args.index("--filename") + 1]
+        decoded = []
+        with open(src, encoding="utf-8", newline="") as f_handle:
+            rows = list(csv.reader(f_handle, delimiter="|"))
+        inputs.append([row[1] for row in rows])
+        for timestamp, frame in rows:
+            if frame.startswith(UNDECODABLE):
+                continue
+            decoded.append({
+                "time": timestamp,
+                "fields": {
+                    "byte": {
+                        "value": int(frame[:2], 16)
+                    }
+                }
+            })
+        return subprocess.CompletedProcess(args, 0,
+                                           json.dumps(decoded).encode())
+
+    monkeypatch.setattr(decode_cache.subprocess, "run", run)
+    return inputs
+
+
+def write_raw_frames(path, rows):
+    """Write "timestamp|frame" rows"""
+    path.write_text("".join("{}|{}\n".format(*row) for row in rows))
+    return str(path)
+
+
+def test_decode_frames_sharing_a_timestamp(tmp_path, decoder_inputs):
+    """Frames received in the same second keep their own decoded frame,
+    after an undecodable frame with the same timestamp"""
+    rows = [
+        ("2020-01-01 00:00:00", UNDECODABLE + "00"),
+        ("2020-01-01 00:00:00", "0a00"),
+        ("2020-01-01 00:00:00", "0b00"),
+        ("2020-01-01 00:00:01", "0c00"),
+    ]
+    raw_file = write_raw_frames(tmp_path / "raw.csv", rows)
+
+    frames = DecodeCache(str(tmp_path), "dummy").decode(raw_file)
+    assert [(frame["time"], frame["fields"]["byte"]["value"])
+            for frame in frames] == [("2020-01-01 00:00:00", 10),
+                                     ("2020-01-01 00:00:00", 11),
+                                     ("2020-01-01 00:00:01", 12)]
+
+    # Stored frames match their raw frames in a new cache too
+    cache = DecodeCache(str(tmp_path), "dummy")
+    assert cache.decode(raw_file) == frames
+    assert len(decoder_inputs) == 1
+    entries = list(iter_decode_cache(cache.path))
+    assert [entry["frame"] is None for entry in entries] == [
+        True, False, False, False
+    ]
+
+
+def test_decode_only_new_frames(tmp_path, decoder_inputs):
+    """Frames already in the cache are not decoded again"""
+    first = write_raw_frames(tmp_path / "first.csv",
+                             [("2020-01-01 00:00:00", "0100")])
+    second = write_raw_frames(tmp_path / "second.csv",
+                              [("2020-01-01 00:00:00", "0100"),
+                               ("2020-01-01 00:00:02", "0200")])
+
+    cache = DecodeCache(str(tmp_path), "dummy")
+    cache.decode(first)
+    frames = cache.decode(second)
+
+    assert decoder_inputs == [["0100"], ["0200"]]
+    assert [frame["fields"]["byte"]["value"] for frame in frames] == [1, 2]
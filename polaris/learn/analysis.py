@@ -6,6 +6,7 @@ import logging
 from fets.math import TSIntegrale
 from mlflow import set_experiment
 
+from polaris.data.columnar import dataset_to_columns
 from polaris.data.graph import PolarisGraph
 from polaris.data.readers import read_polaris_data
 from polaris.dataset.metadata import PolarisMetadata
@@ -55,7 +56,9 @@ def cross_correlate(input_file,
                     graph_link_threshold=0.1,
                     use_gridsearch=False,
                     csv_sep=',',
-                    force_cpu=False):
+                    force_cpu=False,
+                    dataset=None,
+                    data=None):
     """
     Catch linear and non-linear correlations between all columns of the
     input data.
@@ -83,11 +86,23 @@ def cross_correlate(input_file,
         :type csv_sep: str, optional
         :param force_cpu: Force CPU for cross corelation, defaults to False
         :type force_cpu: bool, optional
+        :param dataset: Dataset already in memory, used instead of reading
+            input_file, defaults to None
+        :type dataset: PolarisDataset, optional
+        :param data: Metadata and dataframe of input_file already read,
+            used instead of reading it, defaults to None
+        :type data: tuple, optional
         :raises NoFramesInInputFile: If there are no frames in the converted
             dataframe
     """
-    # Reading input file - index is considered on first column
-    metadata, dataframe = read_polaris_data(input_file, csv_sep)
+    if data is not None:
+        metadata, dataframe = data
+    elif dataset is not None:
+        metadata = PolarisMetadata(dataset.metadata)
+        dataframe, _ = dataset_to_columns(dataset)
+    else:
+        # Reading input file - index is considered on first column
+        metadata, dataframe = read_polaris_data(input_file, csv_sep)
 
     if dataframe.empty:
         LOGGER.error("Empty list of frames -- nothing to learn from!")
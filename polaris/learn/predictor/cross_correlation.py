@@ -1,5 +1,7 @@
 import logging
+import os
 import warnings
+from concurrent.futures import ProcessPoolExecutor
 
 import enlighten
 import numpy as np
@@ -19,6 +21,76 @@ warnings.simplefilter(action='ignore', category=FutureWarning)
 # Remove this line when feature engineering is in place
 np.seterr(divide='ignore', invalid='ignore')
 
+# Cleaned dataset shared by the worker processes of a parallel fit. It is
+# set once per worker by the pool initializer instead of being pickled
+# along with every target.
+_WORKER_DATASET = None
+
+
+def _init_fit_worker(dataset):
+    """ Store the dataset in the worker process
+
+        :param dataset: The cleaned dataset to fit targets from
+        :type dataset: pd.DataFrame
+    """
+    global _WORKER_DATASET  # pylint: disable-msg=global-statement
+    _WORKER_DATASET = dataset
+
+
+def _fit_target_in_worker(column, model_params, random_state):
+    """ Fit the regressor of one target from the worker dataset
+
+        :param column: Name of the target column
+        :type column: str
+        :param model_params: Parameters for the XGB model
+        :type model_params: dict
+        :param random_state: Seed used to split train and test data
+        :type random_state: int
+        :return: The fitted XGBRegressor and its RMSE on test data
+        :rtype: tuple
+    """
+    return fit_regressor(_WORKER_DATASET.drop([column], axis=1),
+                         _WORKER_DATASET[column], model_params,
+                         random_state)
+
+
+def fit_regressor(df_in, target_series, model_params, random_state):
+    """ Fit a XGBRegressor predicting target_series from df_in
+
+        :param df_in: Input dataframe representing the context, predictors
+        :type df_in: pd.DataFrame
+        :param target_series: pandas series of the target variable. Share
+            the same indexes as the df_in dataframe
+        :type target_series: pd.Series
+        :param model_params: Parameters for the XGB model
+        :type model_params: dict
+        :param random_state: Seed used to split train and test data
+        :type random_state: int
+        :return: The fitted XGBRegressor and its root mean square error on
+            test data, None if it could not be computed
+        :rtype: tuple
+    """
+    # Split df_in and target to train and test dataset
+    df_in_train, df_in_test, target_train, target_test = train_test_split(
+        df_in, target_series, test_size=0.2, random_state=random_state)
+
+    # Create and train a XGBoost regressor
+    regr_m = XGBRegressor(**model_params)
+    regr_m.fit(df_in_train, target_train)
+
+    # Make predictions
+    target_series_predict = regr_m.predict(df_in_test)
+
+    try:
+        rmse = np.sqrt(mean_squared_error(target_test, target_series_predict))
+    except Exception:  # pylint: disable-msg=broad-except
+        # Because of large (close to infinite values) or nans
+        LOGGER.debug('Expected %s, Predicted %s', str(target_test),
+                     str(target_series_predict))
+        rmse = None
+
+    return regr_m, rmse
+
 
 class XCorr(BaseEstimator, TransformerMixin):
     """ Cross Correlation predictor class
@@ -33,7 +105,11 @@ class XCorr(BaseEstimator, TransformerMixin):
             :type cross_correlation_params: CrossCorrelationParameters
         """
         self.models = None
-        self._importances_map = None
+        # The importances map is kept as a square matrix indexed by the
+        # position of the columns, a row is filled for each fitted target.
+        self._importances = None
+        self._importances_columns = None
+        self._importances_filled = None
         self._feature_cleaner = Cleaner(
             dataset_metadata, cross_correlation_params.dataset_cleaning_params)
         self.xcorr_params = {
@@ -42,7 +118,10 @@ class XCorr(BaseEstimator, TransformerMixin):
             "gridsearch_scoring": cross_correlation_params.gridsearch_scoring,
             "gridsearch_n_splits":
                 cross_correlation_params.gridsearch_n_splits,
+            "n_workers": cross_correlation_params.n_workers,
         }
+        if self.xcorr_params['n_workers'] == -1:
+            self.xcorr_params['n_workers'] = os.cpu_count()
         # If we're importing from CSV, the dataset_metadata may not
         # have the feature_columns key.
         try:
@@ -57,6 +136,10 @@ class XCorr(BaseEstimator, TransformerMixin):
         if cross_correlation_params.use_gridsearch:
             self.method = self.gridsearch
             self.mlf_logging = self.gridsearch_mlf_logging
+            if self.xcorr_params['n_workers'] > 1:
+                # GridSearchCV already spreads its fits on all CPUs
+                LOGGER.info("Gridsearch is used, fitting targets serially")
+                self.xcorr_params['n_workers'] = 1
         else:
             self.method = self.regression
             self.mlf_logging = self.regression_mlf_logging
@@ -71,13 +154,38 @@ class XCorr(BaseEstimator, TransformerMixin):
         """
         Return the importances_map value as Pandas Dataframe.
 
+        Only the rows of the fitted targets are returned, in the order of
+        the columns.
+
         """
+        if self._importances is None:
+            return None
+
+        filled = self._importances_filled
+        if filled.all():
+            return pd.DataFrame(self._importances,
+                                index=self._importances_columns,
+                                columns=self._importances_columns,
+                                copy=False)
 
-        return self._importances_map
+        return pd.DataFrame(self._importances[filled],
+                            index=self._importances_columns[filled],
+                            columns=self._importances_columns,
+                            copy=False)
 
     @importances_map.setter
     def importances_map(self, importances_map):
-        self._importances_map = importances_map
+        if importances_map is None:
+            self._importances = None
+            self._importances_columns = None
+            self._importances_filled = None
+            return
+
+        columns = importances_map.columns
+        self._importances = importances_map.reindex(index=columns).to_numpy(
+            dtype=np.float32)
+        self._importances_columns = columns
+        self._importances_filled = columns.isin(importances_map.index)
 
     def fit(self, X):
         """ Train on a dataframe
@@ -113,24 +221,101 @@ class XCorr(BaseEstimator, TransformerMixin):
 
         with start_run(run_name='cross_correlate', nested=True):
             self.mlf_logging()
+            if self.xcorr_params['n_workers'] > 1:
+                self._parallel_fit(X, parameters, pbar)
+                return
+
             for column in parameters:
                 LOGGER.info(column)
                 try:
-                    self.models.append(
-                        self.method(X.drop([column], axis=1), X[column],
-                                    self.model_params['current']))
+                    regr_m = self.method(X.drop([column], axis=1), X[column],
+                                         self.model_params['current'])
                 except Exception as err:  # pylint: disable-msg=broad-except
-                    if self.model_params['current'].get(
-                        "predictor") == "gpu_predictor":
-                        LOGGER.info(" ".join([
-                            "Encountered error using GPU.",
-                            "Trying with CPU parameters now!"
-                        ]))
-                        self.model_params['current'] = self.model_params['cpu']
-                    else:
-                        raise err
+                    self._fall_back_to_cpu(err)
+                    # The failed target is fitted again, like the next ones
+                    regr_m = self.method(X.drop([column], axis=1), X[column],
+                                         self.model_params['current'])
+                self.models.append(regr_m)
                 pbar.update()
 
+    def _fall_back_to_cpu(self, err):
+        """ Use the CPU parameters for the next fits after a GPU error
+
+            :param err: Error raised by a fit
+            :type err: Exception
+            :raises Exception: err, if the fit was not using the GPU
+        """
+        if self.model_params['current'].get("predictor") != "gpu_predictor":
+            raise err
+        LOGGER.info(" ".join(
+            ["Encountered error using GPU.", "Trying with CPU parameters now!"]))
+        self.model_params['current'] = self.model_params['cpu']
+
+    def _parallel_fit(self, X, parameters, pbar):
+        """ Fit one regressor per target column in a pool of processes
+
+            Results are collected in the order of parameters, so that
+            the importances map is the same as with a serial fit. After a
+            GPU error, the pending fits are cancelled and the failed target
+            and the next ones are fitted with the CPU parameters.
+
+            :param X: The cleaned dataset
+            :type X: pd.DataFrame
+            :param parameters: Names of the columns to predict
+            :type parameters: list
+            :param pbar: Progress bar updated after every target
+            :type pbar: enlighten.Counter
+        """
+        n_workers = self.xcorr_params['n_workers']
+        random_state = self.xcorr_params['random_state']
+        LOGGER.info("Fitting %d targets with %d workers", len(parameters),
+                    n_workers)
+
+        with ProcessPoolExecutor(max_workers=n_workers,
+                                 initializer=_init_fit_worker,
+                                 initargs=(X, )) as executor:
+
+            def submit(columns):
+                model_params = self._worker_model_params(
+                    self.model_params['current'])
+                return [
+                    executor.submit(_fit_target_in_worker, column,
+                                    model_params, random_state)
+                    for column in columns
+                ]
+
+            futures = submit(parameters)
+            for position, column in enumerate(parameters):
+                LOGGER.info(column)
+                try:
+                    regr_m, rmse = futures[position].result()
+                except Exception as err:  # pylint: disable-msg=broad-except
+                    self._fall_back_to_cpu(err)
+                    for future in futures[position:]:
+                        future.cancel()
+                    futures[position:] = submit(parameters[position:])
+                    regr_m, rmse = futures[position].result()
+
+                self._log_rmse(column, rmse)
+                self._add_importances(column, X.columns.drop(column),
+                                      regr_m.feature_importances_)
+                self.models.append(regr_m)
+                pbar.update()
+
+    def _worker_model_params(self, model_params):
+        """ Share the CPUs between the workers of a parallel fit
+
+            :param model_params: Parameters for the XGB model
+            :type model_params: dict
+            :return: The parameters with n_jobs set for a single worker
+            :rtype: dict
+        """
+        if model_params.get("n_jobs", -1) != -1:
+            return model_params
+
+        n_jobs = max(1, os.cpu_count() // self.xcorr_params['n_workers'])
+        return {**model_params, "n_jobs": n_jobs}
+
     def transform(self):
         """ Unused method in this predictor """
         return self
@@ -149,52 +334,52 @@ class XCorr(BaseEstimator, TransformerMixin):
             :return: A fitted XGBRegressor
             :rtype: XGBRegressor
         """
-        # Split df_in and target to train and test dataset
-        df_in_train, df_in_test, target_train, target_test = train_test_split(
-            df_in,
-            target_series,
-            test_size=0.2,
-            random_state=self.xcorr_params['random_state'])
+        regr_m, rmse = fit_regressor(df_in, target_series, model_params,
+                                     self.xcorr_params['random_state'])
+        self._log_rmse(target_series.name, rmse)
+        self._add_importances(target_series.name, df_in.columns,
+                              regr_m.feature_importances_)
+        return regr_m
 
-        # Create and train a XGBoost regressor
-        regr_m = XGBRegressor(**model_params)
-        regr_m.fit(df_in_train, target_train)
+    @staticmethod
+    def _log_rmse(target, rmse):
+        """ Log the root mean square error of a target model
 
-        # Make predictions
-        target_series_predict = regr_m.predict(df_in_test)
+            :param target: Name of the target column
+            :type target: str
+            :param rmse: Root mean square error, None if it could not
+                be computed
+            :type rmse: float
+        """
+        if rmse is None:
+            LOGGER.error('Cannot find RMS Error for %s', target)
+            return
+
+        log_metric(target, rmse)
+        LOGGER.info('Making predictions for : %s', target)
+        LOGGER.info('Root Mean Square Error : %s', str(rmse))
+
+    def _add_importances(self, target, columns, feature_importances):
+        """ Retain the feature importances of a target in the
+            dependency matrix
+
+            :param target: Name of the target column
+            :type target: str
+            :param columns: Names of the features used to predict target
+            :type columns: pd.Index or array-like
+            :param feature_importances: Importances of the features,
+                in the same order as columns
+            :type feature_importances: np.ndarray
+        """
+        if self._importances is None:
+            return
 
-        try:
-            rmse = np.sqrt(
-                mean_squared_error(target_test, target_series_predict))
-            log_metric(target_series.name, rmse)
-            LOGGER.info('Making predictions for : %s', target_series.name)
-            LOGGER.info('Root Mean Square Error : %s', str(rmse))
-        except Exception:  # pylint: disable-msg=broad-except
-            # Because of large (close to infinite values) or nans
-            LOGGER.error('Cannot find RMS Error for %s', target_series.name)
-            LOGGER.debug('Expected %s, Predicted %s', str(target_test),
-                         str(target_series_predict))
-
-        # indices = np.argsort(regr_m.feature_importances_)[::-1]
-        # After the model is trained
-        new_row = {}
-        for column, feat_imp in zip(df_in.columns,
-                                    regr_m.feature_importances_):
-            new_row[column] = [feat_imp]
-
-        # Current target is not in df_in, so manually adding it
-        new_row[target_series.name] = [0.0]
-
-        # Sorting new_row to avoid concatenation warnings
-        new_row = dict(sorted(new_row.items()))
-
-        # Concatenating new information about feature importances
-        if self._importances_map is not None:
-            self._importances_map = pd.concat([
-                self._importances_map,
-                pd.DataFrame(index=[target_series.name], data=new_row)
-            ])
-        return regr_m
+        row = self._importances_columns.get_loc(target)
+        positions = self._importances_columns.get_indexer(columns)
+        self._importances[row, positions] = feature_importances
+        # Current target is not in the features, so manually adding it
+        self._importances[row, row] = 0.0
+        self._importances_filled[row] = True
 
     def gridsearch(self, df_in, target_series, params):
         """ Apply grid search to fine-tune XGBoost hyperparameters
@@ -247,8 +432,12 @@ class XCorr(BaseEstimator, TransformerMixin):
         :param columns: List of column names for the importance map
         :rtype columns: pd.Index or array-like
         """
-        if self._importances_map is None:
-            self._importances_map = pd.DataFrame(data={}, columns=columns)
+        if self._importances is None:
+            columns = pd.Index(columns)
+            self._importances = np.zeros((len(columns), len(columns)),
+                                         dtype=np.float32)
+            self._importances_columns = columns
+            self._importances_filled = np.zeros(len(columns), dtype=bool)
 
     def common_mlf_logging(self):
         """ Log the parameters used for gridsearch and regression
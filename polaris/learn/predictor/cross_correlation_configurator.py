@@ -88,6 +88,9 @@ class CrossCorrelationConfigurator():
         # it should be reviewed in the future to adapt to
         # the targeted satellite.
         self._cross_correlation_parameters.gridsearch_n_splits = 18
+        # Targets are fitted one after the other unless more workers
+        # are explicitly requested.
+        self._cross_correlation_parameters.n_workers = 1
 
     def _set_default_xcorr_model_cpu_parameters(self):
         """ Set default XCorr parameters (for CPU) if no XCorr
@@ -200,7 +203,8 @@ class CrossCorrelationConfigurator():
     def _set_custom_configuration(self, use_gridsearch, random_state,
                                   test_size, gridsearch_scoring,
                                   gridsearch_n_splits, model_params,
-                                  model_cpu_params, dataset_cleaning_params):
+                                  model_cpu_params, dataset_cleaning_params,
+                                  n_workers=1):
         """ Set all the cross_correlation_parameters properties.
 
             :param use_gridsearch: Use grid search for the cross correlation
@@ -223,6 +227,9 @@ class CrossCorrelationConfigurator():
             :type model_cpu_params: dict
             :param dataset_cleaning_params: Dataset feature cleaning parameters
             :type dataset_cleaning_params: CleanerParameters
+            :param n_workers: Number of processes fitting the targets in
+                parallel, -1 to use all CPUs. Defaults to 1 (serial fit)
+            :type n_workers: int, optional
             :raises TypeError: If model_params is not a Python dictionary
                 or if there is one value in model_params that is not a
                 Python list
@@ -234,6 +241,7 @@ class CrossCorrelationConfigurator():
             gridsearch_scoring
         self._cross_correlation_parameters.gridsearch_n_splits = \
             gridsearch_n_splits
+        self._cross_correlation_parameters.n_workers = n_workers
         if not isinstance(model_params, dict):
             raise TypeError("Expected {} got {}".format(
                 dict, type(model_params)))
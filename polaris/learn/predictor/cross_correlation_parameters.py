@@ -115,3 +115,16 @@ class CrossCorrelationParameters():
     @dataset_cleaning_params.setter
     def dataset_cleaning_params(self, dataset_cleaning_params):
         self._dataset_cleaning_params = dataset_cleaning_params
+
+    @property
+    def n_workers(self):
+        """
+        Return the n_workers value as Integer.
+
+        """
+
+        return self._n_workers
+
+    @n_workers.setter
+    def n_workers(self, n_workers):
+        self._n_workers = n_workers
@@ -0,0 +1,83 @@
+"""Tests for the cross correlation predictor
+"""
+
+import contextlib
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from polaris.feature.cleaner_configurator import CleanerConfigurator
+from polaris.learn.predictor import cross_correlation
+from polaris.learn.predictor.cross_correlation import XCorr
+from polaris.learn.predictor.cross_correlation_parameters import \
+    CrossCorrelationParameters
+
+CPU_PARAMS = {
+    "objective": "reg:squarederror",
+    "n_estimators": 10,
+    "learning_rate": 0.1,
+    "n_jobs": 1,
+    "predictor": "cpu_predictor",
+    "tree_method": "auto",
+    "max_depth": 3
+}
+
+# Parameters failing like a fit on a missing GPU
+GPU_PARAMS = {
+    **CPU_PARAMS, "predictor": "gpu_predictor",
+    "tree_method": "missing_gpu"
+}
+
+
+@pytest.fixture(autouse=True)
+def fixture_no_mlflow_logging(monkeypatch):
+    """Fit without logging to an MLflow tracking server"""
+    monkeypatch.setattr(cross_correlation, "start_run",
+                        lambda **kwargs: contextlib.nullcontext())
+    for name in ("log_metric", "log_param", "log_params"):
+        monkeypatch.setattr(cross_correlation, name, lambda *args: None)
+
+
+def build_dataset():
+    """Columns depending on each other, with some noise"""
+    rng = np.random.default_rng(0)
+    first = rng.normal(size=200)
+    second = rng.normal(size=200)
+    return pd.DataFrame({
+        "a": first,
+        "b": 2 * first + rng.normal(scale=0.1, size=200),
+        "c": second,
+        "d": first - second,
+    })
+
+
+def fit_importances(n_workers, model_params):
+    """Fit the dataset, returning the importances map and the parameters
+    used at the end of the fit"""
+    params = CrossCorrelationParameters()
+    params.use_gridsearch = False
+    params.random_state = 42
+    params.test_size = 0.2
+    params.gridsearch_scoring = "neg_mean_squared_error"
+    params.gridsearch_n_splits = 2
+    params.n_workers = n_workers
+    params.model_params = dict(model_params)
+    params.model_cpu_params = dict(CPU_PARAMS)
+    params.dataset_cleaning_params = CleanerConfigurator().get_configuration()
+
+    xcorr = XCorr({}, params)
+    xcorr.fit(build_dataset())
+    return xcorr.importances_map, xcorr.model_params["current"]
+
+
+@pytest.mark.parametrize("model_params", [CPU_PARAMS, GPU_PARAMS])
+def test_parallel_fit_matches_serial_fit(model_params):
+    """Serial and parallel fits fill the same importances map, falling
+    back to the CPU parameters the same way"""
+    serial, serial_params = fit_importances(1, model_params)
+    parallel, parallel_params = fit_importances(2, model_params)
+
+    assert list(serial.index) == ["a", "b", "c", "d"]
+    pd.testing.assert_frame_equal(serial, parallel)
+    assert serial_params == parallel_params == CPU_PARAMS
@@ -8,13 +8,10 @@ from os.path import isfile, splitext
 import click
 
 from polaris import __version__
-from polaris.anomaly.behave import behave
-from polaris.batch.batch import batch
-from polaris.convert.gexf import GEXFConverter
-from polaris.fetch.data_fetch_decoder import data_fetch_decode_normalize
-from polaris.fetch.list_satellites import list_satellites
-from polaris.learn.analysis import cross_correlate, feature_extraction
-from polaris.reports.server import launch_report_webserver
+
+# The backend of each command (TensorFlow, XGBoost, mlflow, pandas...) is
+# imported by the command itself, so that the other commands and --help
+# do not pay for its import.
 
 # Logger configuration
 
@@ -71,11 +68,13 @@ def cli():
               is_flag=False,
               help='Import data frames downloaded from db.satnogs.org.')
 @click.option('--existing-output-file-strategy',
-              type=click.Choice(['merge', 'overwrite', 'error']),
+              type=click.Choice(['merge', 'overwrite', 'append', 'error']),
               default='merge',
               show_default=True,
               help='How to handle already-existing output file: ' +
-                   'merge with it, overwrite it, or exit with an error.')
+                   'merge with it, overwrite it, append only the new ' +
+                   'frames to it (stored as a directory of segments), ' +
+                   'or exit with an error.')
 @click.option('--fetch_from_influxdb',
               is_flag=True,
               help='Fetch space weather data from influxdb')
@@ -104,9 +103,13 @@ def cli_fetch(sat, start_date, end_date, output_file, cache_dir, import_file,
 
     Retrieve and decode the telemetry corresponding to
     SAT (satellite name or NORAD ID) and stores in
-    OUTPUT_FILE (path to the output folder)
+    OUTPUT_FILE (path to the output file). The file is written as JSON,
+    or in a binary columnar format if its extension is .arrow, .feather
+    or .parquet.
     """
+    # pylint: disable=import-outside-toplevel
     if list_supported_satellites:
+        from polaris.fetch.list_satellites import list_satellites
         list_satellites()
     else:
 
@@ -121,6 +124,8 @@ Error: Missing argument '{message}'."""
             LOGGER.error(argument_error_message('OUTPUT_FILE'))
 
         else:
+            from polaris.fetch.data_fetch_decoder import \
+                data_fetch_decode_normalize
             data_fetch_decode_normalize(
                 sat, start_date, end_date, output_file, cache_dir, import_file,
                 existing_output_file_strategy, skip_normalizer, ignore_errors,
@@ -173,8 +178,12 @@ def cli_learn(input_file,
     """ Analyze telemetry data
 
     Apply machine learning and feature engineering
-    to analyze data from INPUT_FILE (path to input json or CSV file)
+    to analyze data from INPUT_FILE (path to input json, CSV, Arrow or
+    Parquet file)
     """
+    # pylint: disable=import-outside-toplevel
+    from polaris.learn.analysis import cross_correlate, feature_extraction
+
     if col is not None:
         feature_extraction(input_file, col)
     elif output_graph_file is not None:
@@ -196,20 +205,36 @@ def cli_learn(input_file,
 @click.option('--config_file',
               is_flag=False,
               required=False,
-              default='polaris_config.json',
+              multiple=True,
+              default=['polaris_config.json'],
               type=click.Path(resolve_path=True),
-              help='Config file for polaris batch.')
+              help='Config file for polaris batch, or directory of config '
+                   'files. Can be repeated to run several satellites.')
 @click.option('--dry-run/--no-dry-run',
               required=False,
               default=False,
               help='Show what would be run in batch mode')
-def cli_batch(config_file, dry_run):
+@click.option('--fetch_workers',
+              default=4,
+              show_default=True,
+              help='Number of satellites fetched at once')
+@click.option('--learn_workers',
+              default=1,
+              show_default=True,
+              help='Number of satellites learnt or analyzed by behave '
+                   'at once')
+def cli_batch(config_file, dry_run, fetch_workers, learn_workers):
     """ Run polaris from batch: runs polaris commands non-interactively
 
-        :param config_file: path to configuration file
+        :param config_file: paths to configuration files or directories
         :param dry_run: Bool for dry run mode
+        :param fetch_workers: number of satellites fetched at once
+        :param learn_workers: number of satellites learnt at once
     """
-    batch(config_file, dry_run)
+    # pylint: disable=import-outside-toplevel
+    from polaris.batch.batch import batch
+
+    batch(list(config_file), dry_run, fetch_workers, learn_workers)
 
 
 @click.command('convert',
@@ -224,6 +249,8 @@ def cli_convert(input_file, output_file):
         :param input_file: Path to the graph file generated by polaris learn
         :param output_file: Path for the output file
     """
+    # pylint: disable=import-outside-toplevel
+    from polaris.convert.gexf import GEXFConverter
 
     output_extension = splitext(output_file)[1]
 
@@ -267,14 +294,34 @@ def cli_convert(input_file, output_file):
 @click.option('--save_test_train_data',
               is_flag=True,
               help="Save test and train data")
+@click.option('--score-only',
+              is_flag=True,
+              help="Skip training, score the input data with the models "
+              "previously saved in the cache directory")
+@click.option('--chunk_size',
+              is_flag=False,
+              type=int,
+              default=None,
+              help="Number of windows encoded at once with --score-only, "
+              "defaults to the chunk size of the anomaly detector")
 # pylint: disable-msg=too-many-arguments
 def cli_behave(input_file, output_file, detector_config_file, cache_dir,
-               metrics_dir, csv_sep, save_test_train_data):
+               metrics_dir, csv_sep, save_test_train_data, score_only,
+               chunk_size):
     """ Detect Anomaly events in input data and generates a report
         Supports Json and CSV input file
 
+        With --score-only, the models and normalizer saved in the cache
+        directory by a previous run are used instead of training new ones.
+
         :param input_file: Path to the graph file generated by polaris learn
     """
+    # pylint: disable=import-outside-toplevel
+    from polaris.anomaly.anomaly_detector import ENCODE_CHUNK_SIZE
+    from polaris.anomaly.behave import behave
+
+    if chunk_size is None:
+        chunk_size = ENCODE_CHUNK_SIZE
 
     behave(
         input_file=input_file,
@@ -284,6 +331,8 @@ def cli_behave(input_file, output_file, detector_config_file, cache_dir,
         metrics_dir=metrics_dir,
         csv_sep=csv_sep,
         save_test_train_data=save_test_train_data,
+        score_only=score_only,
+        chunk_size=chunk_size,
     )
 
 
@@ -295,9 +344,48 @@ def cli_report(input_file):
     """
     Launch webserver to show polaris reports
     """
+    # pylint: disable=import-outside-toplevel
+    from polaris.reports.server import launch_report_webserver
+
     launch_report_webserver(input_file)
 
 
+@click.command('serve',
+               short_help='Run fetch, learn and behave jobs from a daemon')
+@click.option('--host',
+              default='localhost',
+              show_default=True,
+              help='Address the daemon listens on')
+@click.option('--port', default=8765, show_default=True)
+@click.option('--workers',
+              default=1,
+              show_default=True,
+              help='Number of jobs run at once, learn and behave jobs '
+                   'still run one at a time')
+@click.option('--dataset_cache_size',
+              default=4,
+              show_default=True,
+              help='Number of datasets kept in memory')
+@click.option('--model_cache_size',
+              default=4,
+              show_default=True,
+              help='Number of behave models kept in memory')
+@click.option('--job_history',
+              default=100,
+              show_default=True,
+              help='Number of finished jobs kept')
+def cli_serve(host, port, workers, dataset_cache_size, model_cache_size,
+              job_history):
+    """
+    Launch a daemon running the polaris jobs posted to its HTTP endpoint
+    """
+    # pylint: disable=import-outside-toplevel
+    from polaris.serve.server import launch_daemon
+
+    launch_daemon(host, port, workers, dataset_cache_size, model_cache_size,
+                  job_history)
+
+
 # click doesn't automagically add the commands to the group
 # (and thus to the help output); you have to do it manually.
 
@@ -307,3 +395,4 @@ cli.add_command(cli_batch)
 cli.add_command(cli_convert)
 cli.add_command(cli_behave)
 cli.add_command(cli_report)
+cli.add_command(cli_serve)
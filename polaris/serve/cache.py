@@ -0,0 +1,91 @@
+"""
+Least recently used caches kept by the polaris daemon
+"""
+
+import collections
+import logging
+import os
+import threading
+
+from polaris.data.segmented import SegmentedDataset
+
+LOGGER = logging.getLogger(__name__)
+
+
+class LRUCache:
+    """Thread-safe mapping keeping its maxsize most recently used entries
+    """
+
+    def __init__(self, maxsize):
+        """
+        :param maxsize: number of entries kept, 0 to keep none
+        :type maxsize: int
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def get(self, key, default=None):
+        """Return the value of key, marking it as the most recently used
+
+        :return: value of key, or default if it is not cached
+        """
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                evicted, _ = self._entries.popitem(last=False)
+                LOGGER.debug("Evicted %s from cache", evicted)
+
+    def clear(self):
+        """Remove all the entries"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return the size, hits and misses of the cache
+
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+def dataset_cache_key(path, csv_sep=','):
+    """Identify the version of a dataset file or segmented directory
+
+    :param path: Dataset file or directory path
+    :param csv_sep: CSV separator the dataset is read with
+    :return: key changing whenever the dataset is written
+    :rtype: tuple
+    """
+    path = os.path.abspath(path)
+    stat_path = path
+    if os.path.isdir(path):
+        stat_path = os.path.join(path, SegmentedDataset.INDEX_FILE)
+    stat = os.stat(stat_path)
+    return (path, csv_sep, stat.st_size, stat.st_mtime_ns)
@@ -0,0 +1,431 @@
+"""
+Module to run polaris commands from a long-running daemon
+
+The daemon imports the backends of fetch, learn and behave once, and runs
+the jobs submitted to its HTTP endpoint one after the other (or on a few
+workers), keeping the recently read datasets and loaded behave models in
+LRU caches. learn and behave set the MLflow experiment of their dataset,
+which is global to the process: they never run at the same time, even
+with several workers. Only the last finished jobs are kept.
+
+- POST /jobs with a JSON body {"command": "learn", "args": {...}}, the
+  args being the keyword arguments of data_fetch_decode_normalize,
+  cross_correlate or behave, queues a job and returns it,
+- GET /jobs lists the jobs, GET /jobs/<id> returns one of them, waiting
+  up to ?wait=<seconds> for it to finish,
+- GET /status returns the queue length and the cache statistics.
+
+The endpoint is not authenticated: it runs commands writing to any path,
+and is only meant to listen on the local host.
+"""
+
+import collections
+import importlib
+import inspect
+import itertools
+import json
+import logging
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from polaris.serve.cache import LRUCache, dataset_cache_key
+
+LOGGER = logging.getLogger(__name__)
+
+HOST, PORT = "localhost", 8765
+
+DEFAULT_WORKERS = 1
+DEFAULT_DATASET_CACHE_SIZE = 4
+DEFAULT_MODEL_CACHE_SIZE = 4
+
+# Number of finished jobs kept, queued and running jobs are always kept
+DEFAULT_JOB_HISTORY = 100
+
+# Function run by each command, whose signature the job arguments must fit
+BACKENDS = {
+    "fetch": ("polaris.fetch.data_fetch_decoder",
+              "data_fetch_decode_normalize"),
+    "learn": ("polaris.learn.analysis", "cross_correlate"),
+    "behave": ("polaris.anomaly.behave", "behave"),
+}
+
+# Arguments set by the daemon itself
+RESERVED_ARGS = ("data", "dataset", "artifacts_cache")
+
+# Longest wait for a job, in seconds
+MAX_WAIT = 3600
+
+
+class InvalidJob(Exception):
+    """Raised when a submitted job has an unknown command or arguments
+    """
+
+
+class Job:
+    """Polaris command queued in the daemon
+    """
+
+    def __init__(self, job_id, command, args):
+        self.id = job_id
+        self.command = command
+        self.args = args
+        self.status = "queued"
+        self.error = None
+        self.submitted = time.time()
+        self.wall_time = None
+        self.finished = threading.Event()
+
+    def to_dict(self):
+        """Return the job as a JSON serializable dictionary
+        """
+        return {
+            "id": self.id,
+            "command": self.command,
+            "args": self.args,
+            "status": self.status,
+            "error": self.error,
+            "submitted": self.submitted,
+            "wall_time": self.wall_time,
+        }
+
+
+class PolarisDaemon:
+    """Queue of polaris jobs run by worker threads, sharing the caches of
+    datasets and models
+    """
+
+    def __init__(self,
+                 workers=DEFAULT_WORKERS,
+                 dataset_cache_size=DEFAULT_DATASET_CACHE_SIZE,
+                 model_cache_size=DEFAULT_MODEL_CACHE_SIZE,
+                 commands=None,
+                 job_history=DEFAULT_JOB_HISTORY):
+        """
+        :param workers: number of jobs run at once
+        :param dataset_cache_size: number of datasets kept in memory
+        :param model_cache_size: number of behave models kept in memory
+        :param commands: function run by each command, defaults to None
+            (fetch, learn and behave)
+        :type commands: dict, optional
+        :param job_history: number of finished jobs kept
+        """
+        self.datasets = LRUCache(dataset_cache_size)
+        self.models = LRUCache(model_cache_size)
+        self.commands = commands
+        self.backends = {}
+        if commands is None:
+            self.commands = {
+                "fetch": self.run_fetch,
+                "learn": self.run_learn,
+                "behave": self.run_behave,
+            }
+            self.backends = BACKENDS
+        self.job_history = job_history
+        self._jobs = collections.OrderedDict()
+        # Held by the commands setting the MLflow experiment
+        self._mlflow_lock = threading.Lock()
+        self._job_ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._workers = [
+            threading.Thread(target=self._work,
+                             name="polaris-worker-{}".format(i),
+                             daemon=True) for i in range(workers)
+        ]
+
+    def warm_up(self):
+        """Import the backends of the commands, ahead of the first jobs
+        """
+        for command, (module, _) in self.backends.items():
+            LOGGER.info("Importing %s backend", command)
+            try:
+                importlib.import_module(module)
+            except ImportError as error:
+                LOGGER.warning("%s jobs will fail: %s", command, error)
+
+    def _signature(self, command):
+        """Signature the arguments of a command must fit"""
+        if command in self.backends:
+            module, function = self.backends[command]
+            return inspect.signature(
+                getattr(importlib.import_module(module), function))
+        return inspect.signature(self.commands[command])
+
+    def start(self):
+        """Start the worker threads
+        """
+        for worker in self._workers:
+            worker.start()
+
+    def stop(self):
+        """Stop the worker threads once the queued jobs are run
+        """
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join()
+
+    def submit(self, command, args=None):
+        """Queue a job
+
+        :param command: name of the command to run
+        :param args: keyword arguments of the command
+        :type args: dict
+        :return: queued job
+        :rtype: Job
+        :raises InvalidJob: If the command or its arguments are invalid
+        """
+        args = args or {}
+        if command not in self.commands:
+            raise InvalidJob("Unknown command {}".format(command))
+        if not isinstance(args, dict):
+            raise InvalidJob("Arguments must be a JSON object")
+        reserved = set(args).intersection(RESERVED_ARGS)
+        if reserved:
+            raise InvalidJob("Reserved arguments: {}".format(
+                ", ".join(sorted(reserved))))
+        try:
+            self._signature(command).bind(**args)
+        except TypeError as error:
+            raise InvalidJob(str(error)) from error
+        except ImportError as error:
+            raise InvalidJob("{} is unavailable: {}".format(command,
+                                                            error)) from error
+
+        with self._lock:
+            job = Job(next(self._job_ids), command, args)
+            self._jobs[job.id] = job
+        self._queue.put(job)
+        LOGGER.info("Queued job %d: %s", job.id, command)
+        return job
+
+    def _prune_jobs(self):
+        """Forget the oldest finished jobs beyond the job history"""
+        with self._lock:
+            finished = [
+                job_id for job_id, job in self._jobs.items()
+                if job.finished.is_set()
+            ]
+            for job_id in finished[:max(0,
+                                        len(finished) - self.job_history)]:
+                del self._jobs[job_id]
+
+    def job(self, job_id):
+        """Return a job, or None if there is no such job
+        """
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self):
+        """Return all the jobs
+        """
+        with self._lock:
+            return list(self._jobs.values())
+
+    def status(self):
+        """Return the queue length and cache statistics
+
+        :rtype: dict
+        """
+        return {
+            "queued": self._queue.qsize(),
+            "datasets": self.datasets.stats(),
+            "models": self.models.stats(),
+        }
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            LOGGER.info("Running job %d: %s", job.id, job.command)
+            job.status = "running"
+            start = time.perf_counter()
+            try:
+                self.commands[job.command](**job.args)
+                job.status = "done"
+            except SystemExit as exit_error:
+                job.status = "done" if exit_error.code in (None, 0) \
+                    else "failed"
+                job.error = "exit code {}".format(exit_error.code)
+            except Exception as error:  # pylint: disable=W0703
+                LOGGER.error("Job %d failed: %s", job.id, error)
+                job.status = "failed"
+                job.error = str(error)
+            job.wall_time = time.perf_counter() - start
+            LOGGER.info("Job %d %s in %.1fs", job.id, job.status,
+                        job.wall_time)
+            job.finished.set()
+            self._prune_jobs()
+
+    def read_data(self, input_file, csv_sep=','):
+        """Read a dataset, or get it from the dataset cache
+
+        :param input_file: dataset file or directory
+        :param csv_sep: CSV separator of the dataset
+        :return: metadata and a copy of the dataframe of the dataset, that
+            the commands can modify
+        :rtype: tuple
+        """
+        # pylint: disable=import-outside-toplevel
+        from polaris.data.readers import read_polaris_data
+        from polaris.dataset.metadata import PolarisMetadata
+
+        key = dataset_cache_key(input_file, csv_sep)
+        data = self.datasets.get(key)
+        if data is None:
+            data = read_polaris_data(input_file, csv_sep)
+            self.datasets[key] = data
+        else:
+            LOGGER.info("Dataset %s found in cache", input_file)
+        metadata, dataframe = data
+        return PolarisMetadata(metadata), dataframe.copy()
+
+    def run_fetch(self, **kwargs):
+        """Run fetch, keeping the dataset written in the dataset cache
+        """
+        # pylint: disable=import-outside-toplevel
+        from polaris.data.columnar import dataset_to_columns, \
+            is_columnar_file
+        from polaris.dataset.metadata import PolarisMetadata
+        from polaris.fetch.data_fetch_decoder import \
+            data_fetch_decode_normalize
+
+        dataset = data_fetch_decode_normalize(**kwargs)
+
+        output_file = kwargs.get("output_file")
+        if dataset is not None and not is_columnar_file(output_file):
+            # Same data as read_polaris_data would read from the file
+            dataframe, _ = dataset_to_columns(dataset)
+            self.datasets[dataset_cache_key(output_file)] = (PolarisMetadata(
+                dataset.metadata), dataframe)
+        return dataset
+
+    def run_learn(self, input_file, csv_sep=',', **kwargs):
+        """Run learn on a dataset read through the dataset cache
+        """
+        # pylint: disable=import-outside-toplevel
+        from polaris.learn.analysis import cross_correlate
+
+        data = self.read_data(input_file, csv_sep)
+        with self._mlflow_lock:
+            cross_correlate(input_file, csv_sep=csv_sep, data=data, **kwargs)
+
+    def run_behave(self, input_file, csv_sep=',', **kwargs):
+        """Run behave on a dataset read through the dataset cache, with
+        the models cache
+        """
+        # pylint: disable=import-outside-toplevel
+        from polaris.anomaly.behave import behave
+
+        data = self.read_data(input_file, csv_sep)
+        with self._mlflow_lock:
+            behave(input_file,
+                   csv_sep=csv_sep,
+                   data=data,
+                   artifacts_cache=self.models,
+                   **kwargs)
+
+
+class DaemonHTTPHandler(BaseHTTPRequestHandler):
+    """HTTP Handler submitting jobs to the daemon of the server
+    """
+
+    def _send_json(self, content, status=200):
+        body = json.dumps(content).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Return the jobs or the daemon status"""
+        daemon = self.server.daemon
+        url = urlparse(self.path)
+        parts = url.path.strip("/").split("/")
+
+        if parts == ["status"]:
+            self._send_json(daemon.status())
+        elif parts == ["jobs"]:
+            self._send_json([job.to_dict() for job in daemon.jobs()])
+        elif len(parts) == 2 and parts[0] == "jobs" and parts[1].isdigit():
+            job = daemon.job(int(parts[1]))
+            if job is None:
+                self._send_json({"error": "No such job"}, 404)
+                return
+            wait = parse_qs(url.query).get("wait")
+            if wait:
+                try:
+                    job.finished.wait(min(float(wait[0]), MAX_WAIT))
+                except ValueError:
+                    self._send_json({"error": "Invalid wait"}, 400)
+                    return
+            self._send_json(job.to_dict())
+        else:
+            self._send_json({"error": "Not found"}, 404)
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Queue a job"""
+        if urlparse(self.path).path.strip("/") != "jobs":
+            self._send_json({"error": "Not found"}, 404)
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+            job = self.server.daemon.submit(request.get("command"),
+                                            request.get("args"))
+        except (ValueError, AttributeError):
+            self._send_json({"error": "Invalid JSON object"}, 400)
+            return
+        except InvalidJob as error:
+            self._send_json({"error": str(error)}, 400)
+            return
+        self._send_json(job.to_dict(), 202)
+
+    def log_message(self, format, *args):  # pylint: disable=W0622
+        LOGGER.debug("%s - %s", self.address_string(), format % args)
+
+
+class DaemonHTTPServer(ThreadingHTTPServer):
+    """HTTP server of a polaris daemon
+    """
+    daemon_threads = True
+
+    def __init__(self, address, daemon):
+        super().__init__(address, DaemonHTTPHandler)
+        self.daemon = daemon
+
+
+def launch_daemon(host=HOST,
+                  port=PORT,
+                  workers=DEFAULT_WORKERS,
+                  dataset_cache_size=DEFAULT_DATASET_CACHE_SIZE,
+                  model_cache_size=DEFAULT_MODEL_CACHE_SIZE,
+                  job_history=DEFAULT_JOB_HISTORY):
+    """ Start the daemon, until interrupted
+
+        - Import the backends of the commands
+        - Serve the job queue over HTTP at host:port
+    """
+    daemon = PolarisDaemon(workers,
+                           dataset_cache_size,
+                           model_cache_size,
+                           job_history=job_history)
+    daemon.warm_up()
+    daemon.start()
+
+    server = DaemonHTTPServer((host, port), daemon)
+    LOGGER.info("Polaris daemon listening on http://%s:%d", host,
+                server.server_address[1])
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        LOGGER.info("Stopping polaris daemon")
+    finally:
+        server.server_close()
+        daemon.stop()
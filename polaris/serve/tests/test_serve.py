@@ -0,0 +1,154 @@
+"""Tests for the polaris daemon
+"""
+
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from polaris.serve.cache import LRUCache, dataset_cache_key
+from polaris.serve.server import DaemonHTTPServer, PolarisDaemon
+
+
+def test_lru_cache_evicts_least_recently_used():
+    """The least recently used entry goes first"""
+    cache = LRUCache(2)
+    cache["a"] = 1
+    cache["b"] = 2
+    assert cache.get("a") == 1
+    cache["c"] = 3
+
+    assert "b" not in cache
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.get("b") is None
+    assert cache.stats() == {
+        "size": 2,
+        "maxsize": 2,
+        "hits": 3,
+        "misses": 1
+    }
+
+
+def test_dataset_cache_key_changes_with_file(tmp_path):
+    """Writing a dataset changes its key"""
+    path = tmp_path / "frames.json"
+    path.write_text("{}")
+    key = dataset_cache_key(str(path))
+    assert dataset_cache_key(str(path)) == key
+
+    path.write_text('{"frames": []}')
+    assert dataset_cache_key(str(path)) != key
+
+
+@pytest.fixture(name="daemon_url")
+def fixture_daemon_url():
+    """Daemon running a command adding two numbers, served on a free port"""
+    results = []
+
+    def add(left, right=0):
+        if left is None:
+            raise ValueError("No left operand")
+        results.append(left + right)
+
+    daemon = PolarisDaemon(commands={"add": add})
+    daemon.start()
+    server = DaemonHTTPServer(("localhost", 0), daemon)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield "http://localhost:{}".format(server.server_address[1]), results
+    server.shutdown()
+    server.server_close()
+    daemon.stop()
+
+
+def request(url, body=None):
+    """Send a request, returning the status and the JSON content"""
+    data = None if body is None else json.dumps(body).encode()
+    try:
+        with urllib.request.urlopen(url, data=data, timeout=10) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as error:
+        return error.code, json.load(error)
+
+
+def test_job_lifecycle(daemon_url):
+    """A posted job is queued, run, then reported"""
+    url, results = daemon_url
+    status, job = request(url + "/jobs", {
+        "command": "add",
+        "args": {
+            "left": 1,
+            "right": 2
+        }
+    })
+    assert status == 202
+    assert job["status"] in ("queued", "running", "done")
+
+    status, job = request("{}/jobs/{}?wait=10".format(url, job["id"]))
+    assert status == 200
+    assert job["status"] == "done"
+    assert job["wall_time"] is not None
+    assert results == [3]
+
+    status, job = request(url + "/jobs", {
+        "command": "add",
+        "args": {
+            "left": None
+        }
+    })
+    status, job = request("{}/jobs/{}?wait=10".format(url, job["id"]))
+    assert job["status"] == "failed"
+    assert job["error"] == "No left operand"
+
+    status, jobs = request(url + "/jobs")
+    assert [job["id"] for job in jobs] == [1, 2]
+
+
+@pytest.mark.parametrize("body", [
+    {
+        "command": "unknown"
+    },
+    {
+        "command": "add",
+        "args": {
+            "right": 1
+        }
+    },
+    {
+        "command": "add",
+        "args": {
+            "left": 1,
+            "data": []
+        }
+    },
+    ["add"],
+])
+def test_invalid_jobs_are_rejected(daemon_url, body):
+    """Jobs with an unknown command or arguments are not queued"""
+    url, _ = daemon_url
+    status, content = request(url + "/jobs", body)
+    assert status == 400
+    assert "error" in content
+    assert request(url + "/jobs") == (200, [])
+
+
+def test_unknown_job(daemon_url):
+    """Missing jobs are not found"""
+    url, _ = daemon_url
+    assert request(url + "/jobs/42")[0] == 404
+    assert request(url + "/status")[1]["queued"] == 0
+
+
+def test_finished_jobs_are_pruned():
+    """Only the last finished jobs are kept"""
+    daemon = PolarisDaemon(commands={"noop": lambda: None}, job_history=2)
+    daemon.start()
+    jobs = [daemon.submit("noop") for _ in range(4)]
+    daemon.stop()
+
+    assert all(job.status == "done" for job in jobs)
+    assert [job.id for job in daemon.jobs()] == [3, 4]
+    assert daemon.job(1) is None
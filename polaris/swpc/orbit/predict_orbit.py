@@ -3,18 +3,23 @@
 
 import logging
 from datetime import datetime
+from functools import lru_cache
 from math import pi
 
+import numpy as np
 import pandas as pd
 from astropy import units as u
 from astropy.time import Time
+from orbit_predictor.exceptions import PropagationError
 from orbit_predictor.sources import get_predictor_from_tle_lines
 from poliastro.bodies import Earth
 from poliastro.constants import GM_earth
 from poliastro.core import angles
 from poliastro.twobody.orbit import Orbit
+from sgp4.api import SGP4_ERRORS, Satrec
+from sgp4.model import WGS84
 
-from polaris.swpc.storage.retrieve import get_nearest_from_df
+from polaris.swpc.storage.retrieve import TimeLookup
 
 LOGGER = logging.getLogger(__name__)
 CH = logging.StreamHandler()
@@ -24,6 +29,11 @@ FORMATTER = logging.Formatter(LOG_FORMAT)
 CH.setFormatter(FORMATTER)
 LOGGER.addHandler(CH)
 
+# Julian date of the POSIX epoch, and nanoseconds in a day
+UNIX_EPOCH_JD = 2440587.5
+NS_PER_DAY = 86400 * 10**9
+SATREC_CACHE_SIZE = 128
+
 
 def get_orbit_from_df(data):
     """Gets orbit using poliastro from OMM data
@@ -144,6 +154,102 @@ def get_position_velocity_from_tle(epoch_time, tle_data):
     return rv_dict
 
 
+@lru_cache(maxsize=SATREC_CACHE_SIZE)
+def get_satrec_from_tle_lines(tle_line1, tle_line2):
+    """Gets the SGP4 propagator of a TLE, built once for every TLE
+
+    Args:
+        tle_line1 (str): First line of the TLE
+        tle_line2 (str): Second line of the TLE
+
+    Returns:
+        sgp4.api.Satrec: Propagator, as used by orbit_predictor
+    """
+    return Satrec.twoline2rv(tle_line1, tle_line2, WGS84)
+
+
+def julian_dates(epoch_ns):
+    """Converts times to Julian dates, split as sgp4 expects them
+
+    Args:
+        epoch_ns (np.ndarray): Times as nanoseconds since the POSIX epoch
+
+    Returns:
+        tuple: Julian date of the day (np.ndarray) and fraction of the
+            day (np.ndarray)
+    """
+    days, remainder = np.divmod(epoch_ns, NS_PER_DAY)
+    return UNIX_EPOCH_JD + days, remainder / NS_PER_DAY
+
+
+def greenwich_sidereal_times(julian_date):
+    """Greenwich mean sidereal times, as sgp4's gstime for arrays
+
+    Args:
+        julian_date (np.ndarray): Julian dates (UT1)
+
+    Returns:
+        np.ndarray: Sidereal times in radians
+    """
+    tut1 = (julian_date - 2451545.0) / 36525.0
+    seconds = (
+        -6.2e-6 * tut1 * tut1 * tut1
+        + 0.093104 * tut1 * tut1
+        + (876600.0 * 3600 + 8640184.812866) * tut1
+        + 67310.54841
+    )
+    return np.mod(np.radians(seconds / 240.0), 2 * pi)
+
+
+def eci_to_ecef(coordinates, gmst):
+    """Rotates ECI coordinates to ECEF, as orbit_predictor does for
+    a single point
+
+    Args:
+        coordinates (np.ndarray): ECI coordinates, one row per point
+        gmst (np.ndarray): Greenwich mean sidereal time of every point
+
+    Returns:
+        np.ndarray: ECEF coordinates, one row per point
+    """
+    sin_gmst = np.sin(gmst)
+    cos_gmst = np.cos(gmst)
+    ecef = np.empty_like(coordinates)
+    ecef[:, 0] = coordinates[:, 0] * cos_gmst + coordinates[:, 1] * sin_gmst
+    ecef[:, 1] = coordinates[:, 1] * cos_gmst - coordinates[:, 0] * sin_gmst
+    ecef[:, 2] = coordinates[:, 2]
+    return ecef
+
+
+def propagate_tle(tle_line1, tle_line2, epoch_ns):
+    """Gets position and velocity of one TLE at several times at once
+
+    Args:
+        tle_line1 (str): First line of the TLE
+        tle_line2 (str): Second line of the TLE
+        epoch_ns (np.ndarray): Times as nanoseconds since the POSIX epoch
+
+    Raises:
+        PropagationError: When SGP4 fails for one of the times
+
+    Returns:
+        tuple: Positions (km) and velocities (km/s) in ECEF coordinates,
+            one row per time
+    """
+    julian_date, day_fraction = julian_dates(epoch_ns)
+    satrec = get_satrec_from_tle_lines(tle_line1, tle_line2)
+    errors, position_eci, velocity_eci = satrec.sgp4_array(
+        julian_date, day_fraction
+    )
+
+    failed = np.flatnonzero(errors)
+    if failed.size:
+        raise PropagationError(SGP4_ERRORS[errors[failed[0]]])
+
+    gmst = greenwich_sidereal_times(julian_date + day_fraction)
+    return eci_to_ecef(position_eci, gmst), eci_to_ecef(velocity_eci, gmst)
+
+
 def get_position_velocity_multiple_from_tle(epoch_times, orbit_df):
     """Gets position and velocity at every epoch_time in epoch_times
 
@@ -175,12 +281,31 @@ def get_position_velocity_multiple_from_tle(epoch_times, orbit_df):
 
     orbit_df = orbit_df.loc[~orbit_df.index.duplicated(keep="first")]
 
-    pv_multiple = []
-    for epoch_time in epoch_times:
-        pv_multiple.append(
-            get_position_velocity_from_tle(
-                epoch_time, get_nearest_from_df(epoch_time, orbit_df)
-            )
+    LOGGER.info(
+        "Propogating the orbit and calculating position and velocity at %d"
+        " times",
+        len(epoch_times),
+    )
+
+    epoch_ns = pd.DatetimeIndex(epoch_times).asi8
+    nearest = TimeLookup(orbit_df).nearest_positions(epoch_ns)
+
+    # Every TLE is propagated once, for all the times it is nearest to
+    positions = np.empty((len(epoch_times), 3))
+    velocities = np.empty((len(epoch_times), 3))
+    tle_indices, groups = np.unique(nearest, return_inverse=True)
+    line1 = orbit_df["TLE_LINE1"].to_numpy()
+    line2 = orbit_df["TLE_LINE2"].to_numpy()
+    for group, tle_index in enumerate(tle_indices):
+        members = np.flatnonzero(groups == group)
+        positions[members], velocities[members] = propagate_tle(
+            line1[tle_index], line2[tle_index], epoch_ns[members]
         )
 
-    return pd.DataFrame(pv_multiple).set_index("t")
+    return pd.DataFrame(
+        {
+            "t": epoch_times,
+            "r": list(positions * u.km),
+            "v": list(velocities * (u.km / u.s)),
+        }
+    ).set_index("t")
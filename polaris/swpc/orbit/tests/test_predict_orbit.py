@@ -2,7 +2,7 @@
 """
 
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 
 import astropy.units as u
 import pandas as pd
@@ -18,6 +18,7 @@ from polaris.swpc.orbit.tle_fetch import (
     fetch_from_celestrak_csv,
     fetch_from_celestrak_txt,
 )
+from polaris.swpc.storage.retrieve import get_nearest_from_df
 
 FIXTURE_DIR = os.path.join(
     os.path.dirname(os.path.realpath(__file__)),
@@ -85,3 +86,27 @@ def test_get_position_velocity_multiple_from_tle():
     )
     assert isinstance(predicted_rvs, pd.DataFrame)
     assert isinstance(predicted_rvs.index, pd.DatetimeIndex)
+
+
+def test_get_position_velocity_multiple_from_tle_batch():
+    """Test that propagating many times at once matches one at a time"""
+    first_time = datetime(year=2019, month=7, day=9, hour=5, minute=30)
+    epoch_times = [
+        first_time + timedelta(hours=7 * i, seconds=i) for i in range(50)
+    ]
+    predicted_rvs = get_position_velocity_multiple_from_tle(
+        epoch_times, TLE_DATA
+    )
+
+    assert list(predicted_rvs.index) == epoch_times
+
+    tle_data = TLE_DATA.loc[~TLE_DATA.index.duplicated(keep="first")]
+    for epoch_time, row in zip(epoch_times, predicted_rvs.itertuples()):
+        expected_rv = get_position_velocity_from_tle(
+            epoch_time, get_nearest_from_df(epoch_time, tle_data)
+        )
+        for key in ("r", "v"):
+            assert getattr(row, key).unit == expected_rv[key].unit
+            assert getattr(row, key).value == pytest.approx(
+                expected_rv[key].value, abs=1e-6
+            )
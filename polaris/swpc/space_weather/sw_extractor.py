@@ -1,13 +1,16 @@
 """Module for extracting space weather data fetched from SWPC
 """
 
+import hashlib
+import json
 import logging
+import os
 import re
 
 import numpy as np
 import pandas as pd
-
-from polaris.swpc.storage.common import set_datetime_index
+import pyarrow as pa
+from pyarrow import parquet
 
 LOGGER = logging.getLogger(__name__)
 CH = logging.StreamHandler()
@@ -18,6 +21,11 @@ CH.setFormatter(FORMATTER)
 LOGGER.addHandler(CH)
 
 
+# Bumped when the extracted data changes, to ignore older cached data
+PARSED_CACHE_VERSION = 1
+PARSED_CACHE_METADATA_KEY = b"polaris_sw_source"
+
+
 class NoSpaceWeatherForIndex(Exception):
     """Raised when we have no sw data for a specific index"""
 
@@ -121,13 +129,9 @@ def extract_data_regex(name, path_to_file):
     else:
         raise ValueError("The data {} is not supported yet".format(name))
 
-    data = []
-
     with open(path_to_file) as file:
         LOGGER.info("Extracting data from %s", path_to_file)
-        matches = re.finditer(regex, file.read(), re.MULTILINE)
-        for match in matches:
-            data.append(match.groups())
+        data = re.findall(regex, file.read(), re.MULTILINE)
 
     if data == []:
         raise ValueError(
@@ -135,28 +139,181 @@ def extract_data_regex(name, path_to_file):
             "Are you sure the file name and type are correct?"
         )
 
-    dataframe = pd.DataFrame(data, columns=column_dict.keys())
-    dataframe = set_datetime_index(dataframe, "Date")
+    # One row of matched strings per day, one column per group
+    matches = np.array(data)
+    dates = np.char.replace(matches[:, 0], " ", "")
+    index = pd.DatetimeIndex(pd.to_datetime(dates, format="%Y%m%d"))
+
+    columns = list(column_dict)[1:]
+    dataframe = pd.DataFrame(
+        {
+            column: _parse_column(matches[:, position], column_dict[column])
+            for position, column in enumerate(columns, 1)
+        },
+        index=index.rename("Date"),
+    )
+
+    return dataframe
+
+
+def _parse_column(values, null_value):
+    """Converts the matched strings of a column to numbers, as pd.to_numeric
+    does, with null_value taken as missing
+
+    Args:
+        values (np.ndarray): Matched strings of the column
+        null_value (str): String marking a missing value
+
+    Returns:
+        np.ndarray: Integers, floats with NaN for missing values, or the
+            strings with NaN for missing values if they are not all numbers
+    """
+    missing = values == null_value
+    has_missing = missing.any()
+    present = values[~missing] if has_missing else values
+
+    for dtype in (np.int64, np.float64):
+        try:
+            parsed = present.astype(dtype)
+        except (ValueError, OverflowError):
+            continue
+        if not has_missing:
+            return parsed
+        column = np.full(len(values), np.nan)
+        column[~missing] = parsed
+        return column
+
+    column = values.astype(object)
+    column[missing] = np.nan
+    return column
+
+
+def _source_key(name, path_to_file):
+    """Identifies the content of path_to_file as extracted for name
+
+    Args:
+        name (str): One of dgd, dpd, dsd
+        path_to_file (str): Path to file containing data
+
+    Returns:
+        dict: Index name, absolute path, size and modification time of the
+            file
+    """
+    stat = os.stat(path_to_file)
+    return {
+        "version": PARSED_CACHE_VERSION,
+        "index": name.strip().upper(),
+        "path": os.path.abspath(path_to_file),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+    }
+
+
+def _cache_file(cache_dir, source_key):
+    """Path of the cached data of a source file
+
+    Args:
+        cache_dir (str): Directory of the cached data
+        source_key (dict): Source file key, from _source_key
+
+    Returns:
+        str: Path of a parquet file in cache_dir
+    """
+    path_hash = hashlib.sha1(source_key["path"].encode()).hexdigest()[:16]
+    return os.path.join(
+        cache_dir,
+        "{}-{}-{}.parquet".format(
+            os.path.basename(source_key["path"]),
+            source_key["index"],
+            path_hash,
+        ),
+    )
+
+
+def _read_cached(cache_file, source_key):
+    """Reads data extracted earlier, if it was extracted from the same file
 
-    null_value = ""
+    Args:
+        cache_file (str): Path of the cached data
+        source_key (dict): Key of the source file as it is now
+
+    Returns:
+        pd.DataFrame: Cached data, None when missing or stale
+    """
+    try:
+        table = parquet.read_table(cache_file)
+    except (OSError, pa.ArrowInvalid):
+        return None
+
+    metadata = table.schema.metadata or {}
+    if PARSED_CACHE_METADATA_KEY not in metadata:
+        return None
+    if json.loads(metadata[PARSED_CACHE_METADATA_KEY]) != source_key:
+        return None
+
+    dataframe = table.to_pandas()
+    # Arrow gives None for missing strings, extract_data_regex gives NaN
     for column in dataframe.columns:
-        null_value = column_dict[column]
-        dataframe[column] = pd.to_numeric(
-            dataframe[column].apply(
-                lambda x: np.nan if x == null_value else x
-            ),
-            errors="ignore",
-        )
+        if dataframe[column].dtype == object:
+            dataframe[column] = dataframe[column].fillna(np.nan)
+    return dataframe
+
+
+def _write_cached(cache_file, source_key, dataframe):
+    """Writes extracted data, with the key of its source file
+
+    Args:
+        cache_file (str): Path of the cached data
+        source_key (dict): Key of the source file
+        dataframe (pd.DataFrame): Extracted data
+    """
+    table = pa.Table.from_pandas(dataframe)
+    metadata = dict(table.schema.metadata or {})
+    metadata[PARSED_CACHE_METADATA_KEY] = json.dumps(source_key).encode()
+    table = table.replace_schema_metadata(metadata)
+
+    # Written under another name first, a partial file is never read
+    tmp_file = cache_file + ".tmp"
+    parquet.write_table(table, tmp_file)
+    os.replace(tmp_file, cache_file)
+
+
+def extract_data_cached(name, path_to_file, cache_dir):
+    """Extracts data from path_to_file as extract_data_regex does, reusing
+    the data extracted earlier while the file keeps its size and
+    modification time
+
+    Args:
+        name (str): One of dgd, dpd, dsd
+        path_to_file (str): Path to file containing data
+        cache_dir (str): Directory of the extracted data, created if needed
+
+    Returns:
+        pd.DataFrame: DataFrame containing all the data
+    """
+    source_key = _source_key(name, path_to_file)
+    cache_file = _cache_file(cache_dir, source_key)
+
+    dataframe = _read_cached(cache_file, source_key)
+    if dataframe is not None:
+        LOGGER.debug("Loading extracted data of %s", path_to_file)
+        return dataframe
 
+    dataframe = extract_data_regex(name, path_to_file)
+    os.makedirs(cache_dir, exist_ok=True)
+    _write_cached(cache_file, source_key, dataframe)
     return dataframe
 
 
-def extract_data_from_multiple(name, path_to_files):
+def extract_data_from_multiple(name, path_to_files, cache_dir=None):
     """Extract data from multiple files
 
     Args:
         name (str): Name of the index in the file
         path_to_files (list): List containing paths to the files
+        cache_dir (str, optional): Directory keeping the data extracted from
+            every file, only new or changed files are extracted again.
+            Defaults to None (no cache).
 
     Returns:
         data (pd.DataFrame): Dataframe containing all the extracted data
@@ -174,7 +331,10 @@ def extract_data_from_multiple(name, path_to_files):
     dfs = []
 
     for file in path_to_files:
-        dfs.append(extract_data_regex(name, file))
+        if cache_dir is None:
+            dfs.append(extract_data_regex(name, file))
+        else:
+            dfs.append(extract_data_cached(name, file, cache_dir))
 
     try:
         data = pd.concat(dfs)
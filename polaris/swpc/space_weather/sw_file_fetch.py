@@ -1,10 +1,14 @@
 """Module for fetching files from SWPC
 """
 
+import contextlib
 import datetime
 import ftplib
 import logging
 import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from time import sleep
 
 from polaris.swpc.space_weather import sw_extractor
@@ -17,28 +21,135 @@ FORMATTER = logging.Formatter(LOG_FORMAT)
 CH.setFormatter(FORMATTER)
 LOGGER.addHandler(CH)
 
+SUPPORTED_INDICES = ("DSD", "DPD", "DGD")
+FTP_HOST = "ftp.swpc.noaa.gov"
+FTP_PORT = 21
+FTP_TIMEOUT = 60
+OLD_INDICES_DIR = "pub/indices/old_indices"
+# Subdirectory of the downloaded files keeping the data extracted from them
+PARSED_CACHE_DIR = "parsed"
+MAX_CONNECTIONS = 4
+MAX_ATTEMPTS = 3
+BACKOFF_DELAY = 2
 
-# pylint: disable=too-many-branches
-def fetch_indices(index, start_date=None, final_date=None, directory=None):
-    """Fetch files corresponding to `index` from SWPC over the date range
-    `start_date` to `final_date`. The files are saved in the CWD.
+# Errors after which a download is tried again on a new connection
+RETRY_ERRORS = (EOFError, OSError, ftplib.error_temp, ftplib.error_reply)
+
+
+class FTPConnectionPool:
+    """Bounded pool of logged in FTP connections, shared by threads
+
+    Connections are opened when needed, up to max_connections at once, and
+    reused for the next downloads. A connection that failed is closed
+    instead of being reused.
+    """
+
+    def __init__(
+        self,
+        host=FTP_HOST,
+        directory=OLD_INDICES_DIR,
+        max_connections=MAX_CONNECTIONS,
+        port=FTP_PORT,
+        timeout=FTP_TIMEOUT,
+    ):
+        """
+        Args:
+            host (str): FTP server. Defaults to FTP_HOST.
+            directory (str): Directory of the files on the server. Defaults
+                to OLD_INDICES_DIR.
+            max_connections (int): Maximum number of connections open at
+                once. Defaults to MAX_CONNECTIONS.
+            port (int): FTP server port. Defaults to FTP_PORT.
+            timeout (float): Timeout of the connections in seconds. Defaults
+                to FTP_TIMEOUT.
+        """
+        if max_connections < 1:
+            raise ValueError(
+                "Expected at least one connection, got {}".format(
+                    max_connections
+                )
+            )
+
+        self.host = host
+        self.directory = directory
+        self.max_connections = max_connections
+        self.port = port
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_connections)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _connect(self):
+        ftp = ftplib.FTP(timeout=self.timeout)
+        try:
+            ftp.connect(self.host, self.port)
+            # Anonymous login
+            LOGGER.info(ftp.login())
+            ftp.cwd(self.directory)
+        except BaseException:
+            ftp.close()
+            raise
+        return ftp
+
+    @contextlib.contextmanager
+    def connection(self):
+        """Borrow a connection, waiting while max_connections are in use
+
+        Yields:
+            ftplib.FTP: Logged in connection, in the files directory
+        """
+        with self._slots:
+            try:
+                ftp = self._idle.get_nowait()
+            except queue.Empty:
+                ftp = self._connect()
+
+            try:
+                yield ftp
+            except ftplib.error_perm:
+                # The server refused a command, the connection still works
+                self._idle.put(ftp)
+                raise
+            except BaseException:
+                ftp.close()
+                raise
+            self._idle.put(ftp)
+
+    def close(self):
+        """Close the idle connections"""
+        while True:
+            try:
+                ftp = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                ftp.quit()
+            except ftplib.all_errors:
+                ftp.close()
+
+
+def _check_fetch_arguments(start_date, final_date, directory):
+    """Internal function, checks the arguments of fetch_indices and fills
+    in the defaults
 
     Args:
-        index (str): The swpc index to fetch ('DSD', 'DPD', 'DGD')
         start_date (datetime.datetime): The start date for indices to fetch.
-            Default is final_date - 1 year.
         final_date (datetime.datetime): The end date for indices to be fetched.
-            Default is datetime.now().
-        directory (str): Path to directory where files are stored. Default CWD
+        directory (str): Path to directory where files are stored
+
+    Raises:
+        TypeError: When start_date or final_date are not datetime
+        ValueError: When start_date is greater than final_date, or directory
+            is not a folder
 
     Returns:
-        pd.DataFrame: Dataframe containing all the data fetched from SWPC
+        tuple: start_date, final_date and directory
     """
-
-    index = index.upper()
-    if index not in ("DSD", "DPD", "DGD"):
-        raise ValueError("Index {} is not currently supported".format(index))
-
     today = datetime.datetime.now()
     if final_date is None:
         final_date = today
@@ -79,72 +190,224 @@ def fetch_indices(index, start_date=None, final_date=None, directory=None):
         LOGGER.info("Path %s not found, creating", directory)
         os.makedirs(directory, exist_ok=True)
 
-    err = ""
+    return start_date, final_date, directory
 
-    for attempt in range(1, 4):
-        LOGGER.info("Attempt number: %d to fetch index %s", attempt, index)
-        try:
-            data = _fetch_attempt(index, start_date, final_date, directory)
-            break
-        except (EOFError, ConnectionRefusedError) as error_name:
-            err = error_name
-            sleep(20)
-            continue
-    else:
-        raise ConnectionError("Could not connect to ftp.swpc.noaa.gov", err)
 
-    return data
+def _check_index(index):
+    """Internal function, checks index is supported
 
+    Args:
+        index (str): The swpc index ('DSD', 'DPD', 'DGD'), in any case
+
+    Raises:
+        ValueError: When index is not supported
+
+    Returns:
+        str: index in upper case
+    """
+    index = index.upper()
+    if index not in SUPPORTED_INDICES:
+        raise ValueError("Index {} is not currently supported".format(index))
+    return index
 
-def _fetch_attempt(index, start_date, final_date, directory):
-    """Internal function, attempt to fetch index between start and final date
+
+def fetch_indices(index, start_date=None, final_date=None, directory=None):
+    """Fetch files corresponding to `index` from SWPC over the date range
+    `start_date` to `final_date`. The files are saved in the CWD.
 
     Args:
         index (str): The swpc index to fetch ('DSD', 'DPD', 'DGD')
         start_date (datetime.datetime): The start date for indices to fetch.
+            Default is final_date - 1 year.
         final_date (datetime.datetime): The end date for indices to be fetched.
-        directory (str): Path to directory where files are stored
+            Default is datetime.now().
+        directory (str): Path to directory where files are stored. Default CWD
 
     Returns:
-        pd.DataFrame: DataFrame containing all data fetched from swpc
+        pd.DataFrame: Dataframe containing all the data fetched from SWPC
     """
-    root_url = "ftp.swpc.noaa.gov"
-    old_indices_dir = "pub/indices/old_indices"
-    file_name_list, file_base_name_list = _fetch_file_names(
-        index, start_date, final_date, directory
+    index = _check_index(index)
+    start_date, final_date, directory = _check_fetch_arguments(
+        start_date, final_date, directory
     )
 
+    file_names = download_index_files(
+        [index], start_date, final_date, directory
+    )
+
+    return sw_extractor.extract_data_from_multiple(
+        index,
+        file_names[index],
+        cache_dir=os.path.join(directory, PARSED_CACHE_DIR),
+    )
+
+
+def fetch_multiple_indices(
+    indices,
+    start_date=None,
+    final_date=None,
+    directory=None,
+    max_connections=MAX_CONNECTIONS,
+):
+    """Fetch files of several indices from SWPC at once, as fetch_indices
+    does for one index
+
+    Args:
+        indices (list): The swpc indices to fetch ('DSD', 'DPD', 'DGD')
+        start_date (datetime.datetime): The start date for indices to fetch.
+            Default is final_date - 1 year.
+        final_date (datetime.datetime): The end date for indices to be fetched.
+            Default is datetime.now().
+        directory (str): Path to directory where files are stored. Default CWD
+        max_connections (int): Maximum number of files downloaded at once.
+            Defaults to MAX_CONNECTIONS.
+
+    Returns:
+        dict: Dataframe containing all the data fetched from SWPC for every
+            index, indices without data are left out
+    """
+    indices = [_check_index(index) for index in indices]
+    start_date, final_date, directory = _check_fetch_arguments(
+        start_date, final_date, directory
+    )
+
+    file_names = download_index_files(
+        indices,
+        start_date,
+        final_date,
+        directory,
+        max_connections=max_connections,
+    )
+
+    data = {}
+    for index in indices:
+        try:
+            data[index] = sw_extractor.extract_data_from_multiple(
+                index,
+                file_names[index],
+                cache_dir=os.path.join(directory, PARSED_CACHE_DIR),
+            )
+        except sw_extractor.NoSpaceWeatherForIndex as error_name:
+            LOGGER.info(error_name)
+
+    return data
+
+
+def download_index_files(
+    indices, start_date, final_date, directory, pool=None, **kwargs
+):
+    """Download the files of indices that are not in directory yet, in
+    parallel over a pool of FTP connections
+
+    Args:
+        indices (list): The swpc indices to fetch ('DSD', 'DPD', 'DGD')
+        start_date (datetime.datetime): The start date for indices to fetch.
+        final_date (datetime.datetime): The end date for indices to be fetched.
+        directory (str): Path to directory where files are stored
+        pool (FTPConnectionPool, optional): Connections to download with.
+            Defaults to a new pool to SWPC, closed when done.
+        **kwargs: Arguments of FTPConnectionPool for the new pool
+
+    Raises:
+        ConnectionError: When a file could not be downloaded
+
+    Returns:
+        dict: Paths of the files available for every index, the files
+            missing on the server are left out
+    """
+    file_names = {}
     to_fetch = []
-    for file_name, file_base_name in zip(file_name_list, file_base_name_list):
-        if not os.path.isfile(file_name):
-            LOGGER.debug("%s does not exist", str(file_name))
-            to_fetch.append((file_name, file_base_name))
-        else:
-            LOGGER.debug("Skipping %s, file exists", file_name)
+    for index in indices:
+        file_name_list, file_base_name_list = _fetch_file_names(
+            index, start_date, final_date, directory
+        )
+        file_names[index] = file_name_list
+        for file_name, file_base_name in zip(
+            file_name_list, file_base_name_list
+        ):
+            if not os.path.isfile(file_name):
+                LOGGER.debug("%s does not exist", str(file_name))
+                to_fetch.append((index, file_name, file_base_name))
+            else:
+                LOGGER.debug("Skipping %s, file exists", file_name)
+
+    if not to_fetch:
+        return file_names
+
+    own_pool = pool is None
+    if own_pool:
+        pool = FTPConnectionPool(**kwargs)
+
+    try:
+        with ThreadPoolExecutor(max_workers=pool.max_connections) as executor:
+            found = list(
+                executor.map(
+                    lambda item: _download_file(pool, item[1], item[2]),
+                    to_fetch,
+                )
+            )
+    finally:
+        if own_pool:
+            pool.close()
 
-    if to_fetch != []:
-        with ftplib.FTP(root_url) as ftp:
-            # Anonymous login
-            LOGGER.info(ftp.login())
-            ftp.cwd(old_indices_dir)
-
-            for (file_name, file_base_name) in to_fetch:
-                try:
-                    with open(file_name, "wb") as index_file:
-                        LOGGER.info("Fetching file at %s", file_name)
-                        ftp.retrbinary(
-                            "RETR {0}".format(file_base_name),
-                            index_file.write,
-                        )
-                except ftplib.error_perm as error_name:
-                    file_name_list.remove(
-                        os.path.join(directory, file_base_name)
+    for (index, file_name, _), is_found in zip(to_fetch, found):
+        if not is_found:
+            file_names[index].remove(file_name)
+
+    return file_names
+
+
+def _download_file(
+    pool, file_name, file_base_name, attempts=MAX_ATTEMPTS, delay=BACKOFF_DELAY
+):
+    """Internal function, downloads one file, trying again with a doubling
+    delay after connection errors
+
+    The file is written under a temporary name and renamed once complete,
+    so that an interrupted download is never taken for a cached file.
+
+    Args:
+        pool (FTPConnectionPool): Connections to download with
+        file_name (str): Path of the downloaded file
+        file_base_name (str): Name of the file on the server
+        attempts (int): Number of attempts. Defaults to MAX_ATTEMPTS.
+        delay (float): Seconds to wait after the first failed attempt.
+            Defaults to BACKOFF_DELAY.
+
+    Raises:
+        ConnectionError: When every attempt failed
+
+    Returns:
+        bool: True if the file was downloaded, False if it is not on the
+            server
+    """
+    part_file_name = file_name + ".part"
+    err = ""
+
+    for attempt in range(1, attempts + 1):
+        LOGGER.info("Attempt number: %d to fetch file %s", attempt, file_name)
+        try:
+            with pool.connection() as ftp:
+                with open(part_file_name, "wb") as index_file:
+                    LOGGER.info("Fetching file at %s", file_name)
+                    ftp.retrbinary(
+                        "RETR {0}".format(file_base_name), index_file.write
                     )
-                    os.remove(file_name)
-                    LOGGER.info(error_name)
-                    continue
+            os.replace(part_file_name, file_name)
+            return True
+        except ftplib.error_perm as error_name:
+            LOGGER.info(error_name)
+            if os.path.exists(part_file_name):
+                os.remove(part_file_name)
+            return False
+        except RETRY_ERRORS as error_name:
+            err = error_name
+            if os.path.exists(part_file_name):
+                os.remove(part_file_name)
+            if attempt < attempts:
+                sleep(delay * 2 ** (attempt - 1))
 
-    return sw_extractor.extract_data_from_multiple(index, file_name_list)
+    raise ConnectionError("Could not connect to {}".format(pool.host), err)
 
 
 def _fetch_file_names(index, start_date, final_date, directory):
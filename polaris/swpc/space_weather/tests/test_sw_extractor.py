@@ -2,10 +2,16 @@
 """
 
 import os
+import shutil
+
+import numpy as np
+import pandas as pd
 
 import pytest
+from polaris.swpc.space_weather import sw_extractor
 from polaris.swpc.space_weather.sw_extractor import (
     NoSpaceWeatherForIndex,
+    extract_data_cached,
     extract_data_from_multiple,
     extract_data_regex,
 )
@@ -60,3 +66,111 @@ def test_no_data_to_concatenate():
 
     with pytest.raises(NoSpaceWeatherForIndex):
         _ = extract_data_from_multiple("DPD", [])
+
+
+def test_extract_data_cached(tmp_path, monkeypatch):
+    """Test files are only extracted again when they change"""
+    cache_dir = str(tmp_path / "parsed")
+    path_to_files = []
+    for name in ("DGD", "DPD", "DSD"):
+        path_to_file = str(tmp_path / "2019_{}.txt".format(name))
+        shutil.copy(
+            os.path.join(FIXTURE_DIR, "2019_{}.txt".format(name)),
+            path_to_file,
+        )
+        path_to_files.append(path_to_file)
+
+        extracted_df = extract_data_regex(name, path_to_file)
+        pd.testing.assert_frame_equal(
+            extract_data_cached(name, path_to_file, cache_dir), extracted_df
+        )
+
+        # Unchanged files are loaded from the cache
+        with monkeypatch.context() as patch:
+            patch.setattr(sw_extractor, "extract_data_regex", None)
+            pd.testing.assert_frame_equal(
+                extract_data_cached(name, path_to_file, cache_dir),
+                extracted_df,
+            )
+
+    assert len(os.listdir(cache_dir)) == 3
+
+    # Changed files are extracted again
+    dgd_file = path_to_files[0]
+    with open(dgd_file) as file:
+        lines = file.readlines()
+    with open(dgd_file, "w") as file:
+        file.writelines(lines[:-10])
+
+    changed_df = extract_data_from_multiple(
+        "DGD", [dgd_file], cache_dir=cache_dir
+    )
+    pd.testing.assert_frame_equal(
+        changed_df, extract_data_regex("DGD", dgd_file)
+    )
+    assert changed_df.shape[0] == 355
+
+
+def to_numeric_column(values, null_value):
+    """Converts matched strings the way extract_data_regex used to"""
+    return pd.to_numeric(
+        pd.Series(values).apply(lambda x: np.nan if x == null_value else x),
+        errors="ignore",
+    )
+
+
+@pytest.mark.parametrize("name", ["DGD", "DPD", "DSD"])
+def test_parse_column_matches_to_numeric(name, monkeypatch):
+    """Test columns are parsed as pd.to_numeric did, null markers included"""
+    # pylint: disable=protected-access
+    parsed_columns = []
+    parse_column = sw_extractor._parse_column
+
+    def record_parse_column(values, null_value):
+        column = parse_column(values, null_value)
+        parsed_columns.append((values, null_value, column))
+        return column
+
+    monkeypatch.setattr(sw_extractor, "_parse_column", record_parse_column)
+    dataframe = extract_data_regex(
+        name, os.path.join(FIXTURE_DIR, "2019_{}.txt".format(name))
+    )
+
+    assert len(parsed_columns) == dataframe.shape[1]
+    expected = pd.DataFrame(
+        {
+            column: to_numeric_column(values, null_value)
+            for column, (values, null_value, _) in zip(
+                dataframe.columns, parsed_columns
+            )
+        }
+    )
+    pd.testing.assert_frame_equal(
+        dataframe.reset_index(drop=True), expected
+    )
+    # The fixtures hold null markers
+    assert any(
+        (values == null_value).any()
+        for values, null_value, _ in parsed_columns
+    )
+
+
+@pytest.mark.parametrize(
+    "values, null_value",
+    [
+        (["1", "-1", "23"], "-1"),
+        (["-1", "-1"], "-1"),
+        (["1.5e+02", "-1.0e+00", "2.0e+00"], "-1.0e+00"),
+        (["12", "-999.99", "0.5"], "-999.99"),
+        (["B1.2", "*", "A5.0"], "*"),
+        (["*", "7"], "*"),
+        (["3", "4"], ""),
+    ],
+)
+def test_parse_column_null_markers(values, null_value):
+    """Test null markers become NaN, and the rest keeps pd.to_numeric types"""
+    # pylint: disable=protected-access
+    column = sw_extractor._parse_column(np.array(values), null_value)
+    pd.testing.assert_series_equal(
+        pd.Series(column), to_numeric_column(values, null_value)
+    )
@@ -1,11 +1,101 @@
 """Module to test sw_file_fetch
 """
 
+import ftplib
 import os
+import shutil
+import threading
 from datetime import datetime, timedelta
 
 import pytest
-from polaris.swpc.space_weather.sw_file_fetch import fetch_indices
+from polaris.swpc.space_weather import sw_file_fetch
+from polaris.swpc.space_weather.sw_file_fetch import (
+    FTPConnectionPool,
+    download_index_files,
+    fetch_indices,
+    fetch_multiple_indices,
+)
+
+FIXTURE_DIR = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)), "test_sw_extractor"
+)
+
+
+class LocalFTP:
+    """Stand-in for ftplib.FTP serving the files of a local folder"""
+
+    folder = None
+    lock = threading.Lock()
+    connections = 0
+    open_connections = 0
+    max_open_connections = 0
+    # Number of downloads of every file failing before one succeeds
+    failures = {}
+
+    def __init__(self, timeout=None):
+        self.timeout = timeout
+
+    def connect(self, host, port):
+        with LocalFTP.lock:
+            LocalFTP.connections += 1
+            LocalFTP.open_connections += 1
+            LocalFTP.max_open_connections = max(
+                LocalFTP.max_open_connections, LocalFTP.open_connections
+            )
+
+    def login(self):
+        return "230 Login successful."
+
+    def cwd(self, directory):
+        return "250 Directory successfully changed."
+
+    def retrbinary(self, command, callback):
+        file_base_name = command.split(" ", 1)[1]
+        with LocalFTP.lock:
+            failures = LocalFTP.failures.get(file_base_name, 0)
+            LocalFTP.failures[file_base_name] = failures - 1
+        if failures > 0:
+            raise EOFError()
+
+        path = os.path.join(LocalFTP.folder, file_base_name)
+        if not os.path.isfile(path):
+            raise ftplib.error_perm("550 Failed to open file.")
+        with open(path, "rb") as served_file:
+            callback(served_file.read())
+
+    def close(self):
+        with LocalFTP.lock:
+            LocalFTP.open_connections -= 1
+
+    def quit(self):
+        self.close()
+
+
+@pytest.fixture(name="local_ftp")
+def fixture_local_ftp(tmp_path, monkeypatch):
+    """Serve 2019 DGD and DSD files from a local folder"""
+    served = tmp_path / "served"
+    served.mkdir()
+    for quarter in range(1, 5):
+        shutil.copy(
+            os.path.join(FIXTURE_DIR, "2019_DGD.txt"),
+            str(served / "2019Q{}_DGD.txt".format(quarter)),
+        )
+        shutil.copy(
+            os.path.join(FIXTURE_DIR, "2019_DSD.txt"),
+            str(served / "2019Q{}_DSD.txt".format(quarter)),
+        )
+
+    LocalFTP.folder = str(served)
+    LocalFTP.connections = 0
+    LocalFTP.open_connections = 0
+    LocalFTP.max_open_connections = 0
+    LocalFTP.failures = {}
+
+    sleeps = []
+    monkeypatch.setattr(sw_file_fetch.ftplib, "FTP", LocalFTP)
+    monkeypatch.setattr(sw_file_fetch, "sleep", sleeps.append)
+    return sleeps
 
 
 @pytest.mark.datafiles()
@@ -50,3 +140,63 @@ def test_fetch_indices_sad(datafiles):
 
     with pytest.raises(ValueError):
         fetch_indices("DGD", start_date, start_date - timedelta(days=10))
+
+
+def test_fetch_multiple_indices_local(local_ftp, tmp_path):
+    """Test fetch_multiple_indices against a local FTP stand-in"""
+    directory = str(tmp_path / "cache")
+    start_date = datetime(year=2019, month=1, day=1)
+    end_date = datetime(year=2019, month=12, day=31)
+
+    data = fetch_multiple_indices(
+        ["DGD", "dsd", "DPD"],
+        start_date,
+        end_date,
+        directory,
+        max_connections=3,
+    )
+
+    # DPD files are not served
+    assert sorted(data) == ["DGD", "DSD"]
+    assert sorted(
+        file for file in os.listdir(directory) if file.endswith(".txt")
+    ) == sorted(
+        "2019Q{}_{}.txt".format(quarter, index)
+        for quarter in range(1, 5)
+        for index in ("DGD", "DSD")
+    )
+    assert 0 < LocalFTP.max_open_connections <= 3
+    assert LocalFTP.open_connections == 0
+    assert local_ftp == []
+
+    # Cached files are not downloaded again
+    connections = LocalFTP.connections
+    data_again = fetch_multiple_indices(
+        ["DGD", "DSD"], start_date, end_date, directory
+    )
+    assert LocalFTP.connections == connections
+    assert data_again["DGD"].equals(data["DGD"])
+
+
+def test_download_index_files_backoff(local_ftp, tmp_path):
+    """Test downloads are tried again with a doubling delay"""
+    directory = str(tmp_path)
+    start_date = datetime(year=2019, month=1, day=1)
+    end_date = datetime(year=2019, month=2, day=1)
+
+    LocalFTP.failures = {"2019Q1_DGD.txt": 2}
+    with FTPConnectionPool(max_connections=1) as pool:
+        file_names = download_index_files(
+            ["DGD"], start_date, end_date, directory, pool=pool
+        )
+
+    assert file_names == {"DGD": [os.path.join(directory, "2019Q1_DGD.txt")]}
+    assert local_ftp == [2, 4]
+
+    LocalFTP.failures = {"2019Q1_DSD.txt": 3}
+    with pytest.raises(ConnectionError):
+        download_index_files(["DSD"], start_date, end_date, directory)
+
+    # Failed downloads leave nothing behind to be taken for cached files
+    assert not os.path.exists(os.path.join(directory, "2019Q1_DSD.txt"))
+    assert not os.path.exists(os.path.join(directory, "2019Q1_DSD.txt.part"))
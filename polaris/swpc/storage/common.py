@@ -1,12 +1,15 @@
 """Module for commonly used functions and constants
 """
 
+import atexit
 import logging
 import os
 import subprocess
+import threading
 from datetime import datetime
 from time import sleep
 
+import influxdb_client
 import numpy as np
 import pandas as pd
 
@@ -49,6 +52,54 @@ FORMATTER = logging.Formatter(LOG_FORMAT)
 CH.setFormatter(FORMATTER)
 LOGGER.addHandler(CH)
 
+# Clients shared by all the calls to the same server, by (url, token, org)
+_CLIENTS = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+def get_influxdb_client(url=None, token=None, org=None):
+    """Gets the InfluxDB (2.0) client shared by all the calls to a server
+
+    The client keeps its HTTP connections open between calls, it is closed
+    when Python exits or by close_influxdb_clients.
+
+    Args:
+        url (str, optional): Server URL. Defaults to IDB_BETA["host"].
+        token (str, optional): Authentication token. Defaults to
+            IDB_BETA["token"].
+        org (str, optional): Organization. Defaults to IDB_BETA["org"].
+
+    Returns:
+        influxdb_client.InfluxDBClient: Client of the server
+    """
+    key = (
+        url or IDB_BETA["host"],
+        token or IDB_BETA["token"],
+        org or IDB_BETA["org"],
+    )
+
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(key)
+        if client is None:
+            LOGGER.debug("Creating an InfluxDB client for %s", key[0])
+            client = influxdb_client.InfluxDBClient(
+                url=key[0], token=key[1], org=key[2], debug=False
+            )
+            _CLIENTS[key] = client
+
+    return client
+
+
+@atexit.register
+def close_influxdb_clients():
+    """Closes the shared InfluxDB clients"""
+    with _CLIENTS_LOCK:
+        clients = list(_CLIENTS.values())
+        _CLIENTS.clear()
+
+    for client in clients:
+        client.close()
+
 
 def set_datetime_index(dataframe, field_name="EPOCH"):
     """Converts field_name in dataframe to pd.DatetimeIndex
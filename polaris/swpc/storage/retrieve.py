@@ -5,10 +5,11 @@ import json
 import logging
 from datetime import datetime, timedelta
 
-import influxdb_client
+import numpy as np
 import pandas as pd
 
-from polaris.swpc.storage.common import IDB_BETA, set_datetime_index
+from polaris.swpc.storage.common import get_influxdb_client, \
+    set_datetime_index
 
 LOGGER = logging.getLogger(__name__)
 CH = logging.StreamHandler()
@@ -50,6 +51,7 @@ def fetch_from_influxdb(
     bucket_name,
     limit=10000,
     rename_to="EPOCH",
+    client=None,
 ):
     """Fetches all the TLEs from influxdb (2.0)
 
@@ -62,65 +64,120 @@ def fetch_from_influxdb(
             Defaults to 10000.
         rename_to (str, optional): New name of _time column.
             Defaults to "EPOCH".
+        client (influxdb_client.InfluxDBClient, optional): Client to query
+            with. Defaults to the shared client of the default server.
 
     Returns:
         pd.DataFrame: DataFrame containing the timeseries data from influxdb
     """
-    # Initialise client and the query api
-    client = influxdb_client.InfluxDBClient(
-        url=IDB_BETA["host"],
-        token=IDB_BETA["token"],
-        org=IDB_BETA["org"],
-        debug=False,
+    local_dataframes = fetch_multiple_from_influxdb(
+        start_time,
+        end_time,
+        [measurement_name],
+        bucket_name,
+        limit=limit,
+        rename_to=rename_to,
+        client=client,
     )
+
+    if measurement_name not in local_dataframes:
+        LOGGER.info("Results of the query were empty! Try a different range.")
+        return None
+
+    return local_dataframes[measurement_name]
+
+
+def fetch_multiple_from_influxdb(
+    start_time,
+    end_time,
+    measurement_names,
+    bucket_name,
+    limit=10000,
+    rename_to="EPOCH",
+    client=None,
+):
+    """Fetches several measurements from influxdb (2.0) in one query
+
+    Args:
+        start_time (datetime.datetime): Start time in query
+        end_time (datetime.datetime): Stop time in query
+        measurement_names (list): Names of the measurements to fetch from
+        bucket_name (str): Name of the bucket to fetch from
+        limit (int, optional): The maximum number of data points required
+            for every measurement. Defaults to 10000.
+        rename_to (str, optional): New name of _time column.
+            Defaults to "EPOCH".
+        client (influxdb_client.InfluxDBClient, optional): Client to query
+            with. Defaults to the shared client of the default server.
+
+    Returns:
+        dict: DataFrame containing the timeseries data from influxdb for
+            every measurement, measurements without data are left out
+    """
+    if client is None:
+        client = get_influxdb_client()
     query_client = client.query_api()
 
+    measurement_filter = " or ".join(
+        'r["_measurement"] == "{}"'.format(measurement_name)
+        for measurement_name in measurement_names
+    )
+
     # The query selects the bucket, defines the timerange,
-    # gets all measurements, pivots the table (to have field names as columns)
-    # drops the unnecessary columns, sort by time (descending),
-    # limits the number of outputs
+    # gets the measurements, pivots the table (to have field names as
+    # columns, one table per measurement), drops the unnecessary columns,
+    # sort by time (descending), limits the number of outputs
     query = (
         'from(bucket: "{0}")'
         "|> range(start: {1}, stop: {2})"
-        '|> filter(fn: (r) => r["_measurement"] == "{3}")'
+        "|> filter(fn: (r) => {3})"
         '|> pivot(rowKey:["_time"],columnKey:["_field"],valueColumn:"_value")'
-        '|> drop(columns: ["_start", "_stop", "_measurement"])'
+        '|> drop(columns: ["_start", "_stop"])'
         '|> sort(columns: ["_time"], desc: true)'
         "|> limit(n:{4}, offset: 0)"
     ).format(
         bucket_name,
         datetime.isoformat(start_time) + "Z",
         datetime.isoformat(end_time) + "Z",
-        measurement_name,
+        measurement_filter,
         limit,
     )
 
     LOGGER.info(query)
 
-    # To select all data
-    local_dataframe = query_client.query_data_frame(query)
-
-    # Housekeeping
-    query_client.__del__()
-    client.close()
-
-    if local_dataframe.empty:
-        LOGGER.info("Results of the query were empty! Try a different range.")
-        return None
-
-    # Remove unnecessary columns, rename time and set the datetime index
-    local_dataframe.drop(columns=["result", "table"], inplace=True)
-    local_dataframe.rename(columns={"_time": rename_to}, inplace=True)
-    local_dataframe = set_datetime_index(
-        dataframe=local_dataframe, field_name=rename_to
-    )
+    # Tables with different columns come as different dataframes
+    results = query_client.query_data_frame(query)
+    if isinstance(results, pd.DataFrame):
+        results = [results]
+
+    measurement_parts = {}
+    for result in results:
+        if result.empty:
+            continue
+        for measurement_name, part in result.groupby(
+            "_measurement", sort=False
+        ):
+            measurement_parts.setdefault(measurement_name, []).append(part)
+
+    local_dataframes = {}
+    for measurement_name, parts in measurement_parts.items():
+        local_dataframe = pd.concat(parts, ignore_index=True)
+
+        # Remove unnecessary columns, rename time and set the datetime index
+        local_dataframe.drop(
+            columns=["result", "table", "_measurement"], inplace=True
+        )
+        local_dataframe.rename(columns={"_time": rename_to}, inplace=True)
+        local_dataframes[measurement_name] = set_datetime_index(
+            dataframe=local_dataframe, field_name=rename_to
+        )
 
     LOGGER.info(
         "Bucket this and measure that, organizations and fields are mad."
         "Your results are ready."
     )
 
-    return local_dataframe
+    return local_dataframes
 
 
 def fetch_nearest_from_influxdb(
@@ -160,6 +217,141 @@ def fetch_nearest_from_influxdb(
     return local_dataframe
 
 
+class TimeLookup:
+    """Finds the rows of a timeseries nearest to given times
+
+    The times of the rows are kept once as a sorted array of nanoseconds
+    since the POSIX epoch, every query is a binary search on it. The
+    timeseries itself is neither copied nor modified.
+    """
+
+    def __init__(self, dataframe, index_name=None):
+        """
+        Args:
+            dataframe (pd.DataFrame): Timeseries (DataFrame) with data
+            index_name (str, optional): Name of the time column, used when
+                the index of dataframe is not pd.DatetimeIndex. Defaults to
+                None.
+
+        Raises:
+            TypeError: When dataframe is not pd.DataFrame
+            TypeError: When dataframe.index is not pd.DatetimeIndex and
+                index_name is None
+            ValueError: If the name index_name does not belong to any column
+        """
+        if not isinstance(dataframe, pd.DataFrame):
+            raise TypeError(
+                "Expected {} got {} for dataframe".format(
+                    pd.DataFrame, type(dataframe)
+                )
+            )
+
+        self.dataframe = dataframe
+        self.index_name = index_name
+        self._columns = np.arange(dataframe.shape[1])
+
+        if isinstance(dataframe.index, pd.DatetimeIndex):
+            times = dataframe.index
+        elif index_name is None:
+            raise TypeError(
+                "Expected {} got {} for dataframe.index".format(
+                    pd.DatetimeIndex, type(dataframe.index)
+                )
+            )
+        elif index_name not in dataframe.columns:
+            raise ValueError(
+                "Index {} not in columns of input dataframe".format(
+                    index_name
+                )
+            )
+        else:
+            times = pd.DatetimeIndex(pd.to_datetime(dataframe[index_name]))
+            self._columns = np.flatnonzero(dataframe.columns != index_name)
+
+        index_ns = times.asi8
+        self._order = np.argsort(index_ns, kind="stable")
+        self._epochs = index_ns[self._order]
+
+    def __len__(self):
+        return len(self._epochs)
+
+    def nearest_positions(self, epoch_ns):
+        """Gets the position of the row closest to every time, the later
+        row when two are as close
+
+        Args:
+            epoch_ns (np.ndarray): Times as nanoseconds since the POSIX epoch
+
+        Raises:
+            ValueError: When the timeseries is empty
+
+        Returns:
+            np.ndarray: Row positions in the timeseries, one per time
+        """
+        if not len(self):
+            raise ValueError("No data to find the nearest row in")
+
+        after = np.searchsorted(self._epochs, epoch_ns, side="left")
+        after = np.minimum(after, len(self) - 1)
+        before = np.maximum(after - 1, 0)
+        before_closer = np.abs(epoch_ns - self._epochs[before]) < np.abs(
+            self._epochs[after] - epoch_ns
+        )
+
+        return self._order[np.where(before_closer, before, after)]
+
+    def asof_positions(self, epoch_ns):
+        """Gets the position of the last row at or before every time, the
+        last one of the rows sharing a time
+
+        Args:
+            epoch_ns (np.ndarray): Times as nanoseconds since the POSIX epoch
+
+        Returns:
+            np.ndarray: Row positions in the timeseries, one per time, -1
+                when no row is at or before the time
+        """
+        before = np.searchsorted(self._epochs, epoch_ns, side="right") - 1
+        return np.where(before >= 0, self._order[np.maximum(before, 0)], -1)
+
+    def nearest(self, epoch_time):
+        """Gets the data closest to epoch_time
+
+        Args:
+            epoch_time (datetime.datetime): Time closest to which data is
+                found
+
+        Returns:
+            dict: Data of the row closest to epoch_time
+        """
+        epoch_ns = pd.DatetimeIndex([epoch_time]).asi8
+        position = self.nearest_positions(epoch_ns)[0]
+        return self.dataframe.iloc[position].to_dict()
+
+    def asof(self, epoch_times):
+        """Gets the data of the last row at or before every time, as
+        pd.merge_asof does
+
+        Args:
+            epoch_times (list-like): Times for which data has to be found
+
+        Returns:
+            pd.DataFrame: DataFrame with index epoch_times and data from the
+                timeseries, NaN where no row is at or before the time
+        """
+        index = pd.DatetimeIndex(pd.to_datetime(list(epoch_times)))
+        positions = self.asof_positions(index.asi8)
+        found = positions >= 0
+
+        result = self.dataframe.iloc[np.maximum(positions, 0), self._columns]
+        if not found.all():
+            result = result.where(
+                np.broadcast_to(found[:, None], result.shape)
+            )
+        result.index = index.rename(self.index_name)
+        return result
+
+
 def get_nearest_from_df(epoch_time, dataframe):
     """Gets the data closest to epoch_time from dataframe
 
@@ -182,31 +374,11 @@ def get_nearest_from_df(epoch_time, dataframe):
             )
         )
 
-    if not isinstance(dataframe, pd.DataFrame):
-        raise TypeError(
-            "Expected {} got {} for dataframe".format(
-                pd.DataFrame, type(dataframe)
-            )
-        )
-
-    if not isinstance(dataframe.index, pd.DatetimeIndex):
-        raise TypeError(
-            "Expected {} got {} for dataframe.index".format(
-                pd.DatetimeIndex, type(dataframe.index)
-            )
-        )
-
-    local_df = dataframe.copy()
-
     LOGGER.info(
         "Finding the nearest tle for %s", datetime.isoformat(epoch_time)
     )
 
-    nearest_df = local_df.iloc[
-        local_df.index.get_loc(epoch_time, method="nearest")
-    ]
-
-    return nearest_df.to_dict()
+    return TimeLookup(dataframe).nearest(epoch_time)
 
 
 def get_multiple_nearest_from_df(epoch_times, dataframe, index_name="Date"):
@@ -227,19 +399,12 @@ def get_multiple_nearest_from_df(epoch_times, dataframe, index_name="Date"):
         pd.DataFrame: DataFrame with index epoch_times and data is from
             dataframe
     """
-    local_df = dataframe.copy()
-
-    epoch_df = pd.DataFrame(
-        pd.to_datetime(epoch_times.to_list()), columns=[index_name]
-    )
-    if isinstance(local_df.index, pd.DatetimeIndex):
-        local_df.reset_index(inplace=True)
-
-    if index_name not in local_df.columns:
+    if (
+        isinstance(dataframe.index, pd.DatetimeIndex)
+        and dataframe.index.name != index_name
+    ):
         raise ValueError(
             "Index {} not in columns of input dataframe".format(index_name)
         )
 
-    local_df[index_name] = pd.to_datetime(local_df[index_name])
-
-    return pd.merge_asof(epoch_df, local_df, on="Date").set_index("Date")
+    return TimeLookup(dataframe, index_name).asof(epoch_times)
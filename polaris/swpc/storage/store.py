@@ -1,11 +1,17 @@
 """Module to store data
 """
 
+import atexit
 import logging
+import threading
 
 import influxdb_client
+from influxdb_client.client.write.dataframe_serializer import \
+    DataframeSerializer
+from influxdb_client.client.write_api import PointSettings
+from reactivex.scheduler import ThreadPoolScheduler
 
-from polaris.swpc.storage.common import IDB_BETA, find_org_id
+from polaris.swpc.storage.common import find_org_id, get_influxdb_client
 
 LOGGER = logging.getLogger(__name__)
 CH = logging.StreamHandler()
@@ -15,6 +21,170 @@ FORMATTER = logging.Formatter(LOG_FORMAT)
 CH.setFormatter(FORMATTER)
 LOGGER.addHandler(CH)
 
+# Defaults of the storage sessions
+WRITE_BATCH_SIZE = 500
+WRITE_FLUSH_INTERVAL = 1_000
+WRITE_JITTER_INTERVAL = 0
+WRITE_RETRY_INTERVAL = 5_000
+WRITE_CONCURRENCY = 1
+# Batches of points serialized ahead of the writes, per concurrent write
+WRITE_PENDING_BATCHES = 4
+
+_DEFAULT_STORAGE = None
+_DEFAULT_STORAGE_LOCK = threading.Lock()
+
+
+class InfluxDBStorage:
+    """Session writing dataframes to influxdb (2.0), meant to be reused
+
+    Points are written in batches, by a background write api kept open for
+    the whole session. Dataframes are converted to line protocol a chunk
+    at a time, and the conversion waits while too many points are not
+    written yet, so that a large dataframe is never held in memory as line
+    protocol at once.
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        client=None,
+        batch_size=WRITE_BATCH_SIZE,
+        flush_interval=WRITE_FLUSH_INTERVAL,
+        concurrency=WRITE_CONCURRENCY,
+        jitter_interval=WRITE_JITTER_INTERVAL,
+        retry_interval=WRITE_RETRY_INTERVAL,
+    ):
+        """
+        Args:
+            client (influxdb_client.InfluxDBClient, optional): Client to
+                write with. Defaults to the shared client of the default
+                server.
+            batch_size (int, optional): Number of points written in one
+                request. Defaults to WRITE_BATCH_SIZE.
+            flush_interval (int, optional): Longest time points wait for a
+                batch to fill up, in milliseconds. Defaults to
+                WRITE_FLUSH_INTERVAL.
+            concurrency (int, optional): Number of requests sent at once.
+                Defaults to WRITE_CONCURRENCY.
+            jitter_interval (int, optional): Longest random delay of a
+                request, in milliseconds. Defaults to WRITE_JITTER_INTERVAL.
+            retry_interval (int, optional): Delay before retrying a failed
+                request, in milliseconds. Defaults to WRITE_RETRY_INTERVAL.
+        """
+        if batch_size < 1 or concurrency < 1:
+            raise ValueError(
+                "Expected positive batch_size and concurrency, got {} and {}"
+                .format(batch_size, concurrency)
+            )
+
+        self.client = client or get_influxdb_client()
+        self.batch_size = batch_size
+        self.max_pending_points = batch_size * concurrency * \
+            WRITE_PENDING_BATCHES
+        self.failed_points = 0
+
+        self._buckets = set()
+        self._pending_points = 0
+        self._condition = threading.Condition()
+        self._write_api = self.client.write_api(
+            write_options=influxdb_client.WriteOptions(
+                batch_size=batch_size,
+                flush_interval=flush_interval,
+                jitter_interval=jitter_interval,
+                retry_interval=retry_interval,
+                write_scheduler=ThreadPoolScheduler(max_workers=concurrency),
+            ),
+            success_callback=self._on_success,
+            error_callback=self._on_error,
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _done(self, data):
+        """Count the points of a request as written"""
+        with self._condition:
+            self._pending_points -= data.count(b"\n") + 1
+            self._condition.notify_all()
+
+    def _on_success(self, _conf, data):
+        self._done(data)
+
+    def _on_error(self, _conf, data, exception):
+        LOGGER.error("Writing to influxdb failed: %s", exception)
+        with self._condition:
+            self.failed_points += data.count(b"\n") + 1
+        self._done(data)
+
+    def ensure_bucket(self, bucket_name):
+        """Creates bucket_name if needed, once per session
+
+        Args:
+            bucket_name (str): Name of the bucket
+        """
+        if bucket_name not in self._buckets:
+            check_bucket_exists_and_create(self.client, bucket_name)
+            self._buckets.add(bucket_name)
+
+    def write_dataframe(self, dataframe, measurement_name, bucket_name):
+        """Queues the rows of dataframe for writing, chunk by chunk
+
+        Args:
+            dataframe (pd.DataFrame): Data with a pd.DatetimeIndex
+            measurement_name (str): Name of the measurement
+            bucket_name (str): Name of the bucket to write to
+        """
+        self.ensure_bucket(bucket_name)
+
+        serializer = DataframeSerializer(
+            dataframe,
+            PointSettings(),
+            chunk_size=self.batch_size,
+            data_frame_measurement_name=measurement_name,
+        )
+        for chunk_index in range(serializer.number_of_chunks):
+            lines = serializer.serialize(chunk_index)
+            if not lines:
+                continue
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: self._pending_points <= self.max_pending_points
+                )
+                self._pending_points += len(lines)
+            self._write_api.write(bucket_name, record=lines)
+
+    def flush(self):
+        """Waits until all the queued points are written
+
+        Returns:
+            int: Number of points that could not be written in the session
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._pending_points <= 0)
+            return self.failed_points
+
+    def close(self):
+        """Writes the queued points and stops the write api"""
+        self._write_api.close()
+
+
+def get_default_storage():
+    """Gets the storage session shared by all the writes to the default
+    server, it is closed when Python exits
+
+    Returns:
+        InfluxDBStorage: Storage session
+    """
+    global _DEFAULT_STORAGE  # pylint: disable=global-statement
+    with _DEFAULT_STORAGE_LOCK:
+        if _DEFAULT_STORAGE is None:
+            _DEFAULT_STORAGE = InfluxDBStorage()
+            atexit.register(_DEFAULT_STORAGE.close)
+        return _DEFAULT_STORAGE
+
 
 def dump_to_json(dataframe, path):
     """Dumps the dataframe to json
@@ -37,45 +207,26 @@ def dump_to_json(dataframe, path):
     LOGGER.info("Finished dumping 💩")
 
 
-def dump_to_influxdb(dataframe, measurement_name, bucket_name):
+def dump_to_influxdb(
+    dataframe, measurement_name, bucket_name, storage=None, flush=True
+):
     """Dumps the dataframe to influxdb (2.0)
 
     Args:
         dataframe (pd.DataFrame): Pandas dataframe that needs to be dumped
         measurement_name (str): Name of the measurement
         bucket_name (str): Name of the bucket to dump data to
+        storage (InfluxDBStorage, optional): Session to write with. Defaults
+            to the session shared by all the writes to the default server.
+        flush (bool, optional): Wait until the data is written. Defaults to
+            True.
     """
-    # Creating the client and write client
-    client = influxdb_client.InfluxDBClient(
-        url=IDB_BETA["host"],
-        token=IDB_BETA["token"],
-        org=IDB_BETA["org"],
-        debug=False,
-    )
-
-    check_bucket_exists_and_create(client, bucket_name)
-
-    write_client = client.write_api(
-        write_options=influxdb_client.WriteOptions(
-            batch_size=500,
-            flush_interval=10_000,
-            jitter_interval=2_000,
-            retry_interval=5_000,
-        )
-    )
-
-    LOGGER.info("Client created successfully")
-
-    # Writing the data
-    write_client.write(
-        bucket_name,
-        record=dataframe,
-        data_frame_measurement_name=measurement_name,
-    )
+    if storage is None:
+        storage = get_default_storage()
 
-    # Housekeeping
-    write_client.__del__()
-    client.close()
+    storage.write_dataframe(dataframe, measurement_name, bucket_name)
+    if flush:
+        storage.flush()
 
     LOGGER.info("A dump a day keeps the maintainers away!")
 
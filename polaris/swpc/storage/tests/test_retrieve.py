@@ -1,22 +1,83 @@
 """Tests for retrieve
 """
 
+import http.server
+import json
 import os
+import threading
 from datetime import datetime, timedelta
 
 import numpy as np
 import pandas as pd
 
 import pytest
-from polaris.swpc.storage.common import set_datetime_index
+from polaris.swpc.storage.common import (
+    get_influxdb_client,
+    set_datetime_index,
+)
 from polaris.swpc.storage.retrieve import (
+    TimeLookup,
+    fetch_from_influxdb,
     fetch_from_json,
+    fetch_multiple_from_influxdb,
+    get_multiple_nearest_from_df,
     get_nearest_from_df,
 )
 from polaris.swpc.storage.store import dump_to_json
 
 np.random.seed(42)
 
+# Pivoted tables of two measurements, as InfluxDB (2.0) answers queries
+INFLUXDB_CSV = (
+    "#datatype,string,long,string,dateTime:RFC3339,long,long\r\n"
+    "#group,false,false,true,false,false,false\r\n"
+    "#default,_result,,,,,\r\n"
+    ",result,table,_measurement,_time,Planetary A,College A\r\n"
+    ",,0,DGD,2020-05-05T00:00:00Z,8,4\r\n"
+    ",,0,DGD,2020-05-04T00:00:00Z,7,3\r\n"
+    "\r\n"
+    "#datatype,string,long,string,dateTime:RFC3339,double\r\n"
+    "#group,false,false,true,false,false\r\n"
+    "#default,_result,,,,\r\n"
+    ",result,table,_measurement,_time,Radio Flux\r\n"
+    ",,1,DSD,2020-05-04T00:00:00Z,69.5\r\n"
+    "\r\n"
+)
+
+
+class InfluxDBStandIn(http.server.BaseHTTPRequestHandler):
+    """Stand-in InfluxDB server answering every query with INFLUXDB_CSV"""
+
+    queries = []
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Answer a query"""
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        InfluxDBStandIn.queries.append(json.loads(body)["query"])
+        self.send_response(200)
+        self.send_header("Content-Type", "text/csv; charset=utf-8")
+        self.end_headers()
+        self.wfile.write(INFLUXDB_CSV.encode())
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        """Keep the test output quiet"""
+
+
+@pytest.fixture(name="influxdb_client")
+def fixture_influxdb_client():
+    """Client of a stand-in InfluxDB server"""
+    InfluxDBStandIn.queries = []
+    server = http.server.ThreadingHTTPServer(
+        ("127.0.0.1", 0), InfluxDBStandIn
+    )
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield get_influxdb_client(
+        url="http://127.0.0.1:{}".format(server.server_address[1])
+    )
+    server.shutdown()
+    server.server_close()
+
 
 def test_set_datetime_index():
     """Tests for set_datetime index"""
@@ -86,3 +147,107 @@ def test_get_nearest_from_df():
             get_nearest_from_df(time, dataframe)
             == dataframe.loc[expected_time].to_dict()
         )
+
+
+def test_time_lookup_nearest_positions():
+    """Tests for TimeLookup.nearest_positions"""
+    base_time = datetime(year=2020, month=5, day=4)
+    dates = pd.date_range(start=base_time, periods=20)
+    data = np.random.randn(len(dates))
+
+    # Shuffled rows, the positions refer to the input dataframe
+    dataframe = pd.DataFrame(data=data, columns=["Data"], index=dates)
+    dataframe = dataframe.sample(frac=1, random_state=42)
+
+    times = pd.DatetimeIndex(
+        [
+            base_time,
+            base_time + timedelta(days=3, hours=12, minutes=15, seconds=57),
+            base_time - timedelta(days=1, hours=21, minutes=32),
+            base_time + timedelta(days=19),
+            base_time + timedelta(days=22, hours=7),
+            base_time + timedelta(days=2, hours=12),
+        ]
+    )
+
+    expected_times = [
+        base_time,
+        base_time + timedelta(days=4),
+        base_time,
+        base_time + timedelta(days=19),
+        base_time + timedelta(days=19),
+        base_time + timedelta(days=3),
+    ]
+
+    nearest = TimeLookup(dataframe).nearest_positions(times.asi8)
+    assert list(dataframe.index[nearest]) == expected_times
+
+    with pytest.raises(TypeError):
+        _ = TimeLookup(dataframe.reset_index())
+
+
+def test_get_multiple_nearest_from_df():
+    """Tests for get_multiple_nearest_from_df"""
+    base_time = datetime(year=2020, month=5, day=4)
+    dates = pd.date_range(start=base_time, periods=20, name="Date")
+    dataframe = pd.DataFrame(
+        data={"Data": np.random.randn(len(dates)), "Count": range(20)},
+        index=dates,
+    )
+
+    times = pd.DatetimeIndex(
+        [
+            base_time - timedelta(hours=1),
+            base_time,
+            base_time + timedelta(days=3, hours=23),
+            base_time + timedelta(days=22, hours=7),
+        ]
+    )
+
+    expected = pd.merge_asof(
+        pd.DataFrame({"Date": times}), dataframe.reset_index(), on="Date"
+    ).set_index("Date")
+
+    for data in (dataframe, dataframe.reset_index()):
+        nearest = get_multiple_nearest_from_df(times, data)
+        pd.testing.assert_frame_equal(nearest, expected)
+
+    # The input is left as it was
+    assert isinstance(dataframe.index, pd.DatetimeIndex)
+
+    with pytest.raises(ValueError):
+        _ = get_multiple_nearest_from_df(times, dataframe, "EPOCH")
+
+
+def test_fetch_multiple_from_influxdb(influxdb_client):
+    """Tests for fetch_multiple_from_influxdb against a stand-in server"""
+    start_time = datetime(year=2020, month=5, day=1)
+    end_time = datetime(year=2020, month=5, day=10)
+
+    dataframes = fetch_multiple_from_influxdb(
+        start_time,
+        end_time,
+        ["DGD", "DPD", "DSD"],
+        "bucket",
+        rename_to="Date",
+        client=influxdb_client,
+    )
+
+    # All the measurements in one query
+    assert len(InfluxDBStandIn.queries) == 1
+    for measurement_name in ("DGD", "DPD", "DSD"):
+        assert '"{}"'.format(measurement_name) in InfluxDBStandIn.queries[0]
+
+    assert sorted(dataframes) == ["DGD", "DSD"]
+    assert list(dataframes["DGD"].columns) == ["Planetary A", "College A"]
+    assert list(dataframes["DGD"]["Planetary A"]) == [8, 7]
+    assert dataframes["DGD"].index.name == "Date"
+    assert isinstance(dataframes["DSD"].index, pd.DatetimeIndex)
+    assert list(dataframes["DSD"]["Radio Flux"]) == [69.5]
+
+    # The client is shared between calls
+    assert get_influxdb_client(url=influxdb_client.url) is influxdb_client
+    assert fetch_from_influxdb(
+        start_time, end_time, "DPD", "bucket", client=influxdb_client
+    ) is None
+    assert len(InfluxDBStandIn.queries) == 2
@@ -0,0 +1,115 @@
+"""Tests for store
+"""
+
+import http.server
+import json
+import threading
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+import pytest
+from polaris.swpc.storage.common import IDB_BETA, get_influxdb_client
+from polaris.swpc.storage.store import InfluxDBStorage, dump_to_influxdb
+
+
+class InfluxDBStandIn(http.server.BaseHTTPRequestHandler):
+    """Stand-in InfluxDB server with one organization and one bucket"""
+
+    lock = threading.Lock()
+    bucket_lookups = 0
+    writes = []
+
+    def _send_json(self, content):
+        body = json.dumps(content).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Answer organization and bucket lookups"""
+        url = urlparse(self.path)
+        if url.path == "/api/v2/orgs":
+            self._send_json({"orgs": [{"id": "1", "name": IDB_BETA["org"]}]})
+        elif url.path == "/api/v2/buckets":
+            with InfluxDBStandIn.lock:
+                InfluxDBStandIn.bucket_lookups += 1
+            name = parse_qs(url.query)["name"][0]
+            self._send_json(
+                {
+                    "buckets": [
+                        {
+                            "id": "2",
+                            "name": name,
+                            "orgID": "1",
+                            "retentionRules": [],
+                        }
+                    ]
+                }
+            )
+        else:
+            self.send_error(404)
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Accept writes"""
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        bucket = parse_qs(urlparse(self.path).query)["bucket"][0]
+        with InfluxDBStandIn.lock:
+            InfluxDBStandIn.writes.append((bucket, body.decode().split("\n")))
+        self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        """Keep the test output quiet"""
+
+
+@pytest.fixture(name="influxdb_client")
+def fixture_influxdb_client():
+    """Client of a stand-in InfluxDB server"""
+    InfluxDBStandIn.bucket_lookups = 0
+    InfluxDBStandIn.writes = []
+    server = http.server.ThreadingHTTPServer(
+        ("127.0.0.1", 0), InfluxDBStandIn
+    )
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield get_influxdb_client(
+        url="http://127.0.0.1:{}".format(server.server_address[1])
+    )
+    server.shutdown()
+    server.server_close()
+
+
+def test_influxdb_storage(influxdb_client):
+    """Tests for InfluxDBStorage against a stand-in server"""
+    dates = pd.date_range(start="2020-05-04", periods=95, freq="H")
+    dataframe = pd.DataFrame(
+        data={"Radio Flux": np.arange(95.0), "New Regions": np.arange(95)},
+        index=dates,
+    )
+    # Rows without any value are not written
+    dataframe.iloc[3] = np.nan
+
+    with InfluxDBStorage(
+        influxdb_client, batch_size=10, flush_interval=100, concurrency=2
+    ) as storage:
+        dump_to_influxdb(
+            dataframe, "DSD", "bucket", storage=storage, flush=False
+        )
+        dump_to_influxdb(dataframe.iloc[:20], "DGD", "bucket", storage=storage)
+        assert storage.flush() == 0
+
+    lines = [line for _, body in InfluxDBStandIn.writes for line in body]
+    assert len(lines) == 94 + 19
+    assert sum(line.startswith("DSD ") for line in lines) == 94
+    assert all(len(body) <= 10 for _, body in InfluxDBStandIn.writes)
+    assert all(bucket == "bucket" for bucket, _ in InfluxDBStandIn.writes)
+
+    # The bucket is only looked up once per session
+    assert InfluxDBStandIn.bucket_lookups == 1
+
+    with pytest.raises(ValueError):
+        InfluxDBStorage(influxdb_client, batch_size=0)
@@ -0,0 +1,65 @@
+"""Tests for the polaris command line startup
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+import polaris
+
+# Budget of `polaris --help`, in seconds, interpreter startup included
+HELP_TIME_BUDGET = float(os.environ.get("POLARIS_HELP_TIME_BUDGET", "2.0"))
+
+# Backends only the commands using them may import
+HEAVY_MODULES = [
+    "tensorflow", "xgboost", "sklearn", "mlflow", "pandas", "pyarrow",
+    "influxdb_client", "polaris.anomaly.behave", "polaris.learn.analysis",
+    "polaris.reports.server", "polaris.fetch.data_fetch_decoder",
+    "polaris.serve.server"
+]
+
+
+def run_cli(*args, code=""):
+    """Run the polaris command line in a new interpreter, then code"""
+    script = "\n".join([
+        "import sys",
+        "from polaris.polaris import cli",
+        "try:",
+        "    cli({!r})".format(list(args)),
+        "except SystemExit:",
+        "    pass",
+        code,
+    ])
+    # Import this polaris, whatever the current directory
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [
+            os.path.dirname(os.path.dirname(polaris.__file__)),
+            env.get("PYTHONPATH")
+        ]))
+    return subprocess.run([sys.executable, "-c", script],
+                          stdout=subprocess.PIPE,
+                          env=env,
+                          check=True,
+                          universal_newlines=True)
+
+
+@pytest.mark.parametrize("args", [["--help"], ["fetch", "--help"],
+                                  ["fetch", "--list_supported_satellites"]])
+def test_cli_does_not_import_backends(args):
+    """Test that commands not run do not import their backend"""
+    output = run_cli(*args,
+                     code="import json; print(json.dumps(list(sys.modules)))")
+    imported = set(json.loads(output.stdout.splitlines()[-1]))
+    assert not imported.intersection(HEAVY_MODULES)
+
+
+def test_cli_help_time():
+    """Test that `polaris --help` runs within its time budget"""
+    run_cli("--help")  # Fill the bytecode and filesystem caches
+    start = time.perf_counter()
+    run_cli("--help")
+    assert time.perf_counter() - start < HELP_TIME_BUDGET